@@ -1,34 +1,24 @@
+import asyncio
+import logging
 from fastapi import HTTPException, status
-from motor.motor_asyncio import AsyncIOMotorDatabase
 from app.models.user import UserCreate, UserInDB
-from app.core.security import get_password_hash, verify_password
+from app.core.password_hasher import password_hasher
+from app.database.repositories import DuplicateKeyError, Repositories
 from bson import ObjectId
 
+logger = logging.getLogger(__name__)
+
+# Keeps fire-and-forget rehash tasks referenced until they finish
+_background_tasks = set()
+
 class AuthController:
-    def __init__(self, db: AsyncIOMotorDatabase):
-        self.db = db
-        self.collection = self.db.users
+    def __init__(self, repos: Repositories):
+        self.users = repos.users
 
     async def create_user(self, user: UserCreate) -> UserInDB:
         try:
-            # Check if user already exists
-            existing_user = await self.collection.find_one({"email": user.email})
-            if existing_user:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="User with this email already exists"
-                )
-            
-            # Check if mobile already exists
-            existing_mobile = await self.collection.find_one({"mobile": user.mobile})
-            if existing_mobile:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="User with this mobile number already exists"
-                )
-            
             # Prepare data
-            hashed_password = get_password_hash(user.password)
+            hashed_password = await password_hasher.hash(user.password)
             user_in_db = UserInDB(
                 **user.model_dump(),
                 hashed_password=hashed_password
@@ -41,23 +31,44 @@ class AuthController:
             if "_id" in user_dict and user_dict["_id"] is None:
                 del user_dict["_id"]
 
-            print(f"Attempting to insert user: {user_dict}")
-            new_user = await self.collection.insert_one(user_dict)
-            print(f"User inserted with ID: {new_user.inserted_id}")
+            logger.debug("Creating user", extra={"email": user_dict["email"]})
+            try:
+                # Uniqueness of email / mobile is enforced by the storage layer
+                inserted_id = await self.users.insert(user_dict)
+            except DuplicateKeyError as e:
+                if e.field == "mobile":
+                    detail = "User with this mobile number already exists"
+                else:
+                    detail = "User with this email already exists"
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+            logger.info("User created", extra={"user_id": str(inserted_id)})
             
-            # Return created user
-            created_user = await self.collection.find_one({"_id": new_user.inserted_id})
-            return UserInDB(**created_user)
-        except Exception as e:
-            print(f"CRITICAL ERROR in create_user: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            raise e
+            # Return created user without re-reading it
+            user_in_db.id = inserted_id
+            return user_in_db
+        except HTTPException:
+            raise
+        except Exception:
+            logger.exception("Failed to create user")
+            raise
 
     async def authenticate_user(self, email: str, password: str):
-        user = await self.collection.find_one({"email": email})
+        user = await self.users.find_by_email(email)
         if not user:
             return None
-        if not verify_password(password, user["hashed_password"]):
+        verified, new_hash = await password_hasher.verify_and_update(password, user["hashed_password"])
+        if not verified:
             return None
+        if new_hash:
+            # Outdated scheme or cost: store the upgraded hash without delaying the login
+            task = asyncio.create_task(self._store_rehash(user["_id"], user["hashed_password"], new_hash))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
         return UserInDB(**user)
+
+    async def _store_rehash(self, user_id: ObjectId, old_hash: str, new_hash: str):
+        try:
+            # Only replace the hash we verified, never a newer password
+            await self.users.replace_password_hash(user_id, old_hash, new_hash)
+        except Exception:
+            logger.exception("Failed to store rehashed password", extra={"user_id": str(user_id)})
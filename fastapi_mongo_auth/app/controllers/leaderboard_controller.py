@@ -0,0 +1,53 @@
+import asyncio
+from typing import List
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.database.repositories import Repositories
+from app.models.leaderboard import LeaderboardEntry
+from app.models.user import UserInDB
+
+# The top LEADERBOARD_CACHE_SIZE entries, shared by all requests in this process
+_top_cache = TTLCache(maxsize=1, ttl=settings.LEADERBOARD_REFRESH_SECONDS)
+_refresh_lock = asyncio.Lock()
+
+def _display_name(first_name: str, last_name: str) -> str:
+    # First name and last initial only; the leaderboard is visible to every user
+    return f"{first_name} {last_name[:1]}." if last_name else first_name
+
+class LeaderboardController:
+    def __init__(self, repos: Repositories):
+        self.users = repos.users
+
+    async def get_top(self, limit: int) -> List[LeaderboardEntry]:
+        entries = _top_cache.get("top")
+        if entries is None:
+            async with _refresh_lock:
+                # Another request may have refreshed while we waited
+                entries = _top_cache.get("top")
+                if entries is None:
+                    entries = await self._load_top(settings.LEADERBOARD_CACHE_SIZE)
+                    _top_cache.set("top", entries)
+        return entries[:limit]
+
+    async def _load_top(self, size: int) -> List[LeaderboardEntry]:
+        return [
+            LeaderboardEntry(
+                rank=rank,
+                userId=user["_id"],
+                name=_display_name(user.get("first_name", ""), user.get("last_name", "")),
+                level=user.get("level", 1),
+                currentXp=user.get("currentXp", 0),
+            )
+            for rank, user in enumerate(await self.users.top_by_level(size), start=1)
+        ]
+
+    async def get_rank(self, user: UserInDB) -> LeaderboardEntry:
+        """The user's rank is 1 + the number of users ordered ahead of them (an indexed count)."""
+        ahead = await self.users.count_ranked_ahead(user.level, user.current_xp, user.id)
+        return LeaderboardEntry(
+            rank=ahead + 1,
+            userId=user.id,
+            name=_display_name(user.first_name, user.last_name),
+            level=user.level,
+            currentXp=user.current_xp,
+        )
@@ -1,66 +1,162 @@
+import asyncio
 from datetime import date, timedelta
-from typing import List, Optional
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from typing import AsyncIterator, List, Optional, Set, Tuple
 from bson import ObjectId
 from fastapi import HTTPException, status
 from app.models.habit import HabitCreate, HabitInDB, HabitResponse
-from app.models.log import LogBase, LogCreate, LogInDB, LogResponse
+from app.models.log import LogCreate, LogInDB, LogResponse, LogSummary, LogSyncResult
 from app.models.user import UserInDB
+from app.core.config import settings
+from app.core.cache import principal_cache
+from app.core.data_version import DATA_VERSION_FIELD, data_version_cache, remember_data_version
+from app.core.serialization import DocumentSerializer
+from app.core.gamification import XP_PER_HABIT
+from app.core.streaks import current_streak, goal_met, is_iso_date
+from app.core.xp_accumulator import xp_accumulator
+from app.database.repositories import Repositories
+from app.database.rollups import log_delta, period_start
+
+# Fields that can be requested through GET /habits?fields=
+HABIT_FIELDS = {field.alias or name for name, field in HabitResponse.model_fields.items()} - {"_id"}
+
+habit_serializer = DocumentSerializer(HabitResponse)
 
 class TrackerController:
-    def __init__(self, db: AsyncIOMotorDatabase):
-        self.db = db
-        self.habits_collection = self.db.habits
-        self.logs_collection = self.db.logs
-        self.users_collection = self.db.users
+    def __init__(self, repos: Repositories):
+        self.habits = repos.habits
+        self.logs = repos.logs
+        self.users = repos.users
+
+    # --- Data version (ETags) ---
+    async def get_data_version(self, user_id: str) -> int:
+        """The user's current data version, from the per-process cache when possible."""
+        version = data_version_cache.get(user_id)
+        if version is None:
+            version = await self.users.get_data_version(ObjectId(user_id)) or 0
+            remember_data_version(user_id, version)
+        return version
+
+    def _user_updated(self, user: dict):
+        # Write-through so /auth/me and /user/profile don't serve stale data, and ETags change right away
+        principal_cache.set(user["email"], UserInDB(**user))
+        remember_data_version(str(user["_id"]), user.get(DATA_VERSION_FIELD, 0))
+
+    async def _bump_data_version(self, user_id: str):
+        if xp_accumulator.enabled:
+            # Written with the next flush; ETags are withheld until then
+            xp_accumulator.add(user_id, 0)
+            return
+        user = await self.users.bump_data_version(ObjectId(user_id))
+        if user:
+            self._user_updated(user)
+
+    # --- Profile ---
+    async def get_profile(self, user: UserInDB, version: int) -> UserInDB:
+        """The user as of data version `version` or later: the cached principal, reloaded if it is older."""
+        if user.data_version >= version:
+            return user
+        fresh = await self.users.find_by_email(user.email)
+        if not fresh:
+            return user
+        self._user_updated(fresh)
+        return UserInDB(**fresh)
 
     # --- Habits ---
-    async def get_habits(self, user_id: str) -> List[HabitResponse]:
-        habits = []
-        async for habit in self.habits_collection.find({"userId": ObjectId(user_id)}):
-            habits.append(HabitResponse(**habit))
-        return habits
+    async def get_habits(
+        self, user_id: str, limit: int, after: Optional[str] = None, fields: Optional[List[str]] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        One page of the user's habits in _id order, plus the cursor for the next
+        page (None on the last page).
+        Habits come back as HabitResponse-shaped dicts (or just the requested
+        `fields`), ready for MongoJSONResponse.
+        """
+        if after is not None and not ObjectId.is_valid(after):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if fields:
+            unknown = set(fields) - HABIT_FIELDS
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        docs = await self.habits.find_page(
+            ObjectId(user_id), limit + 1, ObjectId(after) if after is not None else None, fields
+        )
+
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = str(docs[-1]["_id"])
+
+        if fields:
+            return docs, next_cursor
+        habits = habit_serializer.many(docs)
+        # The serializer skips validation, so expire broken streaks here as HabitResponse would
+        for habit in habits:
+            habit["currentStreak"] = current_streak(habit["currentStreak"], habit["lastCompletedDate"])
+        return habits, next_cursor
 
     async def create_habit(self, user_id: str, habit_data: HabitCreate) -> HabitResponse:
         habit_dict = habit_data.model_dump(by_alias=True)
         habit_dict["userId"] = ObjectId(user_id)
         
-        new_habit = await self.habits_collection.insert_one(habit_dict)
-        created_habit = await self.habits_collection.find_one({"_id": new_habit.inserted_id})
+        created_habit = await self.habits.insert(habit_dict)
+        await self._bump_data_version(user_id)
         return HabitResponse(**created_habit)
 
+    async def create_habits(self, user_id: str, habits: List[HabitCreate]) -> List[HabitResponse]:
+        """Create several habits with one insert (e.g. a starter set during onboarding)."""
+        habit_dicts = []
+        for habit_data in habits:
+            habit_dict = habit_data.model_dump(by_alias=True)
+            habit_dict["userId"] = ObjectId(user_id)
+            habit_dicts.append(habit_dict)
+
+        created_habits = await self.habits.insert_many(habit_dicts)
+        if created_habits:
+            await self._bump_data_version(user_id)
+        return [HabitResponse(**habit) for habit in created_habits]
+
     async def toggle_habit(self, user_id: str, habit_id: str) -> HabitResponse:
         if not ObjectId.is_valid(habit_id):
              raise HTTPException(status_code=400, detail="Invalid ID format")
              
-        habit = await self.habits_collection.find_one({
-            "_id": ObjectId(habit_id), 
-            "userId": ObjectId(user_id)
-        })
-        if not habit:
+        # Flip and update the streak atomically (safe under concurrent toggles)
+        updated_habit = await self.habits.toggle(ObjectId(user_id), ObjectId(habit_id), date.today().isoformat())
+        if not updated_habit:
             raise HTTPException(status_code=404, detail="Habit not found")
         
-        new_status = not habit.get("isCompleted", False)
-        # Update
-        await self.habits_collection.update_one(
-            {"_id": ObjectId(habit_id)},
-            {"$set": {"isCompleted": new_status}}
-        )
-        
-        # Gamification logic: Add XP if completed
-        if new_status:
-            await self.add_xp(user_id, 10) # 10 XP per habit completion
-            
-        updated_habit = await self.habits_collection.find_one({"_id": ObjectId(habit_id)})
+        # Gamification logic: Add XP if completed (which also bumps the data version)
+        if updated_habit["isCompleted"]:
+            await self.add_xp(user_id, XP_PER_HABIT)
+        else:
+            await self._bump_data_version(user_id)
+
         return HabitResponse(**updated_habit)
 
+    async def toggle_habits(self, user_id: str, habit_ids: List[str]) -> List[HabitResponse]:
+        """
+        Toggle several habits with one write. XP for all the completions is
+        awarded in a single update, so level-ups are computed once.
+        Unknown ids are skipped; the response lists the habits that were toggled.
+        """
+        if not all(ObjectId.is_valid(habit_id) for habit_id in habit_ids):
+            raise HTTPException(status_code=400, detail="Invalid ID format")
+        # Toggling the same habit twice in one request would be a no-op with a streak side effect
+        unique_ids = [ObjectId(habit_id) for habit_id in dict.fromkeys(habit_ids)]
+
+        updated_habits = await self.habits.toggle_many(ObjectId(user_id), unique_ids, date.today().isoformat())
+        completed = sum(1 for habit in updated_habits if habit["isCompleted"])
+        if completed:
+            await self.add_xp(user_id, XP_PER_HABIT * completed)
+        elif updated_habits:
+            await self._bump_data_version(user_id)
+
+        return [HabitResponse(**habit) for habit in updated_habits]
+
     # --- Logs ---
     async def get_today_log(self, user_id: str) -> LogResponse:
         today_str = date.today().isoformat()
-        log = await self.logs_collection.find_one({
-            "userId": ObjectId(user_id),
-            "date": today_str
-        })
+        log = await self.logs.find(ObjectId(user_id), today_str)
         
         if not log:
             # Return empty/default log if not found, or create one? 
@@ -76,74 +172,200 @@ class TrackerController:
             )
         return LogResponse(**log)
 
-    async def get_log_history(self, user_id: str, start_date: str, end_date: str) -> List[LogBase]:
-        start = date.fromisoformat(start_date)
-        end = date.fromisoformat(end_date)
-        
-        # Fetch existing logs
-        cursor = self.logs_collection.find({
-            "userId": ObjectId(user_id),
-            "date": {"$gte": start_date, "$lte": end_date}
-        })
-        
-        existing_logs = {}
-        async for log in cursor:
-            existing_logs[log["date"]] = log
-            
-        history = []
+    def parse_history_range(self, start_date: str, end_date: str) -> Tuple[date, date]:
+        try:
+            start = date.fromisoformat(start_date)
+            end = date.fromisoformat(end_date)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format")
+        if end < start:
+            raise HTTPException(status_code=400, detail="endDate must not be before startDate")
+        if (end - start).days + 1 > settings.LOG_HISTORY_MAX_DAYS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Date range cannot exceed {settings.LOG_HISTORY_MAX_DAYS} days"
+            )
+        return start, end
+
+    async def iter_log_history(self, user_id: str, start: date, end: date) -> AsyncIterator[dict]:
+        """
+        Yield one row per day from start to end (inclusive), zero-filling days
+        without a log. Logs are read in date order and merged with the calendar as they arrive, so memory stays flat
+        regardless of range length.
+        """
         current = start
+        async for log in self.logs.iter_range(ObjectId(user_id), start.isoformat(), end.isoformat()):
+            try:
+                log_day = date.fromisoformat(log["date"])
+            except ValueError:
+                continue
+            # Fill gap with zero values
+            while current < log_day:
+                yield {"date": current.isoformat(), "steps": 0, "waterMl": 0, "proteinG": 0}
+                current += timedelta(days=1)
+            if log_day == current:
+                yield {
+                    "date": log["date"],
+                    "steps": log.get("steps", 0),
+                    "waterMl": log.get("waterMl", 0),
+                    "proteinG": log.get("proteinG", 0),
+                }
+                current += timedelta(days=1)
+
         while current <= end:
-            current_str = current.isoformat()
-            if current_str in existing_logs:
-                # Use existing data
-                history.append(LogBase(**existing_logs[current_str]))
-            else:
-                # Fill gap with zero values
-                history.append(LogBase(
-                    date=current_str,
-                    steps=0,
-                    waterMl=0,
-                    proteinG=0
-                ))
+            yield {"date": current.isoformat(), "steps": 0, "waterMl": 0, "proteinG": 0}
             current += timedelta(days=1)
-            
-        return history
 
-    async def sync_log(self, user_id: str, log_data: LogCreate) -> LogResponse:
+    async def get_log_history(self, user_id: str, start_date: str, end_date: str) -> List[dict]:
+        start, end = self.parse_history_range(start_date, end_date)
+        return [row async for row in self.iter_log_history(user_id, start, end)]
+
+    async def sync_log(
+        self, user_id: str, log_data: LogCreate, goal: Optional[Tuple[str, int]] = None
+    ) -> LogResponse:
         # Upsert: Update if exists, Insert if not
         log_dict = log_data.model_dump(by_alias=True)
         log_dict["userId"] = ObjectId(user_id)
         
-        result = await self.logs_collection.update_one(
-            {"userId": ObjectId(user_id), "date": log_data.date},
-            {"$set": log_dict},
-            upsert=True
-        )
-        
-        # Retrieve the updated/inserted doc
-        saved_log = await self.logs_collection.find_one({
-            "userId": ObjectId(user_id), 
-            "date": log_data.date
-        })
+        # The previous version comes back with the write, so rollups get the exact delta
+        previous_log, saved_log = await self.logs.upsert(ObjectId(user_id), log_data.date, log_dict)
+
+        await self._update_rollups(user_id, [(log_data.date, log_delta(previous_log, saved_log))])
+        # A streak update bumps the data version itself
+        if not await self._update_goal_streak(user_id, goal, [(log_data.date, previous_log, saved_log)]):
+            await self._bump_data_version(user_id)
         return LogResponse(**saved_log)
 
+    async def sync_logs_batch(
+        self, user_id: str, logs: List[LogCreate], goal: Optional[Tuple[str, int]] = None
+    ) -> List[LogSyncResult]:
+        if len(logs) > settings.LOG_SYNC_BATCH_MAX_SIZE:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Batch cannot exceed {settings.LOG_SYNC_BATCH_MAX_SIZE} entries"
+            )
+        # The last entry for a date wins, as if the days had been replayed one by one
+        latest = {log_data.date: index for index, log_data in enumerate(logs)}
+        dates = list(latest)
+        if not dates:
+            return []
+
+        log_dicts = []
+        for log_date in dates:
+            log_dict = logs[latest[log_date]].model_dump(by_alias=True)
+            log_dict["userId"] = ObjectId(user_id)
+            log_dicts.append(log_dict)
+
+        # Previous versions come back with the writes, so rollups and streaks get the exact change
+        previous_logs, errors = await self.logs.upsert_many(ObjectId(user_id), log_dicts)
+
+        op_status = {}
+        for op_index, log_date in enumerate(dates):
+            if op_index in errors:
+                op_status[log_date] = ("failed", errors[op_index])
+            elif previous_logs[op_index] is None:
+                op_status[log_date] = ("inserted", None)
+            else:
+                op_status[log_date] = ("updated", None)
+
+        await self._update_rollups(user_id, [
+            (dates[op_index], log_delta(previous_log, log_dicts[op_index]))
+            for op_index, previous_log in previous_logs.items()
+        ])
+        streak_updated = await self._update_goal_streak(user_id, goal, [
+            (dates[op_index], previous_log, log_dicts[op_index])
+            for op_index, previous_log in previous_logs.items()
+        ])
+        if not streak_updated and len(errors) < len(dates):
+            await self._bump_data_version(user_id)
+
+        results = []
+        for index, log_data in enumerate(logs):
+            if latest[log_data.date] != index:
+                results.append(LogSyncResult(date=log_data.date, status="superseded"))
+            else:
+                entry_status, error = op_status[log_data.date]
+                results.append(LogSyncResult(date=log_data.date, status=entry_status, error=error))
+        return results
+
+    async def _update_rollups(self, user_id: str, changes: List[Tuple[str, dict]]):
+        await self.logs.increment_rollups(ObjectId(user_id), changes)
+
+    async def _update_goal_streak(
+        self, user_id: str, goal: Optional[Tuple[str, int]], changes: List[Tuple[str, Optional[dict], dict]]
+    ) -> bool:
+        """
+        Apply (date, previous log, saved log) changes that flip whether the daily goal was met.
+        Logs whose date is not YYYY-MM-DD are stored but do not count towards the streak.
+        Returns whether the user was updated.
+        """
+        if goal is None:
+            return False
+        user = None
+        # Oldest first, so each day extends the streak left by the previous one
+        for log_date, previous_log, saved_log in sorted(changes, key=lambda change: change[0]):
+            if not is_iso_date(log_date):
+                continue
+            met = goal_met(saved_log, goal)
+            if met == goal_met(previous_log, goal):
+                continue
+            user = await self.users.update_streak(ObjectId(user_id), met, log_date)
+        if user:
+            self._user_updated(user)
+        return user is not None
+
+    async def get_log_summary(
+        self, user_id: str, granularity: str, start_date: Optional[str] = None, end_date: Optional[str] = None
+    ) -> List[LogSummary]:
+        try:
+            # Include the period that contains start_date
+            start = period_start(date.fromisoformat(start_date), granularity).isoformat() if start_date else None
+            end = date.fromisoformat(end_date).isoformat() if end_date else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format")
+
+        summaries = []
+        for rollup in await self.logs.find_rollups(ObjectId(user_id), granularity, start, end):
+            days = rollup.get("days", 0) or 1
+            summaries.append(LogSummary(
+                periodStart=rollup["periodStart"],
+                days=rollup.get("days", 0),
+                steps=rollup.get("steps", 0),
+                waterMl=rollup.get("waterMl", 0),
+                proteinG=rollup.get("proteinG", 0),
+                avgSteps=rollup.get("steps", 0) / days,
+                avgWaterMl=rollup.get("waterMl", 0) / days,
+                avgProteinG=rollup.get("proteinG", 0) / days,
+            ))
+        return summaries
+
+    # --- Dashboard ---
+    async def get_dashboard(self, user_id: str, sections: Set[str], habits_limit: int) -> dict:
+        """
+        The habits and today's log sections of GET /dashboard (those in `sections`),
+        read concurrently. Same shapes as GET /habits and GET /logs/today.
+        """
+        reads = {}
+        if "habits" in sections:
+            reads["habits"] = self.get_habits(user_id, habits_limit)
+        if "today" in sections:
+            reads["today"] = self.get_today_log(user_id)
+        results = dict(zip(reads, await asyncio.gather(*reads.values())))
+
+        dashboard = {}
+        if "habits" in results:
+            dashboard["habits"], dashboard["habitsNextCursor"] = results["habits"]
+        if "today" in results:
+            dashboard["today"] = results["today"].model_dump(by_alias=True)
+        return dashboard
+
     # --- Helper: Gamification ---
     async def add_xp(self, user_id: str, amount: int):
-        user = await self.users_collection.find_one({"_id": ObjectId(user_id)})
-        if not user:
+        if xp_accumulator.enabled:
+            # Write-behind: level-ups are applied when the summed award is flushed
+            xp_accumulator.add(user_id, amount)
             return
-            
-        current_xp = user.get("currentXp", 0) + amount
-        max_xp = user.get("maxXp", 1000)
-        level = user.get("level", 1)
-        
-        # Simple level up logic
-        if current_xp >= max_xp:
-            current_xp = current_xp - max_xp
-            level += 1
-            max_xp = int(max_xp * 1.2) # Increase difficulty
-            
-        await self.users_collection.update_one(
-            {"_id": ObjectId(user_id)},
-            {"$set": {"currentXp": current_xp, "maxXp": max_xp, "level": level}}
-        )
+        # Award, level-up and data version bump are applied atomically by the storage layer
+        user = await self.users.award_xp(ObjectId(user_id), amount)
+        if user:
+            self._user_updated(user)
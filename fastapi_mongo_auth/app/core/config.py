@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
@@ -6,12 +7,84 @@ load_dotenv()
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "FastAPI Mongo Auth"
+    # Serverless (on by default on Vercel): no startup work or background tasks; the MongoDB
+    # client, bcrypt cost and revocation list are set up on first use and reused by warm invocations
+    SERVERLESS: bool = bool(os.getenv("VERCEL"))
     MONGO_URL: str = os.getenv("MONGO_URL", "mongodb://localhost:27017")
     DB_NAME: str = os.getenv("DB_NAME", "python-db")
+    # "mongo", or "memory" for in-process storage (not persisted; for profiling and local load tests)
+    STORAGE_BACKEND: str = "mongo"
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-super-secret-key-change-it")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 43200  # 30 Days (30 * 24 * 60)
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    JWT_BACKEND: str = "jose"  # "jose", or "hmac" for a faster HS256/384/512-only verifier
+    TOKEN_CACHE_SIZE: int = 10000  # Verified tokens kept in memory (0 disables)
+    REVOCATION_SYNC_INTERVAL_SECONDS: float = 5  # How often each worker pulls revoked tokens
+
+    # MongoDB connection pool
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 10  # Opened during startup warmup
+    MONGO_CONNECT_TIMEOUT_MS: int = 5000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = 2000  # Max wait for a free pooled connection
+
+    # Password hashing worker pool ("process" or "thread")
+    PASSWORD_HASH_EXECUTOR: str = "process"
+    PASSWORD_HASH_WORKERS: int = os.cpu_count() or 1
+    PASSWORD_HASH_MAX_QUEUE: int = 64  # Requests waiting beyond this are rejected with 503
+
+    # bcrypt cost: a fixed BCRYPT_ROUNDS, or (if BCRYPT_CALIBRATE) the cost that takes
+    # about BCRYPT_TARGET_MS on this hardware, measured at startup. Neither: passlib default.
+    BCRYPT_ROUNDS: Optional[int] = None
+    BCRYPT_CALIBRATE: bool = False
+    BCRYPT_TARGET_MS: float = 250
+
+    # Cache of authenticated users resolved by get_current_user (size 0 disables)
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60
+
+    # Per-user data versions behind the ETags of /user/profile, /habits, /logs/today and /dashboard.
+    # Cached per process: for up to the TTL, a write made by another worker can still be answered with 304.
+    DATA_VERSION_CACHE_SIZE: int = 10000
+    DATA_VERSION_CACHE_TTL_SECONDS: float = 5
+
+    # Maximum number of daily logs accepted by POST /logs/sync/batch
+    LOG_SYNC_BATCH_MAX_SIZE: int = 366
+
+    # /logs/history limits: longest accepted range, and the range above which results are streamed
+    LOG_HISTORY_MAX_DAYS: int = 1830
+    LOG_HISTORY_STREAM_THRESHOLD_DAYS: int = 92
+
+    # GET /habits page size
+    HABITS_PAGE_DEFAULT_LIMIT: int = 100
+    HABITS_PAGE_MAX_LIMIT: int = 500
+    # Maximum number of habits accepted by POST /habits/bulk and POST /habits/toggle
+    HABITS_BULK_MAX_SIZE: int = 100
+
+    # Write-behind XP (ignored when SERVERLESS): awards are summed per user in memory and written
+    # every XP_FLUSH_INTERVAL_SECONDS, or once XP_FLUSH_MAX_PENDING users have some, in one bulk
+    # write. The leaderboard and other workers lag by up to the interval; a crash loses unflushed XP.
+    XP_WRITE_BEHIND: bool = False
+    XP_FLUSH_INTERVAL_SECONDS: float = 1
+    XP_FLUSH_MAX_PENDING: int = 1000
+
+    # GET /leaderboard: entries cached per process, and how often they are reloaded
+    LEADERBOARD_CACHE_SIZE: int = 100
+    LEADERBOARD_REFRESH_SECONDS: float = 30
+
+    # Logging ("json" lines, or "text"); records beyond LOG_QUEUE_SIZE waiting to be written are dropped
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    LOG_QUEUE_SIZE: int = 10000
+
+    # Request / MongoDB command metrics, served at GET /metrics
+    METRICS_ENABLED: bool = True
+
+    # Daily habit reset job (disable on serverless deployments and run it elsewhere)
+    HABIT_RESET_ENABLED: bool = True
+    HABIT_RESET_BATCH_SIZE: int = 1000
+    HABIT_RESET_PAUSE_SECONDS: float = 0.05  # Pause between chunks
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,57 @@
+from datetime import date
+from typing import Optional
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+# Per-user data version: `dataVersion` on the user document, incremented by
+# every write that changes what GET /user/profile, /habits, /logs/today or
+# /dashboard return. Those routes tag responses with an ETag built from it and
+# answer a matching If-None-Match with 304, without reading or serializing
+# anything else.
+#
+# Writes bump the version after changing the data, and the routes read the
+# version before the data (reloading the cached principal if it is older), so
+# a response never carries a version newer than its content.
+#
+# All four routes read the version through data_version_cache. Writes made by
+# this process update it immediately. A write made by another worker is not
+# seen until the cached entry expires, so for up to
+# DATA_VERSION_CACHE_TTL_SECONDS that worker's clients can still get a 304
+# for the old data. Nothing is stale for longer than that.
+
+DATA_VERSION_FIELD = "dataVersion"
+
+# For updates that are already pipelines (XP awards, streaks)
+DATA_VERSION_BUMP_STAGE = {"$set": {DATA_VERSION_FIELD: {"$add": [{"$ifNull": ["$" + DATA_VERSION_FIELD, 0]}, 1]}}}
+
+def bump_data_version(user: dict) -> None:
+    """In-place equivalent of DATA_VERSION_BUMP_STAGE."""
+    user[DATA_VERSION_FIELD] = (user.get(DATA_VERSION_FIELD) or 0) + 1
+
+# Latest known version per user id. Writes made by this process update it
+# immediately; writes made by other workers are picked up within the TTL.
+data_version_cache = TTLCache(
+    maxsize=settings.DATA_VERSION_CACHE_SIZE,
+    ttl=settings.DATA_VERSION_CACHE_TTL_SECONDS,
+)
+
+def remember_data_version(user_id: str, version: int):
+    # Concurrent writes may report back out of order: never go backwards
+    if version >= data_version_cache.get(user_id, -1):
+        data_version_cache.set(user_id, version)
+
+def make_etag(user_id: str, version: int) -> str:
+    """
+    Weak ETag for one user's data at `version`. The date is part of it because
+    responses also depend on the day (today's log, streaks that lapse overnight).
+    """
+    return f'W/"{user_id}.{version}.{date.today().isoformat()}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison against an If-None-Match header (a list of tags, or "*")."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
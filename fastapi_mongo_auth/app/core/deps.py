@@ -1,30 +1,43 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from app.core.cache import principal_cache
 from app.core.config import settings
+from app.core.security import JWTError, decode_token
+from app.core.revocation import revocation_list
 from app.models.token import TokenData
 from app.models.user import UserInDB
-from app.database.connection import get_database
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.database.connection import get_repositories
+from app.database.repositories import Repositories
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncIOMotorDatabase = Depends(get_database)) -> UserInDB:
+async def get_current_user(token: str = Depends(oauth2_scheme), repos: Repositories = Depends(get_repositories)) -> UserInDB:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = decode_token(token)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
+        jti = payload.get("jti")
+        if settings.SERVERLESS:
+            await revocation_list.sync_if_due(repos.revoked_tokens)
+        if jti is not None and revocation_list.is_revoked(jti):
+            raise credentials_exception
         token_data = TokenData(email=email)
     except JWTError:
         raise credentials_exception
     
-    user = await db.users.find_one({"email": token_data.email})
+    cached_user = principal_cache.get(token_data.email)
+    if cached_user is not None:
+        return cached_user
+
+    user = await repos.users.find_by_email(token_data.email)
     if user is None:
         raise credentials_exception
-    return UserInDB(**user)
+    current_user = UserInDB(**user)
+    principal_cache.set(token_data.email, current_user)
+    return current_user
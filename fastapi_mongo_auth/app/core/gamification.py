@@ -0,0 +1,44 @@
+XP_PER_HABIT = 10  # XP awarded per habit completion
+DEFAULT_MAX_XP = 1000
+LEVEL_UP_FACTOR = 1.2  # Each level needs 20% more XP than the previous one
+
+def xp_award_pipeline(amount: int) -> list:
+    """
+    Update pipeline that adds `amount` XP to a user and applies the level-up
+    rule (carry the remainder over, raise maxXp by LEVEL_UP_FACTOR) server-side,
+    so the whole award is a single atomic update with no read-modify-write.
+    """
+    level_up = {"$gte": ["$currentXp", "$maxXp"]}
+    level_up_stage = {
+        "$set": {
+            "currentXp": {"$cond": [level_up, {"$subtract": ["$currentXp", "$maxXp"]}, "$currentXp"]},
+            "level": {"$cond": [level_up, {"$add": ["$level", 1]}, "$level"]},
+            "maxXp": {"$cond": [level_up, {"$toInt": {"$multiply": ["$maxXp", LEVEL_UP_FACTOR]}}, "$maxXp"]},
+        }
+    }
+    # maxXp never drops below DEFAULT_MAX_XP, so this bounds the possible level-ups
+    level_up_passes = 1 + amount // DEFAULT_MAX_XP
+
+    return [
+        {
+            "$set": {
+                "currentXp": {"$add": [{"$ifNull": ["$currentXp", 0]}, amount]},
+                "maxXp": {"$ifNull": ["$maxXp", DEFAULT_MAX_XP]},
+                "level": {"$ifNull": ["$level", 1]},
+            }
+        },
+        *[level_up_stage] * level_up_passes,
+    ]
+
+def apply_xp(user: dict, amount: int) -> None:
+    """In-place equivalent of xp_award_pipeline, for stores without update pipelines."""
+    user["currentXp"] = (user.get("currentXp") if user.get("currentXp") is not None else 0) + amount
+    if user.get("maxXp") is None:
+        user["maxXp"] = DEFAULT_MAX_XP
+    if user.get("level") is None:
+        user["level"] = 1
+    for _ in range(1 + amount // DEFAULT_MAX_XP):
+        if user["currentXp"] >= user["maxXp"]:
+            user["currentXp"] -= user["maxXp"]
+            user["level"] += 1
+            user["maxXp"] = int(user["maxXp"] * LEVEL_UP_FACTOR)
@@ -0,0 +1,159 @@
+import contextvars
+import logging
+import queue
+import sys
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+from app.core.config import settings
+import orjson
+
+# Application logging. Records from the "app" logger tree are put on a bounded
+# in-memory queue and written by a listener thread, so request handlers never
+# block on stdout. Records are JSON lines (LOG_FORMAT="json") carrying the
+# current request id, with sensitive fields redacted.
+#
+#   logger = logging.getLogger(__name__)
+#   logger.info("User created", extra={"user_id": str(user_id)})
+
+REQUEST_ID_HEADER = "X-Request-ID"
+REDACTED = "[REDACTED]"
+
+# Keys whose values never reach the logs (compared case-insensitively)
+SENSITIVE_KEYS = {
+    "password", "hashed_password", "new_hash", "old_hash", "access_token", "refresh_token",
+    "token", "authorization", "secret_key", "cookie",
+}
+
+# Attributes every LogRecord has; anything else came from `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "request_id"}
+
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+_listener: Optional[QueueListener] = None
+
+def redact(value):
+    """Copy of `value` with sensitive keys masked, at any depth."""
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if str(key).lower() in SENSITIVE_KEYS else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+class RequestIdFilter(logging.Filter):
+    """Stamps records with the request id. Runs where the record is logged, not on the listener thread."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records (and counts them) instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message now (args may change later); formatting happens on the listener thread.
+        # The queue never leaves the process, so exc_info can be passed along as is.
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = REDACTED if key.lower() in SENSITIVE_KEYS else redact(value)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        # Anything orjson can't encode natively (ObjectId, ...) is logged as str()
+        return orjson.dumps(entry, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+
+def setup_logging():
+    """Route the "app" logger through the queue. Safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else TextFormatter())
+
+    log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+
+    logger = logging.getLogger("app")
+    logger.setLevel(settings.LOG_LEVEL.upper())
+    logger.handlers = [queue_handler]
+    logger.propagate = False
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+def shutdown_logging():
+    """Write out queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def dropped_records() -> int:
+    handlers = logging.getLogger("app").handlers
+    return sum(getattr(handler, "dropped", 0) for handler in handlers)
+
+class RequestIdMiddleware:
+    """
+    Pure ASGI middleware giving every request an id (the client's X-Request-ID,
+    or a new one), available to log records and echoed in the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:128]
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
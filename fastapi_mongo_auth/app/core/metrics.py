@@ -0,0 +1,176 @@
+import bisect
+import threading
+import time
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Process-local metrics, rendered in the Prometheus text exposition format by
+# GET /metrics. Recording is a lock plus a couple of additions, so it stays on
+# in production. Label values must come from a small, fixed set (route
+# templates, not raw paths) to keep the number of series bounded.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+# Histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in values]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labelvalues: str, amount: float = 1):
+        self.inc(*labelvalues, amount=-amount)
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labelvalues: str):
+        index = bisect.bisect_left(self.buckets, value)  # First bucket whose bound is >= value
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        lines = []
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors: List[Tuple[str, Callable[[], dict], Sequence[str]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, prefix: str, stats: Callable[[], dict], counters: Sequence[str] = ()):
+        """
+        Expose a component's own stats() at scrape time: each numeric value becomes
+        a `<prefix>_<key>` gauge, or a `<prefix>_<key>_total` counter for keys in `counters`.
+        """
+        self._collectors.append((prefix, stats, tuple(counters)))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        for prefix, stats, counters in self._collectors:
+            for key, value in stats().items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                if key in counters:
+                    name, kind = f"{prefix}_{key}_total", "counter"
+                else:
+                    name, kind = f"{prefix}_{key}", "gauge"
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+http_requests_total = metrics.register(Counter(
+    "http_requests_total", "HTTP requests by route template and status code.", ("method", "route", "status")
+))
+http_request_duration_seconds = metrics.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency, to the last byte of the response.", ("method", "route")
+))
+http_requests_in_flight = metrics.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled.", ("method",)
+))
+mongodb_commands_total = metrics.register(Counter(
+    "mongodb_commands_total", "MongoDB commands by collection, command and outcome.", ("collection", "command", "outcome")
+))
+mongodb_command_duration_seconds = metrics.register(Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency as measured by the driver.", ("collection", "command")
+))
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, status and in-flight requests per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"] if scope["method"] in HTTP_METHODS else "OTHER"
+        status_code = 500  # If the app fails before responding
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            http_requests_in_flight.dec(method)
+            # The router stores the matched route in the scope; unmatched paths share one label
+            route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+            http_request_duration_seconds.observe(duration, method, route)
+            http_requests_total.inc(method, route, str(status_code))
@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.core.security import (
+    calibrate_bcrypt_rounds,
+    configure_password_hashing,
+    get_password_hash,
+    verify_and_update_password,
+    verify_password,
+)
+
+logger = logging.getLogger(__name__)
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification in a bounded worker pool.
+
+    bcrypt is deliberately slow (~250 ms of CPU per call), so running it inline
+    in an async route stalls the whole event loop. Work is handed to a process
+    pool (or a thread pool where processes are unavailable) and callers beyond
+    `max_workers + max_queue` are rejected with a 503 instead of piling up.
+    """
+
+    def __init__(self, executor_type: str = "process", max_workers: int = 1, max_queue: int = 0):
+        self.executor_type = executor_type
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._executor: Executor = None
+        self.rounds: Optional[int] = None  # bcrypt cost; None keeps the passlib default
+        self._exact_rounds = True
+        self.configured = False
+        self._configure_lock = asyncio.Lock()
+
+        # Saturation metrics
+        self.pending = 0
+        self.peak_pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                try:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        # Worker processes have their own CryptContext
+                        initializer=configure_password_hashing,
+                        initargs=(self.rounds, self._exact_rounds),
+                    )
+                except (OSError, ImportError, NotImplementedError):
+                    # Some sandboxes (e.g. serverless runtimes) have no working sem_open
+                    self.executor_type = "thread"
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="password-hasher",
+                )
+        return self._executor
+
+    async def configure_cost(self):
+        """
+        Apply the bcrypt cost from settings, calibrating it first if requested.
+        Call before serving requests; a running pool is restarted to pick it up.
+        Otherwise (e.g. serverless mode, without startup hooks) it runs before the first hash.
+        """
+        if settings.BCRYPT_ROUNDS is not None:
+            self.rounds, self._exact_rounds = settings.BCRYPT_ROUNDS, True
+        elif settings.BCRYPT_CALIBRATE:
+            rounds = await asyncio.to_thread(calibrate_bcrypt_rounds, settings.BCRYPT_TARGET_MS)
+            # Calibration may differ slightly between workers: only ever upgrade hashes
+            self.rounds, self._exact_rounds = rounds, False
+            logger.info("Calibrated bcrypt cost", extra={"rounds": rounds, "target_ms": settings.BCRYPT_TARGET_MS})
+        if self.rounds is not None:
+            configure_password_hashing(self.rounds, self._exact_rounds)
+            self.shutdown()
+        self.configured = True
+
+    async def _run(self, fn, *args):
+        if not self.configured:
+            async with self._configure_lock:
+                if not self.configured:
+                    await self.configure_cost()
+
+        if self.pending >= self.capacity:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+
+        self.pending += 1
+        self.submitted += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await self._run(verify_and_update_password, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.executor_type,
+            "workers": self.max_workers,
+            "bcrypt_rounds": self.rounds,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+            "active": min(self.pending, self.max_workers),
+            "queued": max(0, self.pending - self.max_workers),
+            "peak_pending": self.peak_pending,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "saturation": self.pending / self.capacity,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+password_hasher = PasswordHasher(
+    # A serverless instance would pay for a spawned worker (and its imports) on every cold start
+    executor_type="thread" if settings.SERVERLESS else settings.PASSWORD_HASH_EXECUTOR,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+from app.core.config import settings
+from app.database.repositories import RevokedTokenRepository
+
+logger = logging.getLogger(__name__)
+
+class RevocationList:
+    """
+    Revoked token ids (`jti`), persisted in the `revoked_tokens` repository and
+    mirrored in memory so request-time checks are a dict lookup.
+
+    Each worker pulls revocations made elsewhere every
+    REVOCATION_SYNC_INTERVAL_SECONDS (in the background, or in serverless mode
+    from the first request after the interval); revocations made by this worker
+    are visible immediately. Documents expire (TTL index) with the token itself.
+    """
+
+    # Re-read this much history on each sync to tolerate clock skew between workers
+    SYNC_OVERLAP = timedelta(seconds=30)
+
+    def __init__(self):
+        self._revoked: Dict[str, float] = {}  # jti -> token expiry (unix time)
+        self._synced_until = datetime(1970, 1, 1)
+        self._last_sync = float("-inf")  # time.monotonic() of the last sync
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self._revoked
+
+    async def revoke(self, tokens: RevokedTokenRepository, jti: str, expires_at: float) -> bool:
+        """Revoke a token. Returns False if it had already been revoked (by any worker)."""
+        # Persist first: if the insert fails, no worker (this one included) treats the token as revoked
+        inserted = await tokens.insert(jti, datetime.utcfromtimestamp(expires_at), datetime.utcnow())
+        self._revoked[jti] = expires_at
+        return inserted
+
+    async def sync(self, tokens: RevokedTokenRepository):
+        """Pull revocations recorded since the last sync and drop expired entries."""
+        self._last_sync = time.monotonic()
+        since = self._synced_until - self.SYNC_OVERLAP
+        async for doc in tokens.revoked_since(since):
+            expires_at = doc.get("expiresAt")
+            # Stored as naive UTC datetimes
+            self._revoked[doc["_id"]] = (
+                expires_at.replace(tzinfo=timezone.utc).timestamp() if expires_at else float("inf")
+            )
+            if doc["revokedAt"] > self._synced_until:
+                self._synced_until = doc["revokedAt"]
+
+        now = time.time()
+        for jti in [jti for jti, expires_at in self._revoked.items() if expires_at <= now]:
+            del self._revoked[jti]
+
+    async def sync_if_due(self, tokens: RevokedTokenRepository):
+        """Sync if the last sync is older than the interval. For serverless mode, which has no sync loop."""
+        if time.monotonic() - self._last_sync < settings.REVOCATION_SYNC_INTERVAL_SECONDS:
+            return
+        try:
+            await self.sync(tokens)
+        except Exception:
+            logger.exception("Token revocation sync failed")
+
+    async def run_sync_loop(self, tokens: RevokedTokenRepository):
+        while True:
+            await asyncio.sleep(settings.REVOCATION_SYNC_INTERVAL_SECONDS)
+            try:
+                await self.sync(tokens)
+            except Exception:
+                logger.exception("Token revocation sync failed")
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+revocation_list = RevocationList()
@@ -1,16 +1,73 @@
+import base64
+import hashlib
+import hmac
+import math
+import time
+import uuid
+import orjson
 from datetime import datetime, timedelta
-from typing import Optional, Union, Any
-from jose import jwt
-from passlib.context import CryptContext
+from typing import Callable, Optional, Tuple, Union, Any
 from app.core.config import settings
+from app.core.cache import TTLCache
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# passlib (with the bcrypt backend) and python-jose (with its crypto backends)
+# are only needed by the routes that hash passwords or issue tokens, and are
+# imported on first use to keep cold starts short.
+
+class JWTError(Exception):
+    """An invalid, tampered with or expired token."""
+
+_pwd_context = None
+_pwd_options: dict = {}
+
+def get_pwd_context():
+    """
+    The passlib CryptContext. bcrypt_sha256 pre-hashes the password, so inputs
+    longer than bcrypt's 72-byte limit are neither truncated nor rejected. Plain
+    bcrypt hashes still verify and are upgraded on the next successful login.
+    """
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt_sha256", "bcrypt"], deprecated=["bcrypt"], **_pwd_options)
+    return _pwd_context
+
+def configure_password_hashing(rounds: Optional[int], exact: bool = True):
+    """
+    Set the bcrypt cost for new hashes. Existing hashes below it (or, when
+    `exact`, different from it) are reported as needing an update.
+    """
+    if rounds is None:
+        return
+    options = {"bcrypt_sha256__default_rounds": rounds, "bcrypt_sha256__min_rounds": rounds}
+    if exact:
+        options["bcrypt_sha256__max_rounds"] = rounds
+    _pwd_options.update(options)
+    if _pwd_context is not None:
+        _pwd_context.update(**options)
+
+def calibrate_bcrypt_rounds(target_ms: float, min_rounds: int = 10, max_rounds: int = 16) -> int:
+    """Pick the bcrypt cost whose hash time on this machine is closest to `target_ms`."""
+    probe_rounds = 8
+    probe = get_pwd_context().handler("bcrypt_sha256").using(rounds=probe_rounds)
+    elapsed_ms = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        probe.hash("calibration-probe")
+        elapsed_ms = min(elapsed_ms, (time.perf_counter() - start) * 1000)
+    # Each extra round doubles the cost
+    rounds = probe_rounds + round(math.log2(target_ms / max(elapsed_ms, 0.001)))
+    return max(min_rounds, min(max_rounds, rounds))
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify, and return a replacement hash if the stored one uses an outdated scheme or cost."""
+    return get_pwd_context().verify_and_update(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def create_access_token(subject: Union[str, Any], expires_delta: Optional[timedelta] = None, extra_claims: dict = {}) -> str:
     if expires_delta:
@@ -18,12 +75,11 @@ def create_access_token(subject: Union[str, Any], expires_delta: Optional[timede
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {"exp": expire, "sub": str(subject), "jti": uuid.uuid4().hex}
     if extra_claims:
         to_encode.update(extra_claims)
-        
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
+
+    return _encode_jwt(to_encode)
 
 def create_refresh_token(subject: Union[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     if expires_delta:
@@ -31,6 +87,88 @@ def create_refresh_token(subject: Union[str, Any], expires_delta: Optional[timed
     else:
         expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     
-    to_encode = {"exp": expire, "sub": str(subject), "type": "refresh"}
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
+    to_encode = {"exp": expire, "sub": str(subject), "type": "refresh", "jti": uuid.uuid4().hex}
+    return _encode_jwt(to_encode)
+
+def _encode_jwt(claims: dict) -> str:
+    from jose import jwt
+    return jwt.encode(claims, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+def _jose_decoder() -> Callable[[str], dict]:
+    from jose import JWTError as JoseJWTError, jwt
+
+    def decode(token: str) -> dict:
+        try:
+            return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JoseJWTError as e:
+            raise JWTError(str(e)) from e
+    return decode
+
+def _hmac_decoder() -> Callable[[str], dict]:
+    """
+    Minimal HS256/384/512 verifier on top of hmac + orjson. Several times
+    faster than python-jose for the tokens this app issues; it only checks
+    the signature, the header algorithm and `exp`.
+    """
+    digests = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+    if settings.ALGORITHM not in digests:
+        raise RuntimeError(f"JWT_BACKEND 'hmac' does not support {settings.ALGORITHM}")
+    digestmod = digests[settings.ALGORITHM]
+    secret = settings.SECRET_KEY.encode()
+
+    def b64decode(segment: str) -> bytes:
+        return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+    def decode(token: str) -> dict:
+        try:
+            header_b64, payload_b64, signature_b64 = token.split(".")
+            signing_input = f"{header_b64}.{payload_b64}".encode()
+            expected = hmac.new(secret, signing_input, digestmod).digest()
+            if not hmac.compare_digest(expected, b64decode(signature_b64)):
+                raise JWTError("Signature verification failed.")
+            if orjson.loads(b64decode(header_b64)).get("alg") != settings.ALGORITHM:
+                raise JWTError("The specified alg value is not allowed")
+            claims = orjson.loads(b64decode(payload_b64))
+        except (ValueError, TypeError, orjson.JSONDecodeError) as e:
+            raise JWTError("Invalid token") from e
+        if not isinstance(claims, dict):
+            raise JWTError("Invalid payload")
+        exp = claims.get("exp")
+        if exp is not None and (not isinstance(exp, (int, float)) or exp <= time.time()):
+            raise JWTError("Signature has expired.")
+        return claims
+    return decode
+
+JWT_DECODERS = {
+    "jose": _jose_decoder,
+    "hmac": _hmac_decoder,
+}
+
+_decode_jwt: Optional[Callable[[str], dict]] = None
+
+# Verified claims keyed by a digest of the token; entries expire with the token
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=0)
+
+def decode_token(token: str) -> dict:
+    """
+    Verify and decode a JWT, raising JWTError when it is invalid or expired.
+    Verified claims are cached until the token's `exp`, so a token reused on
+    every request is only cryptographically checked once per process.
+    The returned dict is shared; treat it as read-only.
+    """
+    global _decode_jwt
+    key = hashlib.sha256(token.encode()).digest()
+    claims = token_cache.get(key)
+    if claims is not None:
+        return claims
+
+    if _decode_jwt is None:
+        if settings.JWT_BACKEND not in JWT_DECODERS:
+            raise RuntimeError(f"Unknown JWT_BACKEND '{settings.JWT_BACKEND}'")
+        _decode_jwt = JWT_DECODERS[settings.JWT_BACKEND]()
+    claims = _decode_jwt(token)
+
+    exp = claims.get("exp")
+    if isinstance(exp, (int, float)):
+        token_cache.set(key, claims, ttl=exp - time.time())
+    return claims
@@ -0,0 +1,54 @@
+from typing import Any, Iterable, List, Type
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+class MongoJSONResponse(JSONResponse):
+    """
+    Default response class: renders with orjson and encodes ObjectId natively,
+    so raw Mongo documents can be returned without a jsonable_encoder pass.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+class DocumentSerializer:
+    """
+    Shapes trusted Mongo documents into a response model's by-alias layout
+    without validating them (they were validated when written). Returning the
+    result in a MongoJSONResponse skips both FastAPI's response_model
+    validation and pydantic serialization.
+    """
+
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self._fields = []
+        for name, field in model.model_fields.items():
+            if field.default_factory is not None:
+                default, factory = None, field.default_factory
+            else:
+                default = None if field.default is PydanticUndefined else field.default
+                factory = None
+            self._fields.append((field.alias or name, default, factory))
+
+    def one(self, doc: dict) -> dict:
+        result = {}
+        for key, default, factory in self._fields:
+            if key in doc:
+                result[key] = doc[key]
+            else:
+                result[key] = factory() if factory is not None else default
+        return result
+
+    def many(self, docs: Iterable[dict]) -> List[dict]:
+        return [self.one(doc) for doc in docs]
@@ -0,0 +1,203 @@
+import re
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorDatabase
+
+# Streak fields, kept on habit documents and on users (for the daily goal):
+#   currentStreak      consecutive days ending at lastCompletedDate
+#   longestStreak      best run ever
+#   lastCompletedDate  YYYY-MM-DD
+#   streakUndo         previous values, restored if the latest completion is undone
+
+# daily_goal_name keywords -> log field the goal is measured on
+GOAL_FIELDS = (("step", "steps"), ("water", "waterMl"), ("protein", "proteinG"))
+
+def is_iso_date(day: str) -> bool:
+    """Whether `day` is a valid YYYY-MM-DD date, the only form streaks are computed on."""
+    try:
+        return date.fromisoformat(day).isoformat() == day
+    except (TypeError, ValueError):
+        return False
+
+def previous_day(day: str) -> str:
+    return (date.fromisoformat(day) - timedelta(days=1)).isoformat()
+
+def current_streak(streak: int, last_completed_date: Optional[str], today: Optional[date] = None) -> int:
+    """A stored streak only counts while its last day is today or yesterday."""
+    if not last_completed_date:
+        return 0
+    yesterday = ((today or date.today()) - timedelta(days=1)).isoformat()
+    return streak if last_completed_date >= yesterday else 0
+
+def streak_update_stages(completed: Union[bool, dict, str], day: str) -> List[dict]:
+    """
+    Update pipeline stages recording that `day` was (or no longer is) completed.
+    `completed` may be a literal or an aggregation expression (e.g. "$isCompleted").
+
+    Completing a day after lastCompletedDate extends or restarts the streak;
+    un-completing lastCompletedDate restores the values from before it.
+    Changes to older days are ignored (use rebuild_streaks to repair).
+    """
+    last = "$lastCompletedDate"
+    current = {"$ifNull": ["$currentStreak", 0]}
+    longest = {"$ifNull": ["$longestStreak", 0]}
+    # $gt also holds when lastCompletedDate is missing (null sorts before strings)
+    complete = {"$and": [completed, {"$gt": [day, last]}]}
+    undo = {"$and": [{"$not": [completed]}, {"$eq": [last, day]}]}
+    extended = {"$cond": [{"$eq": [last, previous_day(day)]}, {"$add": [current, 1]}, 1]}
+
+    def switch(on_complete, on_undo, default):
+        return {"$switch": {
+            "branches": [{"case": complete, "then": on_complete}, {"case": undo, "then": on_undo}],
+            "default": default,
+        }}
+
+    return [{
+        "$set": {
+            "streakUndo": switch(
+                # $ifNull: a missing field would be left out of the object rather than stored as null
+                {"currentStreak": current, "longestStreak": longest, "lastCompletedDate": {"$ifNull": [last, None]}},
+                "$$REMOVE",
+                "$streakUndo",
+            ),
+            "currentStreak": switch(
+                extended,
+                {"$ifNull": ["$streakUndo.currentStreak", {"$max": [{"$subtract": [current, 1]}, 0]}]},
+                current,
+            ),
+            "longestStreak": switch(
+                {"$max": [longest, extended]},
+                {"$ifNull": ["$streakUndo.longestStreak", longest]},
+                longest,
+            ),
+            "lastCompletedDate": switch(
+                day,
+                {"$ifNull": [
+                    "$streakUndo.lastCompletedDate",
+                    {"$cond": [{"$gt": [current, 1]}, previous_day(day), None]},
+                ]},
+                {"$ifNull": [last, None]},
+            ),
+        }
+    }]
+
+def apply_streak_update(doc: dict, completed: bool, day: str) -> None:
+    """In-place equivalent of streak_update_stages, for stores without update pipelines."""
+    last = doc.get("lastCompletedDate")
+    current = doc.get("currentStreak") or 0
+    longest = doc.get("longestStreak") or 0
+    undo = doc.get("streakUndo") or {}
+
+    if completed and (last is None or day > last):
+        extended = current + 1 if last == previous_day(day) else 1
+        doc["streakUndo"] = {"currentStreak": current, "longestStreak": longest, "lastCompletedDate": last}
+        doc.update(currentStreak=extended, longestStreak=max(longest, extended), lastCompletedDate=day)
+    elif not completed and last == day:
+        doc.pop("streakUndo", None)
+        doc.update(
+            currentStreak=undo.get("currentStreak", max(current - 1, 0)),
+            longestStreak=undo.get("longestStreak", longest),
+            lastCompletedDate=undo.get("lastCompletedDate") or (previous_day(day) if current > 1 else None),
+        )
+    else:
+        doc.update(currentStreak=current, longestStreak=longest, lastCompletedDate=last)
+
+def daily_goal_for(daily_goal_name: str, daily_goal_target: str) -> Optional[Tuple[str, int]]:
+    """(log field, target) for a user's daily goal, or None if it isn't measured by logs."""
+    name = daily_goal_name.lower()
+    field = next((field for keyword, field in GOAL_FIELDS if keyword in name), None)
+    # "2000", "2,000 ml", "10k"
+    match = re.search(r"(\d+(?:\.\d+)?)\s*(k\b)?", (daily_goal_target or "").replace(",", ""), re.IGNORECASE)
+    if field is None or match is None:
+        return None
+    target = float(match.group(1)) * (1000 if match.group(2) else 1)
+    return field, int(target)
+
+def goal_met(log: Optional[dict], goal: Optional[Tuple[str, int]]) -> bool:
+    if not log or goal is None:
+        return False
+    field, target = goal
+    return log.get(field, 0) >= target
+
+def compute_streaks(days: Iterable[str]) -> Tuple[int, int, Optional[str]]:
+    """(current, longest, last day) for completed days given in ascending order."""
+    current = longest = 0
+    last = None
+    for day in days:
+        if day == last:
+            continue
+        current = current + 1 if last is not None and previous_day(day) == last else 1
+        longest = max(longest, current)
+        last = day
+    return current, longest, last
+
+def _streak_fields(days: List[str]) -> dict:
+    current, longest, last = compute_streaks(days)
+    return {"currentStreak": current, "longestStreak": longest, "lastCompletedDate": last}
+
+async def rebuild_streaks(db: "AsyncIOMotorDatabase", batch_size: int = 1000) -> Tuple[int, int]:
+    """
+    Recompute habit streaks from `habit_completions` (plus habits completed today)
+    and daily-goal streaks from `logs`. Returns (habits, users) updated.
+    """
+    from pymongo import ASCENDING, UpdateOne  # Here, so loading the models does not load the driver
+
+    today = date.today().isoformat()
+
+    async def flush(collection, operations):
+        if operations:
+            await collection.bulk_write(operations, ordered=False)
+        return []
+
+    # Habits: merge habits (by _id) with their completions (by habitId, date),
+    # so only one habit's history is in memory at a time
+    completions = db.habit_completions.find({}, {"habitId": 1, "date": 1}) \
+        .sort([("habitId", ASCENDING), ("date", ASCENDING)]).batch_size(batch_size)
+    pending = await anext(completions, None)
+
+    habits = 0
+    operations = []
+    async for habit in db.habits.find({}, {"isCompleted": 1, "lastCompletedDate": 1}) \
+            .sort("_id", ASCENDING).batch_size(batch_size):
+        days = []
+        # Skip completions of deleted habits
+        while pending is not None and pending["habitId"] < habit["_id"]:
+            pending = await anext(completions, None)
+        while pending is not None and pending["habitId"] == habit["_id"]:
+            days.append(pending["date"])
+            pending = await anext(completions, None)
+        if habit.get("isCompleted"):
+            days.append(habit.get("lastCompletedDate") or today)
+        operations.append(UpdateOne(
+            {"_id": habit["_id"]},
+            {"$set": _streak_fields(sorted(set(days))), "$unset": {"streakUndo": ""}}
+        ))
+        habits += 1
+        if len(operations) >= batch_size:
+            operations = await flush(db.habits, operations)
+    await flush(db.habits, operations)
+
+    # Users: days on which the log met the daily goal
+    users = 0
+    operations = []
+    async for user in db.users.find({}, {"daily_goal_name": 1, "daily_goal_target": 1}).batch_size(batch_size):
+        goal = daily_goal_for(user.get("daily_goal_name", ""), user.get("daily_goal_target", ""))
+        days = []
+        if goal is not None:
+            async for log in db.logs.find(
+                {"userId": user["_id"], goal[0]: {"$gte": goal[1]}}, {"date": 1}
+            ).sort("date", ASCENDING):
+                if is_iso_date(log["date"]):  # Logs stored with other date formats are skipped
+                    days.append(log["date"])
+        operations.append(UpdateOne(
+            {"_id": user["_id"]},
+            {"$set": _streak_fields(days), "$unset": {"streakUndo": ""}}
+        ))
+        users += 1
+        if len(operations) >= batch_size:
+            operations = await flush(db.users, operations)
+    await flush(db.users, operations)
+
+    return habits, users
@@ -0,0 +1,30 @@
+from typing import AsyncIterator
+from app.core.serialization import dumps
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+async def stream_json_array(rows: AsyncIterator[dict], chunk_size: int = 256) -> AsyncIterator[bytes]:
+    """Encode rows as one JSON array, emitted in chunks of `chunk_size` rows."""
+    yield b"["
+    chunk = []
+    first = True
+    async for row in rows:
+        chunk.append(dumps(row))
+        if len(chunk) >= chunk_size:
+            yield (b"" if first else b",") + b",".join(chunk)
+            first = False
+            chunk = []
+    if chunk:
+        yield (b"" if first else b",") + b",".join(chunk)
+    yield b"]"
+
+async def stream_ndjson(rows: AsyncIterator[dict], chunk_size: int = 256) -> AsyncIterator[bytes]:
+    """Encode rows as newline-delimited JSON, emitted in chunks of `chunk_size` rows."""
+    chunk = []
+    async for row in rows:
+        chunk.append(dumps(row))
+        if len(chunk) >= chunk_size:
+            yield b"\n".join(chunk) + b"\n"
+            chunk = []
+    if chunk:
+        yield b"\n".join(chunk) + b"\n"
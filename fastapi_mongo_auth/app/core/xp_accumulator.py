@@ -0,0 +1,125 @@
+import asyncio
+import logging
+from typing import Dict
+from bson import ObjectId
+from app.core.cache import principal_cache
+from app.core.config import settings
+from app.core.data_version import DATA_VERSION_FIELD, remember_data_version
+from app.core.gamification import apply_xp
+from app.database.repositories import UserRepository
+from app.models.user import UserInDB
+
+logger = logging.getLogger(__name__)
+
+class XpAccumulator:
+    """
+    Write-behind buffer for XP awards (XP_WRITE_BEHIND).
+
+    Awards are summed per user in memory and written every
+    XP_FLUSH_INTERVAL_SECONDS, or as soon as XP_FLUSH_MAX_PENDING users have
+    some, as a single bulk write that applies the level-up rule and bumps each
+    user's data version. Data version bumps for other writes can be buffered
+    the same way (an award of 0), so habit toggles don't write to the user
+    document at all.
+
+    Pending awards are process-local: they are merged into this process's
+    /user/profile responses (read-your-writes), reach the leaderboard and other
+    workers when flushed, and are lost if the process dies before a flush.
+    Shutdown flushes them.
+    """
+
+    def __init__(self, max_pending: int = 1000):
+        self.max_pending = max_pending
+        self.enabled = False  # Set while the flush loop runs
+        self._pending: Dict[str, int] = {}
+        self._in_flight: Dict[str, int] = {}  # Being written by the current flush
+        self._flush_lock = asyncio.Lock()
+        self._flush_requested = asyncio.Event()
+        self.flushes = 0
+        self.flush_failures = 0
+
+    def add(self, user_id: str, amount: int):
+        self._pending[user_id] = self._pending.get(user_id, 0) + amount
+        if len(self._pending) >= self.max_pending:
+            self._flush_requested.set()
+
+    def has_pending(self, user_id: str) -> bool:
+        """Whether the user has changes not yet written (or not yet reflected in this process's caches)."""
+        return user_id in self._pending or user_id in self._in_flight
+
+    def pending_xp(self, user_id: str) -> int:
+        return self._pending.get(user_id, 0) + self._in_flight.get(user_id, 0)
+
+    def merge(self, user: UserInDB) -> UserInDB:
+        """The user with their pending XP applied (level-ups included), as the next flush will store it."""
+        amount = self.pending_xp(str(user.id))
+        if not amount:
+            return user
+        xp = {"currentXp": user.current_xp, "maxXp": user.max_xp, "level": user.level}
+        apply_xp(xp, amount)
+        return user.model_copy(update={"current_xp": xp["currentXp"], "max_xp": xp["maxXp"], "level": xp["level"]})
+
+    def _requeue(self, user_ids):
+        for user_id in user_ids:
+            self._pending[user_id] = self._pending.get(user_id, 0) + self._in_flight[user_id]
+
+    async def flush(self, users: UserRepository):
+        """
+        Write all pending awards in one bulk write. Awards whose update failed
+        (or all of them, if the write itself failed) are kept for the next flush.
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            self._in_flight, self._pending = self._pending, {}
+            try:
+                try:
+                    updated_users, errors = await users.award_xp_many(
+                        {ObjectId(user_id): amount for user_id, amount in self._in_flight.items()}
+                    )
+                except Exception:
+                    self.flush_failures += 1
+                    self._requeue(self._in_flight)
+                    raise
+                # Only these were not applied: retrying the others would award their XP twice
+                self._requeue(str(user_id) for user_id in errors)
+                self.flushes += 1
+                if errors:
+                    self.flush_failures += 1
+                    logger.warning(
+                        "XP award failed for some users, will retry",
+                        extra={"failed_users": len(errors), "error": next(iter(errors.values()))},
+                    )
+                # Refresh caches before the awards stop being merged, so no read misses them
+                for user in updated_users:
+                    principal_cache.set(user["email"], UserInDB(**user))
+                    remember_data_version(str(user["_id"]), user.get(DATA_VERSION_FIELD, 0))
+            finally:
+                self._in_flight = {}
+
+    async def run_flush_loop(self, users: UserRepository):
+        self.enabled = True
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._flush_requested.wait(), settings.XP_FLUSH_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                self._flush_requested.clear()
+                try:
+                    # Shielded: cancelling the loop at shutdown must not abandon a write in progress
+                    await asyncio.shield(self.flush(users))
+                except Exception:
+                    logger.exception("XP flush failed, will retry", extra={"pending_users": len(self._pending)})
+        finally:
+            # New awards are applied directly again; what is still pending is written by the shutdown flush
+            self.enabled = False
+
+    def stats(self) -> dict:
+        return {
+            "pending_users": len(self._pending) + len(self._in_flight),
+            "flushes": self.flushes,
+            "flush_failures": self.flush_failures,
+        }
+
+xp_accumulator = XpAccumulator(max_pending=settings.XP_FLUSH_MAX_PENDING)
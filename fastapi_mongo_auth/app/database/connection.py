@@ -1,29 +1,125 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
+import logging
+from typing import TYPE_CHECKING
 from app.core.config import settings
+from app.database.repositories import Repositories
+
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+# Motor and pymongo take longer to import than the rest of the app together,
+# so they are only imported when a client is created.
+
+logger = logging.getLogger(__name__)
 
 class Database:
-    client: AsyncIOMotorClient = None
+    client: "AsyncIOMotorClient" = None
+    repositories: Repositories = None
+    ready: bool = False
+
+    def __init__(self):
+        self.pool_listener = None
+        self._loop: asyncio.AbstractEventLoop = None
+
+    @property
+    def uses_mongo(self) -> bool:
+        return settings.STORAGE_BACKEND != "memory"
 
     def connect(self):
+        if not self.uses_mongo:
+            from app.database.memory_repositories import MemoryRepositories
+            self.repositories = MemoryRepositories()
+            logger.warning("Using in-memory storage (nothing is persisted)")
+            return
+
         url = settings.MONGO_URL
         masked_url = url.split("@")[-1] if "@" in url else "..." 
-        print(f"Attempting to connect to MongoDB at: ...@{masked_url}")
+        logger.info("Connecting to MongoDB", extra={"host": f"...@{masked_url}"})
         import certifi
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from app.database.monitoring import CommandMetricsListener, PoolStateListener
+        self.pool_listener = PoolStateListener()
+        event_listeners = [self.pool_listener]
+        if settings.METRICS_ENABLED:
+            event_listeners.append(CommandMetricsListener())
         self.client = AsyncIOMotorClient(
             url,
-            tlsCAFile=certifi.where()
+            tlsCAFile=certifi.where(),
+            maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+            # A serverless instance may only ever serve a request or two: don't keep idle connections topped up
+            minPoolSize=0 if settings.SERVERLESS else settings.MONGO_MIN_POOL_SIZE,
+            connectTimeoutMS=settings.MONGO_CONNECT_TIMEOUT_MS,
+            serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            waitQueueTimeoutMS=settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            event_listeners=event_listeners,
         )
-        print("Connected to MongoDB client created")
+        from app.database.mongo_repositories import MongoRepositories
+        self.repositories = MongoRepositories(self.get_db())
+        logger.info("MongoDB client created")
+
+    def ensure_connected(self) -> Repositories:
+        """
+        Connect on first use and reuse the client for the rest of the process.
+        Used in serverless mode, where startup hooks may not run and each warm
+        invocation should skip the connection handshake. Motor clients belong
+        to the event loop they were first used on, so one is replaced if the
+        runtime has moved on to a new loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self.repositories is not None and (self._loop is loop or not self.uses_mongo):
+            return self.repositories
+        if self.client is not None:
+            logger.info("Event loop changed, reconnecting to MongoDB")
+            self.disconnect()
+        self.connect()
+        self._loop = loop
+        self.ready = True
+        return self.repositories
+
+    async def warmup(self):
+        """
+        Ping the server and open `MONGO_MIN_POOL_SIZE` connections up front so
+        the first requests after a deploy don't pay for handshakes.
+        """
+        if not self.uses_mongo:
+            self.ready = True
+            return
+        await self.client.admin.command("ping")
+        if settings.MONGO_MIN_POOL_SIZE > 1:
+            # Concurrent pings each need their own connection
+            await asyncio.gather(*[
+                self.client.admin.command("ping") for _ in range(settings.MONGO_MIN_POOL_SIZE)
+            ])
+        self.ready = True
+        logger.info("MongoDB pool warmed up", extra={"open_connections": self.pool_listener.stats()["open"]})
+
+    async def ping(self) -> bool:
+        if not self.uses_mongo:
+            return self.repositories is not None
+        try:
+            await self.client.admin.command("ping")
+            return True
+        except Exception:
+            return False
 
     def disconnect(self):
+        self.ready = False
         if self.client:
             self.client.close()
-            print("Disconnected from MongoDB")
+            self.client = None
+            logger.info("Disconnected from MongoDB")
+
+    def pool_stats(self) -> dict:
+        return self.pool_listener.stats() if self.pool_listener is not None else {}
 
     def get_db(self):
+        if self.client is None:
+            raise RuntimeError("No MongoDB client (STORAGE_BACKEND is not 'mongo', or not connected)")
         return self.client[settings.DB_NAME]
 
 db = Database()
 
-async def get_database():
-    return db.get_db()
+async def get_repositories() -> Repositories:
+    if settings.SERVERLESS:
+        return db.ensure_connected()
+    return db.repositories
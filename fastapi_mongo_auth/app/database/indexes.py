@@ -0,0 +1,65 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+# Indexes every query path relies on, per collection.
+# Unique indexes on users.email / users.mobile are what enforce registration uniqueness.
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("mobile", ASCENDING)], name="mobile_unique", unique=True),
+        # Leaderboard order and rank counting
+        IndexModel([("level", DESCENDING), ("currentXp", DESCENDING), ("_id", ASCENDING)], name="leaderboard"),
+    ],
+    "habits": [
+        # Also serves keyset pagination (userId equality, _id range + sort)
+        IndexModel([("userId", ASCENDING), ("_id", ASCENDING)], name="userId__id"),
+        # Daily reset walks only the completed habits
+        IndexModel(
+            [("isCompleted", ASCENDING), ("_id", ASCENDING)],
+            name="completed__id",
+            partialFilterExpression={"isCompleted": True},
+        ),
+    ],
+    "habit_completions": [
+        IndexModel([("habitId", ASCENDING), ("date", ASCENDING)], name="habitId_date_unique", unique=True),
+        IndexModel([("userId", ASCENDING), ("date", ASCENDING)], name="userId_date"),
+    ],
+    "logs": [
+        IndexModel([("userId", ASCENDING), ("date", ASCENDING)], name="userId_date_unique", unique=True),
+    ],
+    "log_rollups": [
+        IndexModel(
+            [("userId", ASCENDING), ("periodType", ASCENDING), ("periodStart", ASCENDING)],
+            name="userId_periodType_periodStart_unique",
+            unique=True,
+        ),
+    ],
+    "revoked_tokens": [
+        # Documents are removed once the revoked token would have expired anyway
+        IndexModel([("expiresAt", ASCENDING)], name="expiresAt_ttl", expireAfterSeconds=0),
+        IndexModel([("revokedAt", ASCENDING)], name="revokedAt"),
+    ],
+}
+
+def _matches(index_model: IndexModel, info: dict) -> bool:
+    spec = index_model.document
+    return (
+        list(spec["key"].items()) == [tuple(k) for k in info["key"]]
+        and bool(spec.get("unique", False)) == bool(info.get("unique", False))
+    )
+
+async def ensure_indexes(db: AsyncIOMotorDatabase):
+    """
+    Create the required indexes (a no-op when they already exist) and verify
+    that each one is actually present with the expected options.
+    """
+    for collection_name, index_models in INDEXES.items():
+        collection = db[collection_name]
+        await collection.create_indexes(index_models)
+
+        existing = await collection.index_information()
+        for index_model in index_models:
+            if not any(_matches(index_model, info) for info in existing.values()):
+                raise RuntimeError(
+                    f"Index {index_model.document['name']} on '{collection_name}' is missing or has different options"
+                )
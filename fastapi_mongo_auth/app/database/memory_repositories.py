@@ -0,0 +1,285 @@
+import bisect
+import threading
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from bson import ObjectId
+from app.core.data_version import DATA_VERSION_FIELD, bump_data_version
+from app.core.gamification import apply_xp
+from app.core.streaks import apply_streak_update
+from app.database.repositories import (
+    DuplicateKeyError,
+    HabitRepository,
+    LogRepository,
+    Repositories,
+    RevokedTokenRepository,
+    UserRepository,
+)
+from app.database.rollups import merge_rollup_deltas
+
+# In-process storage for local profiling and capacity planning: nothing is
+# persisted and nothing is shared between processes. Every repository guards
+# its state with a lock, so it is safe to use from several threads (and each
+# operation is atomic, like its MongoDB counterpart). Lookups the controllers
+# depend on are indexed the same way as in MongoDB (see app/database/indexes.py).
+
+LOG_HISTORY_FIELDS = ("date", "steps", "waterMl", "proteinG")
+
+def _copy(doc: dict) -> dict:
+    """Copy deep enough that callers can't mutate stored state (documents are flat, or one level nested)."""
+    return {key: dict(value) if isinstance(value, dict) else value for key, value in doc.items()}
+
+class MemoryUserRepository(UserRepository):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users: Dict[ObjectId, dict] = {}
+        self._by_email: Dict[str, ObjectId] = {}
+        self._by_mobile: Dict[str, ObjectId] = {}
+        # Sorted (-level, -currentXp, _id): leaderboard order
+        self._ranking: List[tuple] = []
+
+    @staticmethod
+    def _rank_key(user: dict) -> tuple:
+        return (-user.get("level", 1), -user.get("currentXp", 0), user["_id"])
+
+    def _update(self, user_id: ObjectId, change) -> Optional[dict]:
+        with self._lock:
+            user = self._users.get(user_id)
+            if user is None:
+                return None
+            old_key = self._rank_key(user)
+            change(user)
+            new_key = self._rank_key(user)
+            if new_key != old_key:
+                del self._ranking[bisect.bisect_left(self._ranking, old_key)]
+                bisect.insort(self._ranking, new_key)
+            return _copy(user)
+
+    async def insert(self, user: dict) -> ObjectId:
+        with self._lock:
+            if user["email"] in self._by_email:
+                raise DuplicateKeyError("email")
+            if user["mobile"] in self._by_mobile:
+                raise DuplicateKeyError("mobile")
+            user = _copy(user)
+            user.setdefault("_id", ObjectId())
+            self._users[user["_id"]] = user
+            self._by_email[user["email"]] = user["_id"]
+            self._by_mobile[user["mobile"]] = user["_id"]
+            bisect.insort(self._ranking, self._rank_key(user))
+            return user["_id"]
+
+    async def find_by_email(self, email: str) -> Optional[dict]:
+        with self._lock:
+            user_id = self._by_email.get(email)
+            return _copy(self._users[user_id]) if user_id is not None else None
+
+    async def replace_password_hash(self, user_id: ObjectId, old_hash: str, new_hash: str) -> bool:
+        with self._lock:
+            user = self._users.get(user_id)
+            if user is None or user.get("hashed_password") != old_hash:
+                return False
+            user["hashed_password"] = new_hash
+            return True
+
+    async def award_xp(self, user_id: ObjectId, amount: int) -> Optional[dict]:
+        def change(user):
+            apply_xp(user, amount)
+            bump_data_version(user)
+        return self._update(user_id, change)
+
+    async def award_xp_many(self, awards: Dict[ObjectId, int]) -> Tuple[List[dict], Dict[ObjectId, str]]:
+        updated, errors = [], {}
+        for user_id, amount in awards.items():
+            def change(user, amount=amount):
+                apply_xp(user, amount)
+                bump_data_version(user)
+            try:
+                user = self._update(user_id, change)
+            except (TypeError, ValueError) as e:
+                # Like a failed update in a Mongo bulk write (e.g. a non-numeric currentXp)
+                errors[user_id] = str(e)
+                continue
+            if user is not None:
+                updated.append(user)
+        return updated, errors
+
+    async def update_streak(self, user_id: ObjectId, completed: bool, day: str) -> Optional[dict]:
+        def change(user):
+            apply_streak_update(user, completed, day)
+            bump_data_version(user)
+        return self._update(user_id, change)
+
+    async def get_data_version(self, user_id: ObjectId) -> Optional[int]:
+        with self._lock:
+            user = self._users.get(user_id)
+            return user.get(DATA_VERSION_FIELD, 0) if user is not None else None
+
+    async def bump_data_version(self, user_id: ObjectId) -> Optional[dict]:
+        return self._update(user_id, bump_data_version)
+
+    async def top_by_level(self, limit: int) -> List[dict]:
+        with self._lock:
+            return [_copy(self._users[key[2]]) for key in self._ranking[:limit]]
+
+    async def count_ranked_ahead(self, level: int, current_xp: int, user_id: ObjectId) -> int:
+        with self._lock:
+            return bisect.bisect_left(self._ranking, (-level, -current_xp, user_id))
+
+class MemoryHabitRepository(HabitRepository):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._habits: Dict[ObjectId, dict] = {}
+        self._by_user: Dict[ObjectId, List[ObjectId]] = {}  # Sorted habit ids per user
+
+    def _insert(self, habit: dict) -> dict:
+        """Caller holds the lock."""
+        habit = _copy(habit)
+        habit.setdefault("_id", ObjectId())
+        self._habits[habit["_id"]] = habit
+        bisect.insort(self._by_user.setdefault(habit["userId"], []), habit["_id"])
+        return _copy(habit)
+
+    async def insert(self, habit: dict) -> dict:
+        with self._lock:
+            return self._insert(habit)
+
+    async def insert_many(self, habits: List[dict]) -> List[dict]:
+        with self._lock:
+            return [self._insert(habit) for habit in habits]
+
+    async def find_page(
+        self, user_id: ObjectId, limit: int, after: Optional[ObjectId] = None, fields: Optional[List[str]] = None
+    ) -> List[dict]:
+        with self._lock:
+            habit_ids = self._by_user.get(user_id, [])
+            start = bisect.bisect_right(habit_ids, after) if after is not None else 0
+            habits = [self._habits[habit_id] for habit_id in habit_ids[start:start + limit]]
+            if fields:
+                return [
+                    {"_id": habit["_id"], **{field: habit[field] for field in fields if field in habit}}
+                    for habit in habits
+                ]
+            return [_copy(habit) for habit in habits]
+
+    def _toggle(self, user_id: ObjectId, habit_id: ObjectId, day: str) -> Optional[dict]:
+        """Caller holds the lock."""
+        habit = self._habits.get(habit_id)
+        if habit is None or habit["userId"] != user_id:
+            return None
+        habit["isCompleted"] = not habit.get("isCompleted", False)
+        apply_streak_update(habit, habit["isCompleted"], day)
+        return _copy(habit)
+
+    async def toggle(self, user_id: ObjectId, habit_id: ObjectId, day: str) -> Optional[dict]:
+        with self._lock:
+            return self._toggle(user_id, habit_id, day)
+
+    async def toggle_many(self, user_id: ObjectId, habit_ids: List[ObjectId], day: str) -> List[dict]:
+        with self._lock:
+            habits = [self._toggle(user_id, habit_id, day) for habit_id in habit_ids]
+        return [habit for habit in habits if habit is not None]
+
+class MemoryLogRepository(LogRepository):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._logs: Dict[ObjectId, Dict[str, dict]] = {}  # userId -> date -> log
+        self._dates: Dict[ObjectId, List[str]] = {}  # userId -> sorted dates
+        self._rollups: Dict[ObjectId, Dict[Tuple[str, str], dict]] = {}  # userId -> (periodType, periodStart) -> rollup
+
+    def _upsert(self, user_id: ObjectId, day: str, fields: dict) -> Optional[dict]:
+        """Returns the previous log (or None if inserted). Caller holds the lock."""
+        logs = self._logs.setdefault(user_id, {})
+        log = logs.get(day)
+        previous = _copy(log) if log is not None else None
+        if log is None:
+            log = logs[day] = {"_id": ObjectId(), "userId": user_id, "date": day}
+            bisect.insort(self._dates.setdefault(user_id, []), day)
+        log.update(fields)
+        return previous
+
+    async def find(self, user_id: ObjectId, day: str) -> Optional[dict]:
+        with self._lock:
+            log = self._logs.get(user_id, {}).get(day)
+            return _copy(log) if log is not None else None
+
+    async def iter_range(self, user_id: ObjectId, start: str, end: str) -> AsyncIterator[dict]:
+        with self._lock:
+            dates = self._dates.get(user_id, [])
+            logs = self._logs.get(user_id, {})
+            window = dates[bisect.bisect_left(dates, start):bisect.bisect_right(dates, end)]
+            rows = [
+                {field: logs[day][field] for field in LOG_HISTORY_FIELDS if field in logs[day]}
+                for day in window
+            ]
+        for row in rows:
+            yield row
+
+    async def find_days(self, user_id: ObjectId, days: List[str]) -> Dict[str, dict]:
+        with self._lock:
+            logs = self._logs.get(user_id, {})
+            return {
+                day: {field: logs[day][field] for field in LOG_HISTORY_FIELDS if field in logs[day]}
+                for day in days if day in logs
+            }
+
+    async def upsert(self, user_id: ObjectId, day: str, fields: dict) -> Tuple[Optional[dict], dict]:
+        with self._lock:
+            previous = self._upsert(user_id, day, fields)
+            return previous, _copy(self._logs[user_id][day])
+
+    async def upsert_many(
+        self, user_id: ObjectId, logs: List[dict]
+    ) -> Tuple[Dict[int, Optional[dict]], Dict[int, str]]:
+        with self._lock:
+            return {index: self._upsert(user_id, log["date"], log) for index, log in enumerate(logs)}, {}
+
+    async def increment_rollups(self, user_id: ObjectId, changes: List[Tuple[str, Dict[str, int]]]):
+        with self._lock:
+            for (period_type, start), increments in merge_rollup_deltas(changes).items():
+                rollup = self._rollups.setdefault(user_id, {}).setdefault(
+                    (period_type, start),
+                    {"_id": ObjectId(), "userId": user_id, "periodType": period_type, "periodStart": start},
+                )
+                for field, value in increments.items():
+                    rollup[field] = rollup.get(field, 0) + value
+
+    async def find_rollups(
+        self, user_id: ObjectId, period_type: str, start: Optional[str] = None, end: Optional[str] = None
+    ) -> List[dict]:
+        with self._lock:
+            rollups = [
+                _copy(rollup) for (ptype, period), rollup in self._rollups.get(user_id, {}).items()
+                if ptype == period_type and (start is None or period >= start) and (end is None or period <= end)
+            ]
+        return sorted(rollups, key=lambda rollup: rollup["periodStart"])
+
+class MemoryRevokedTokenRepository(RevokedTokenRepository):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._revoked: Dict[str, dict] = {}
+
+    async def insert(self, jti: str, expires_at: datetime, revoked_at: datetime) -> bool:
+        with self._lock:
+            if jti in self._revoked:
+                return False
+            self._revoked[jti] = {"_id": jti, "expiresAt": expires_at, "revokedAt": revoked_at}
+            return True
+
+    async def revoked_since(self, since: datetime) -> AsyncIterator[dict]:
+        now = datetime.utcnow()
+        with self._lock:
+            # Expire entries like the TTL index would
+            for jti in [jti for jti, doc in self._revoked.items() if doc["expiresAt"] <= now]:
+                del self._revoked[jti]
+            docs = [dict(doc) for doc in self._revoked.values() if doc["revokedAt"] >= since]
+        for doc in docs:
+            yield doc
+
+class MemoryRepositories(Repositories):
+    def __init__(self):
+        super().__init__(
+            users=MemoryUserRepository(),
+            habits=MemoryHabitRepository(),
+            logs=MemoryLogRepository(),
+            revoked_tokens=MemoryRevokedTokenRepository(),
+        )
@@ -0,0 +1,293 @@
+import asyncio
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError as MongoDuplicateKeyError
+from app.core.data_version import DATA_VERSION_BUMP_STAGE, DATA_VERSION_FIELD
+from app.core.gamification import xp_award_pipeline
+from app.core.streaks import streak_update_stages
+from app.database.repositories import (
+    DuplicateKeyError,
+    HabitRepository,
+    LogRepository,
+    Repositories,
+    RevokedTokenRepository,
+    UserRepository,
+)
+from app.database.rollups import ROLLUP_FIELDS, rollup_operations
+
+# Matches the users (level, currentXp, _id) index; _id breaks ties deterministically
+LEADERBOARD_SORT = [("level", DESCENDING), ("currentXp", DESCENDING), ("_id", ASCENDING)]
+LEADERBOARD_PROJECTION = {"first_name": 1, "last_name": 1, "level": 1, "currentXp": 1}
+
+def toggle_pipeline(day: str) -> List[dict]:
+    """Update pipeline flipping isCompleted and recording the change in the streak for `day`."""
+    return [
+        {"$set": {"isCompleted": {"$not": [{"$ifNull": ["$isCompleted", False]}]}}},
+        *streak_update_stages("$isCompleted", day),
+    ]
+
+DUPLICATE_KEY_ERROR = 11000
+
+def unchanged_log_filter(user_id: ObjectId, day: str, previous: Optional[dict]) -> dict:
+    """
+    Upsert filter matching the day's log only while it is still `previous`
+    (None: no log yet). Otherwise the upsert tries to insert a second log for
+    the day, or a second document with `previous`'s _id, and fails with a
+    duplicate key error instead of writing.
+    """
+    if previous is None:
+        # A fresh _id matches nothing: the upsert inserts, unless another write inserted the day first
+        return {"userId": user_id, "date": day, "_id": ObjectId()}
+    # Only the fields rollups and goal streaks are computed from (a missing field matches None)
+    return {"_id": previous["_id"], **{field: previous.get(field) for field in ROLLUP_FIELDS}}
+
+# Only the fields /logs/history returns
+LOG_HISTORY_PROJECTION = {"_id": 0, "date": 1, "steps": 1, "waterMl": 1, "proteinG": 1}
+
+class MongoUserRepository(UserRepository):
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = db.users
+
+    async def insert(self, user: dict) -> ObjectId:
+        try:
+            # Uniqueness of email / mobile is enforced by the unique indexes
+            result = await self.collection.insert_one(user)
+        except MongoDuplicateKeyError as e:
+            key_pattern = (e.details or {}).get("keyPattern", {})
+            raise DuplicateKeyError("mobile" if "mobile" in key_pattern else "email")
+        return result.inserted_id
+
+    async def find_by_email(self, email: str) -> Optional[dict]:
+        return await self.collection.find_one({"email": email})
+
+    async def replace_password_hash(self, user_id: ObjectId, old_hash: str, new_hash: str) -> bool:
+        result = await self.collection.update_one(
+            {"_id": user_id, "hashed_password": old_hash},
+            {"$set": {"hashed_password": new_hash}}
+        )
+        return result.modified_count == 1
+
+    async def award_xp(self, user_id: ObjectId, amount: int) -> Optional[dict]:
+        # Award and level-up are applied atomically by the server
+        return await self.collection.find_one_and_update(
+            {"_id": user_id},
+            [*xp_award_pipeline(amount), DATA_VERSION_BUMP_STAGE],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def award_xp_many(self, awards: Dict[ObjectId, int]) -> Tuple[List[dict], Dict[ObjectId, str]]:
+        if not awards:
+            return [], {}
+        user_ids = list(awards)
+        errors = {}
+        # Users are independent: one failed update must not hold back the others
+        try:
+            await self.collection.bulk_write([
+                UpdateOne({"_id": user_id}, [*(xp_award_pipeline(amount) if amount else []), DATA_VERSION_BUMP_STAGE])
+                for user_id, amount in awards.items()
+            ], ordered=False)
+        except BulkWriteError as e:
+            # Every other update was applied
+            errors = {user_ids[err["index"]]: err.get("errmsg") for err in e.details.get("writeErrors", [])}
+        applied = [user_id for user_id in user_ids if user_id not in errors]
+        if not applied:
+            return [], errors
+        return await self.collection.find({"_id": {"$in": applied}}).to_list(length=len(applied)), errors
+
+    async def update_streak(self, user_id: ObjectId, completed: bool, day: str) -> Optional[dict]:
+        return await self.collection.find_one_and_update(
+            {"_id": user_id},
+            [*streak_update_stages(completed, day), DATA_VERSION_BUMP_STAGE],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def get_data_version(self, user_id: ObjectId) -> Optional[int]:
+        user = await self.collection.find_one({"_id": user_id}, {DATA_VERSION_FIELD: 1})
+        return user.get(DATA_VERSION_FIELD, 0) if user else None
+
+    async def bump_data_version(self, user_id: ObjectId) -> Optional[dict]:
+        return await self.collection.find_one_and_update(
+            {"_id": user_id},
+            {"$inc": {DATA_VERSION_FIELD: 1}},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def top_by_level(self, limit: int) -> List[dict]:
+        cursor = self.collection.find({}, LEADERBOARD_PROJECTION).sort(LEADERBOARD_SORT).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def count_ranked_ahead(self, level: int, current_xp: int, user_id: ObjectId) -> int:
+        # Each $or branch is a bounded range on the (level, currentXp, _id) index,
+        # so no users are scanned outside the index
+        return await self.collection.count_documents({
+            "$or": [
+                {"level": {"$gt": level}},
+                {"level": level, "currentXp": {"$gt": current_xp}},
+                {"level": level, "currentXp": current_xp, "_id": {"$lt": user_id}},
+            ]
+        })
+
+class MongoHabitRepository(HabitRepository):
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = db.habits
+
+    async def insert(self, habit: dict) -> dict:
+        # The driver sets _id on the document, so there is nothing to read back
+        await self.collection.insert_one(habit)
+        return habit
+
+    async def insert_many(self, habits: List[dict]) -> List[dict]:
+        if habits:
+            await self.collection.insert_many(habits)
+        return habits
+
+    async def find_page(
+        self, user_id: ObjectId, limit: int, after: Optional[ObjectId] = None, fields: Optional[List[str]] = None
+    ) -> List[dict]:
+        # Served by the (userId, _id) index, so every page costs the same regardless of position
+        query = {"userId": user_id}
+        if after is not None:
+            query["_id"] = {"$gt": after}
+        projection = {field: 1 for field in fields} if fields else None  # _id is always included
+        cursor = self.collection.find(query, projection).sort("_id", ASCENDING).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def toggle(self, user_id: ObjectId, habit_id: ObjectId, day: str) -> Optional[dict]:
+        # Flip, update the streak and read back in one atomic round trip (safe under concurrent toggles)
+        return await self.collection.find_one_and_update(
+            {"_id": habit_id, "userId": user_id},
+            toggle_pipeline(day),
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def toggle_many(self, user_id: ObjectId, habit_ids: List[ObjectId], day: str) -> List[dict]:
+        if not habit_ids:
+            return []
+        await self.collection.bulk_write([
+            UpdateOne({"_id": habit_id, "userId": user_id}, toggle_pipeline(day))
+            for habit_id in habit_ids
+        ], ordered=False)
+        habits = {
+            habit["_id"]: habit
+            async for habit in self.collection.find({"_id": {"$in": habit_ids}, "userId": user_id})
+        }
+        return [habits[habit_id] for habit_id in habit_ids if habit_id in habits]
+
+class MongoLogRepository(LogRepository):
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = db.logs
+        self.rollups_collection = db.log_rollups
+
+    async def find(self, user_id: ObjectId, day: str) -> Optional[dict]:
+        return await self.collection.find_one({"userId": user_id, "date": day})
+
+    async def iter_range(self, user_id: ObjectId, start: str, end: str) -> AsyncIterator[dict]:
+        # Served by the (userId, date) index
+        cursor = self.collection.find(
+            {"userId": user_id, "date": {"$gte": start, "$lte": end}},
+            LOG_HISTORY_PROJECTION,
+        ).sort("date", ASCENDING).batch_size(500)
+        async for log in cursor:
+            yield log
+
+    async def find_days(self, user_id: ObjectId, days: List[str]) -> Dict[str, dict]:
+        logs = {}
+        async for log in self.collection.find({"userId": user_id, "date": {"$in": days}}, LOG_HISTORY_PROJECTION):
+            logs[log["date"]] = log
+        return logs
+
+    async def upsert(self, user_id: ObjectId, day: str, fields: dict) -> Tuple[Optional[dict], dict]:
+        # Read the previous version in the same round trip so callers get the exact change
+        new_id = ObjectId()
+        previous = await self.collection.find_one_and_update(
+            {"userId": user_id, "date": day},
+            {"$set": fields, "$setOnInsert": {"_id": new_id}},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE,
+        )
+        return previous, {**(previous or {"_id": new_id}), **fields}
+
+    async def upsert_many(
+        self, user_id: ObjectId, logs: List[dict]
+    ) -> Tuple[Dict[int, Optional[dict]], Dict[int, str]]:
+        # One bulk write, each entry conditional on the version read here. Entries
+        # another request wrote in between fail with a duplicate key and are redone
+        # with upsert(), whose previous version comes back atomically.
+        previous = {}
+        async for log in self.collection.find(
+            {"userId": user_id, "date": {"$in": [log["date"] for log in logs]}},
+            {"date": 1, **{field: 1 for field in ROLLUP_FIELDS}},
+        ):
+            previous[log["date"]] = log
+        operations = [
+            UpdateOne(unchanged_log_filter(user_id, log["date"], previous.get(log["date"])), {"$set": log}, upsert=True)
+            for log in logs
+        ]
+
+        errors, conflicts = {}, []
+        try:
+            await self.collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            for err in e.details.get("writeErrors", []):
+                if err.get("code") == DUPLICATE_KEY_ERROR:
+                    conflicts.append(err["index"])
+                else:
+                    errors[err["index"]] = err.get("errmsg")
+
+        written = {index: previous.get(log["date"]) for index, log in enumerate(logs) if index not in errors}
+        retried = await asyncio.gather(
+            *(self.upsert(user_id, logs[index]["date"], logs[index]) for index in conflicts),
+            return_exceptions=True,
+        )
+        for index, outcome in zip(conflicts, retried):
+            if isinstance(outcome, Exception):
+                del written[index]
+                errors[index] = str(outcome)
+            else:
+                written[index] = outcome[0]
+        return written, errors
+
+    async def increment_rollups(self, user_id: ObjectId, changes: List[Tuple[str, Dict[str, int]]]):
+        operations = rollup_operations(user_id, changes)
+        if operations:
+            await self.rollups_collection.bulk_write(operations, ordered=False)
+
+    async def find_rollups(
+        self, user_id: ObjectId, period_type: str, start: Optional[str] = None, end: Optional[str] = None
+    ) -> List[dict]:
+        query = {"userId": user_id, "periodType": period_type}
+        period_range = {}
+        if start:
+            period_range["$gte"] = start
+        if end:
+            period_range["$lte"] = end
+        if period_range:
+            query["periodStart"] = period_range
+        return await self.rollups_collection.find(query).sort("periodStart", ASCENDING).to_list(length=None)
+
+class MongoRevokedTokenRepository(RevokedTokenRepository):
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = db.revoked_tokens
+
+    async def insert(self, jti: str, expires_at: datetime, revoked_at: datetime) -> bool:
+        try:
+            await self.collection.insert_one({"_id": jti, "expiresAt": expires_at, "revokedAt": revoked_at})
+        except MongoDuplicateKeyError:
+            return False
+        return True
+
+    async def revoked_since(self, since: datetime) -> AsyncIterator[dict]:
+        async for doc in self.collection.find({"revokedAt": {"$gte": since}}):
+            yield doc
+
+class MongoRepositories(Repositories):
+    def __init__(self, db: AsyncIOMotorDatabase):
+        super().__init__(
+            users=MongoUserRepository(db),
+            habits=MongoHabitRepository(db),
+            logs=MongoLogRepository(db),
+            revoked_tokens=MongoRevokedTokenRepository(db),
+        )
@@ -0,0 +1,93 @@
+import threading
+from typing import Dict, Tuple
+from pymongo import monitoring
+from app.core.metrics import mongodb_command_duration_seconds, mongodb_commands_total
+from app.core.config import settings
+
+# pymongo event listeners. Kept apart from the code that uses their results so
+# that the driver is only imported when a MongoDB client is actually created.
+
+class PoolStateListener(monitoring.ConnectionPoolListener):
+    """Tracks connection pool state (driver callbacks arrive on background threads)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.checked_out = 0
+        self.created = 0
+        self.closed = 0
+        self.checkout_failures = 0
+        self.clears = 0
+
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_check_out_started(self, event): pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.clears += 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.created += 1
+            self.open += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.closed += 1
+            self.open -= 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "open": self.open,
+                "in_use": self.checked_out,
+                "idle": self.open - self.checked_out,
+                "created": self.created,
+                "closed": self.closed,
+                "checkout_failures": self.checkout_failures,
+                "clears": self.clears,
+                "max_size": settings.MONGO_MAX_POOL_SIZE,
+                "min_size": settings.MONGO_MIN_POOL_SIZE,
+            }
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """
+    Records per-collection, per-command latency. The driver calls this from its
+    own threads; the collection is only known when a command starts, so it is
+    kept until the command finishes.
+    """
+
+    def __init__(self):
+        self._collections: Dict[Tuple, str] = {}
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        # e.g. {"find": "habits"}; getMore names the collection separately
+        collection = target if isinstance(target, str) else event.command.get("collection", "")
+        self._collections[(event.connection_id, event.request_id)] = collection
+
+    def succeeded(self, event):
+        self._record(event, "success")
+
+    def failed(self, event):
+        self._record(event, "failure")
+
+    def _record(self, event, outcome: str):
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        mongodb_command_duration_seconds.observe(event.duration_micros / 1_000_000, collection, event.command_name)
+        mongodb_commands_total.inc(collection, event.command_name, outcome)
@@ -0,0 +1,147 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from bson import ObjectId
+
+# Storage interface used by the controllers. Documents are plain dicts in the
+# stored (by-alias) layout, e.g. {"_id", "userId", "isCompleted", ...}.
+# Implementations: MongoRepositories (Motor) and MemoryRepositories (in-process),
+# selected by settings.STORAGE_BACKEND.
+
+class DuplicateKeyError(Exception):
+    """An insert collided with a unique field (e.g. email)."""
+
+    def __init__(self, field: str):
+        super().__init__(f"Duplicate value for unique field '{field}'")
+        self.field = field
+
+class UserRepository(ABC):
+    @abstractmethod
+    async def insert(self, user: dict) -> ObjectId:
+        """Insert a new user. Raises DuplicateKeyError on an existing email or mobile."""
+
+    @abstractmethod
+    async def find_by_email(self, email: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def replace_password_hash(self, user_id: ObjectId, old_hash: str, new_hash: str) -> bool:
+        """Set a new hash only if the stored one is still `old_hash`."""
+
+    @abstractmethod
+    async def award_xp(self, user_id: ObjectId, amount: int) -> Optional[dict]:
+        """Atomically add XP, apply level-ups and bump the data version. Returns the updated user."""
+
+    @abstractmethod
+    async def award_xp_many(self, awards: Dict[ObjectId, int]) -> Tuple[List[dict], Dict[ObjectId, str]]:
+        """
+        award_xp for several users in one write (an amount of 0 only bumps the data version).
+        Each user's update succeeds or fails independently. Returns the updated users,
+        and an error message per user whose update failed (and was not applied).
+        """
+
+    @abstractmethod
+    async def update_streak(self, user_id: ObjectId, completed: bool, day: str) -> Optional[dict]:
+        """Atomically record whether `day` met the daily goal and bump the data version. Returns the updated user."""
+
+    @abstractmethod
+    async def get_data_version(self, user_id: ObjectId) -> Optional[int]:
+        """The user's dataVersion (0 if never bumped), or None if there is no such user."""
+
+    @abstractmethod
+    async def bump_data_version(self, user_id: ObjectId) -> Optional[dict]:
+        """Increment the user's dataVersion. Returns the updated user."""
+
+    @abstractmethod
+    async def top_by_level(self, limit: int) -> List[dict]:
+        """Users ordered by level, then currentXp (both descending), then _id."""
+
+    @abstractmethod
+    async def count_ranked_ahead(self, level: int, current_xp: int, user_id: ObjectId) -> int:
+        """Number of users ordered before the given position in top_by_level order."""
+
+class HabitRepository(ABC):
+    @abstractmethod
+    async def insert(self, habit: dict) -> dict:
+        """Insert a habit and return it as stored (with _id)."""
+
+    @abstractmethod
+    async def insert_many(self, habits: List[dict]) -> List[dict]:
+        """Insert several habits in one write and return them as stored (with _id), in order."""
+
+    @abstractmethod
+    async def find_page(
+        self, user_id: ObjectId, limit: int, after: Optional[ObjectId] = None, fields: Optional[List[str]] = None
+    ) -> List[dict]:
+        """Up to `limit` of the user's habits with _id > `after`, in _id order (optionally only `fields` and _id)."""
+
+    @abstractmethod
+    async def toggle(self, user_id: ObjectId, habit_id: ObjectId, day: str) -> Optional[dict]:
+        """Atomically flip isCompleted and update the streak for `day`. Returns the updated habit."""
+
+    @abstractmethod
+    async def toggle_many(self, user_id: ObjectId, habit_ids: List[ObjectId], day: str) -> List[dict]:
+        """
+        Toggle several habits (each as `toggle`) in one write. Returns the updated habits
+        that exist, in `habit_ids` order. Each toggle is atomic, but they are read back
+        afterwards, so a concurrent toggle of the same habit in between shows in the result.
+        """
+
+class LogRepository(ABC):
+    @abstractmethod
+    async def find(self, user_id: ObjectId, day: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    def iter_range(self, user_id: ObjectId, start: str, end: str) -> AsyncIterator[dict]:
+        """date/steps/waterMl/proteinG of the logs from start to end (inclusive), in date order."""
+
+    @abstractmethod
+    async def find_days(self, user_id: ObjectId, days: List[str]) -> Dict[str, dict]:
+        """Existing logs for the given dates, by date."""
+
+    @abstractmethod
+    async def upsert(self, user_id: ObjectId, day: str, fields: dict) -> Tuple[Optional[dict], dict]:
+        """Atomically insert or update one day's log. Returns (previous log or None, saved log)."""
+
+    @abstractmethod
+    async def upsert_many(
+        self, user_id: ObjectId, logs: List[dict]
+    ) -> Tuple[Dict[int, Optional[dict]], Dict[int, str]]:
+        """
+        Insert or update several days (one log per date, each with a "date").
+        Returns ({index: previous log or None} for the logs written, {index: error}
+        for those that failed); a failure doesn't stop the others. As with upsert(),
+        each previous log is exactly the version its write replaced, even when
+        other writes to the same day run concurrently.
+        """
+
+    @abstractmethod
+    async def increment_rollups(self, user_id: ObjectId, changes: List[Tuple[str, Dict[str, int]]]):
+        """Apply (log date, delta) changes to the weekly and monthly rollups."""
+
+    @abstractmethod
+    async def find_rollups(
+        self, user_id: ObjectId, period_type: str, start: Optional[str] = None, end: Optional[str] = None
+    ) -> List[dict]:
+        """Rollups of one period type with periodStart in [start, end], in periodStart order."""
+
+class RevokedTokenRepository(ABC):
+    @abstractmethod
+    async def insert(self, jti: str, expires_at: datetime, revoked_at: datetime) -> bool:
+        """Record a revocation. Returns False if `jti` was already revoked."""
+
+    @abstractmethod
+    def revoked_since(self, since: datetime) -> AsyncIterator[dict]:
+        """Revocations ({_id, expiresAt, revokedAt}) recorded at or after `since`."""
+
+class Repositories:
+    def __init__(
+        self,
+        users: UserRepository,
+        habits: HabitRepository,
+        logs: LogRepository,
+        revoked_tokens: RevokedTokenRepository,
+    ):
+        self.users = users
+        self.habits = habits
+        self.logs = logs
+        self.revoked_tokens = revoked_tokens
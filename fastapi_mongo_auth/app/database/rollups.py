@@ -0,0 +1,125 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+from bson import ObjectId
+
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorDatabase
+    from pymongo import UpdateOne
+
+# Weekly / monthly totals of daily logs, kept in the `log_rollups` collection:
+#   {userId, periodType: "week"|"month", periodStart: "YYYY-MM-DD", days, steps, waterMl, proteinG}
+# `days` counts the days in the period that have a log.
+ROLLUP_FIELDS = ("steps", "waterMl", "proteinG")
+PERIOD_TYPES = ("week", "month")
+
+def period_start(day: date, period_type: str) -> date:
+    if period_type == "week":
+        return day - timedelta(days=day.weekday())  # Monday
+    return day.replace(day=1)
+
+def log_delta(previous: Optional[dict], current: dict) -> Dict[str, int]:
+    """Per-field change (plus the `days` change) caused by replacing `previous` with `current`."""
+    previous = previous or {}
+    delta = {field: current.get(field, 0) - previous.get(field, 0) for field in ROLLUP_FIELDS}
+    delta["days"] = 0 if previous else 1
+    return delta
+
+def merge_rollup_deltas(changes: Iterable[Tuple[str, Dict[str, int]]]) -> Dict[Tuple[str, str], Dict[str, int]]:
+    """
+    Sum (log date, delta) pairs per (periodType, periodStart), dropping zero
+    changes, so each period is written at most once. Invalid dates are skipped.
+    """
+    merged = defaultdict(lambda: defaultdict(int))
+    for log_date, delta in changes:
+        try:
+            day = date.fromisoformat(log_date)
+        except ValueError:
+            continue
+        for period_type in PERIOD_TYPES:
+            key = (period_type, period_start(day, period_type).isoformat())
+            for field, value in delta.items():
+                merged[key][field] += value
+
+    increments = {}
+    for key, delta in merged.items():
+        nonzero = {field: value for field, value in delta.items() if value}
+        if nonzero:
+            increments[key] = nonzero
+    return increments
+
+def rollup_operations(user_id: ObjectId, changes: Iterable[Tuple[str, Dict[str, int]]]) -> List["UpdateOne"]:
+    """Turn (log date, delta) pairs into merged `$inc` upserts."""
+    from pymongo import UpdateOne  # Only the MongoDB backend writes rollups this way
+    return [
+        UpdateOne(
+            {"userId": user_id, "periodType": period_type, "periodStart": start},
+            {"$inc": increments},
+            upsert=True
+        )
+        for (period_type, start), increments in merge_rollup_deltas(changes).items()
+    ]
+
+async def rebuild_rollups(db: "AsyncIOMotorDatabase", user_id: Optional[ObjectId] = None) -> int:
+    """
+    Recompute rollups from the `logs` collection, for one user or for everyone.
+    Logs are streamed in (userId, date) order, so only one user's periods are
+    held in memory at a time. Rollups of users with no logs left are deleted.
+    Returns the number of users rebuilt.
+    """
+    from pymongo import ASCENDING
+
+    query = {"userId": user_id} if user_id else {}
+    cursor = db.logs.find(query, {"_id": 0, "userId": 1, "date": 1, **{f: 1 for f in ROLLUP_FIELDS}})
+    cursor = cursor.sort([("userId", ASCENDING), ("date", ASCENDING)]).batch_size(1000)
+
+    async def flush(uid, periods):
+        await db.log_rollups.delete_many({"userId": uid})
+        docs = [
+            {"userId": uid, "periodType": period_type, "periodStart": start, **totals}
+            for (period_type, start), totals in periods.items()
+        ]
+        if docs:
+            await db.log_rollups.insert_many(docs, ordered=False)
+
+    rebuilt = set()
+    current_user, periods = None, {}
+    async for log in cursor:
+        if log["userId"] != current_user:
+            if current_user is not None:
+                await flush(current_user, periods)
+                rebuilt.add(current_user)
+            current_user, periods = log["userId"], {}
+        try:
+            day = date.fromisoformat(log["date"])
+        except ValueError:
+            continue
+        for period_type in PERIOD_TYPES:
+            key = (period_type, period_start(day, period_type).isoformat())
+            totals = periods.setdefault(key, {"days": 0, **{f: 0 for f in ROLLUP_FIELDS}})
+            totals["days"] += 1
+            for field in ROLLUP_FIELDS:
+                totals[field] += log.get(field, 0)
+
+    if current_user is not None:
+        await flush(current_user, periods)
+        rebuilt.add(current_user)
+    if user_id is not None:
+        if not rebuilt:
+            # User has no logs left; drop any stale rollups
+            await db.log_rollups.delete_many({"userId": user_id})
+    else:
+        await _delete_rollups_except(db, rebuilt)
+    return len(rebuilt)
+
+async def _delete_rollups_except(db: "AsyncIOMotorDatabase", user_ids: set, batch_size: int = 1000):
+    """Delete the rollups of every user not in `user_ids`, a batch of users at a time."""
+    stale = []
+    async for group in db.log_rollups.aggregate([{"$group": {"_id": "$userId"}}]):
+        if group["_id"] not in user_ids:
+            stale.append(group["_id"])
+        if len(stale) >= batch_size:
+            await db.log_rollups.delete_many({"userId": {"$in": stale}})
+            stale = []
+    if stale:
+        await db.log_rollups.delete_many({"userId": {"$in": stale}})
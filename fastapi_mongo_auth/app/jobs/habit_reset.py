@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import os
+import socket
+from datetime import date, datetime, timedelta
+from typing import Optional
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from app.core.config import settings
+from app.core.data_version import DATA_VERSION_FIELD
+
+logger = logging.getLogger(__name__)
+
+class HabitResetJob:
+    """
+    Daily habit reset. At each (server-local) day boundary, the habits
+    completed on the day that just ended are archived into
+    `habit_completions` and their `isCompleted` flag is cleared.
+
+    Habits are processed in `_id` order, in chunks of HABIT_RESET_BATCH_SIZE,
+    with a short pause between chunks so request handling is never held up.
+    Progress (day + last processed `_id`) is saved in `job_state` after every
+    chunk, and archiving is idempotent, so a restart resumes where it left off.
+    A lease in the same document keeps multiple workers from running it at once.
+    """
+
+    STATE_ID = "habit_reset"
+    LEASE = timedelta(minutes=5)
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self.habits_collection = db.habits
+        self.completions_collection = db.habit_completions
+        self.state_collection = db.job_state
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    async def run_forever(self):
+        while True:
+            try:
+                finished = await self.run_pending()
+            except Exception:
+                logger.exception("Habit reset failed, will retry")
+                finished = False
+            if finished:
+                await asyncio.sleep(_seconds_until_midnight())
+            else:
+                # Another worker is running it (or we failed): check again once its lease could lapse
+                await asyncio.sleep(self.LEASE.total_seconds())
+
+    async def run_pending(self) -> bool:
+        """
+        Reset for yesterday unless that is already done, resuming a partial run.
+        Returns False if another worker holds the lease, or took it over mid-run.
+        """
+        day = (date.today() - timedelta(days=1)).isoformat()
+        state = await self.state_collection.find_one({"_id": self.STATE_ID})
+        if state and state.get("day") == day and state.get("status") == "done":
+            return True
+        if not await self._acquire_lease():
+            return False
+        state = await self.state_collection.find_one({"_id": self.STATE_ID})
+
+        last_id: Optional[ObjectId] = None
+        if state.get("day") == day:
+            last_id = state.get("lastId")
+        elif not await self._save_progress(day, None, "running"):
+            return False
+
+        while True:
+            last_id = await self._reset_chunk(day, last_id)
+            if last_id is None:
+                break
+            if not await self._save_progress(day, last_id, "running"):
+                return False
+            await asyncio.sleep(settings.HABIT_RESET_PAUSE_SECONDS)
+
+        if not await self._save_progress(day, None, "done"):
+            return False
+        await self.state_collection.update_one(
+            {"_id": self.STATE_ID, "leaseOwner": self.worker_id},
+            {"$unset": {"leaseOwner": "", "leaseUntil": ""}}
+        )
+        return True
+
+    async def _reset_chunk(self, day: str, last_id: Optional[ObjectId]) -> Optional[ObjectId]:
+        """Archive and reset the next chunk. Returns its last _id, or None when finished."""
+        # Habits already completed again today are left for tomorrow's run
+        query = {
+            "isCompleted": True,
+            "$or": [{"lastCompletedDate": {"$lte": day}}, {"lastCompletedDate": None}],
+        }
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        habits = await self.habits_collection.find(query, {"userId": 1, "lastCompletedDate": 1}) \
+            .sort("_id", ASCENDING).limit(settings.HABIT_RESET_BATCH_SIZE).to_list(length=None)
+        if not habits:
+            return None
+
+        # $setOnInsert keeps the first archived value if a chunk is replayed after a crash
+        await self.completions_collection.bulk_write([
+            UpdateOne(
+                {"habitId": habit["_id"], "date": habit.get("lastCompletedDate") or day},
+                {"$setOnInsert": {"userId": habit["userId"], "isCompleted": True}},
+                upsert=True
+            )
+            for habit in habits
+        ], ordered=False)
+        await self.habits_collection.update_many(
+            {**query, "_id": {"$in": [habit["_id"] for habit in habits]}},
+            {"$set": {"isCompleted": False}}
+        )
+        # Their GET /habits responses changed: invalidate the owners' ETags
+        await self.db.users.update_many(
+            {"_id": {"$in": list({habit["userId"] for habit in habits})}},
+            {"$inc": {DATA_VERSION_FIELD: 1}}
+        )
+        return habits[-1]["_id"]
+
+    async def _acquire_lease(self) -> bool:
+        now = datetime.utcnow()
+        try:
+            await self.state_collection.update_one(
+                {
+                    "_id": self.STATE_ID,
+                    "$or": [
+                        {"leaseUntil": {"$exists": False}},
+                        {"leaseUntil": {"$lt": now}},
+                        {"leaseOwner": self.worker_id},
+                    ],
+                },
+                {"$set": {"leaseOwner": self.worker_id, "leaseUntil": now + self.LEASE}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False  # Another worker holds the lease
+        return True
+
+    async def _save_progress(self, day: str, last_id: Optional[ObjectId], status: str) -> bool:
+        """
+        Save progress and renew the lease. Returns False, saving nothing, if the
+        lease lapsed and another worker took it over: that worker owns the run now.
+        """
+        result = await self.state_collection.update_one(
+            {"_id": self.STATE_ID, "leaseOwner": self.worker_id},
+            {"$set": {
+                "day": day,
+                "lastId": last_id,
+                "status": status,
+                "leaseUntil": datetime.utcnow() + self.LEASE,
+            }}
+        )
+        if result.matched_count == 0:
+            logger.warning("Habit reset lease lost to another worker, stopping this run")
+            return False
+        return True
+
+def _seconds_until_midnight() -> float:
+    now = datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return (midnight - now).total_seconds() + 1
@@ -1,12 +1,63 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes import auth_routes
 from app.database.connection import db
+from app.core.password_hasher import password_hasher
+from app.core.revocation import revocation_list
+from app.core.xp_accumulator import xp_accumulator
+from app.core.config import settings
+from app.core.serialization import MongoJSONResponse
+from app.core.logging_config import REQUEST_ID_HEADER, RequestIdMiddleware, setup_logging, shutdown_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging()
+    background_tasks = []
+    # Serverless: startup hooks may not run and background tasks don't outlive an invocation,
+    # so everything below happens on first use instead (see db.ensure_connected)
+    if not settings.SERVERLESS:
+        # Startup: set the bcrypt cost, connect, pre-open pooled connections, then make sure indexes exist
+        await password_hasher.configure_cost()
+        db.connect()
+        await db.warmup()
+        if db.uses_mongo:
+            from app.database.indexes import ensure_indexes
+            await ensure_indexes(db.get_db())
+        await revocation_list.sync(db.repositories.revoked_tokens)
+        background_tasks.append(asyncio.create_task(revocation_list.run_sync_loop(db.repositories.revoked_tokens)))
+        # The reset job works on MongoDB directly (in-memory storage starts fresh every run anyway)
+        if settings.HABIT_RESET_ENABLED and db.uses_mongo:
+            from app.jobs.habit_reset import HabitResetJob
+            background_tasks.append(asyncio.create_task(HabitResetJob(db.get_db()).run_forever()))
+        if settings.XP_WRITE_BEHIND:
+            background_tasks.append(asyncio.create_task(xp_accumulator.run_flush_loop(db.repositories.users)))
+    yield
+    # Shutdown
+    for task in background_tasks:
+        task.cancel()
+    if not settings.SERVERLESS and settings.XP_WRITE_BEHIND:
+        # Write what is still buffered (waits for a flush the loop had in progress)
+        xp_accumulator.enabled = False
+        try:
+            await xp_accumulator.flush(db.repositories.users)
+        except Exception:
+            logger.exception("Final XP flush failed", extra=xp_accumulator.stats())
+    db.disconnect()
+    password_hasher.shutdown()
+    shutdown_logging()
 
 app = FastAPI(
     title="FastAPI Mongo Auth",
     description="A robust authentication API using FastAPI and MongoDB. Supports user registration, login, and token management.",
     version="1.0.0",
+    default_response_class=MongoJSONResponse,
+    lifespan=lifespan,
     contact={
         "name": "API Support",
         "email": "support@example.com",
@@ -26,19 +77,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["X-Next-Cursor", "ETag", REQUEST_ID_HEADER],  # Pagination cursor for GET /habits, ETags, request id
 )
 
-@app.on_event("startup")
-async def startup_db_client():
-    db.connect()
+if settings.METRICS_ENABLED:
+    from app.core.metrics import MetricsMiddleware
+    # Wraps CORS and the routes, so it times everything but the request id middleware
+    app.add_middleware(MetricsMiddleware)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    db.disconnect()
+# Outermost: everything below, including metrics, runs with the request id set
+app.add_middleware(RequestIdMiddleware)
 
 app.include_router(auth_routes.router)
 from app.routes import tracker_routes
 app.include_router(tracker_routes.router)
+from app.routes import leaderboard_routes
+app.include_router(leaderboard_routes.router)
+from app.routes import health_routes
+app.include_router(health_routes.router)
+if settings.METRICS_ENABLED:
+    from app.routes import metrics_routes
+    app.include_router(metrics_routes.router)
 
 @app.get("/")
 async def root():
@@ -0,0 +1,17 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field, ConfigDict
+from app.models.habit import HabitResponse
+from app.models.log import LogResponse
+from app.models.user import UserResponse
+
+# Sections of GET /dashboard, selectable with ?include=
+DASHBOARD_SECTIONS = ("profile", "habits", "today")
+
+class DashboardResponse(BaseModel):
+    """Home screen data in one response. Sections that weren't requested are left out."""
+    profile: Optional[UserResponse] = None
+    habits: Optional[List[HabitResponse]] = None
+    habits_next_cursor: Optional[str] = Field(default=None, alias="habitsNextCursor")  # `after` for GET /habits
+    today: Optional[LogResponse] = None
+
+    model_config = ConfigDict(populate_by_name=True)
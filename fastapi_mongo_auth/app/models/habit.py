@@ -1,6 +1,7 @@
 from typing import Annotated, Optional
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, model_validator
 from app.models.user import PyObjectId
+from app.core.streaks import current_streak
 
 class HabitBase(BaseModel):
     title: str
@@ -15,10 +16,18 @@ class HabitInDB(HabitBase):
     id: Annotated[PyObjectId, Field(alias="_id", default=None)]
     user_id: Annotated[PyObjectId, Field(alias="userId")]
 
+    # Streaks (maintained by the server)
+    current_streak: int = Field(default=0, alias="currentStreak")
+    longest_streak: int = Field(default=0, alias="longestStreak")
+    last_completed_date: Optional[str] = Field(default=None, alias="lastCompletedDate")
+
     model_config = ConfigDict(
         populate_by_name=True,
         arbitrary_types_allowed=True,
     )
 
 class HabitResponse(HabitInDB):
-    pass
+    @model_validator(mode="after")
+    def expire_broken_streak(self):
+        self.current_streak = current_streak(self.current_streak, self.last_completed_date)
+        return self
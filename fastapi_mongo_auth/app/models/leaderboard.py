@@ -0,0 +1,15 @@
+from typing import Annotated
+from pydantic import BaseModel, Field, ConfigDict
+from app.models.user import PyObjectId
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: Annotated[PyObjectId, Field(alias="userId")]
+    name: str
+    level: int = 1
+    current_xp: int = Field(default=0, alias="currentXp")
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+    )
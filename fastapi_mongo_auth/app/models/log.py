@@ -1,4 +1,4 @@
-from typing import Annotated
+from typing import Annotated, Optional
 from pydantic import BaseModel, Field, ConfigDict
 from app.models.user import PyObjectId
 
@@ -22,3 +22,20 @@ class LogInDB(LogBase):
 
 class LogResponse(LogInDB):
     pass
+
+class LogSyncResult(BaseModel):
+    date: str
+    status: str  # "inserted", "updated", "superseded" or "failed"
+    error: Optional[str] = None
+
+class LogSummary(BaseModel):
+    period_start: str = Field(alias="periodStart")  # YYYY-MM-DD (Monday for weeks)
+    days: int = 0  # Days in the period that have a log
+    steps: int = 0
+    water_ml: int = Field(default=0, alias="waterMl")
+    protein_g: int = Field(default=0, alias="proteinG")
+    avg_steps: float = Field(default=0, alias="avgSteps")
+    avg_water_ml: float = Field(default=0, alias="avgWaterMl")
+    avg_protein_g: float = Field(default=0, alias="avgProteinG")
+
+    model_config = ConfigDict(populate_by_name=True)
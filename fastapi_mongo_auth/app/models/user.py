@@ -4,11 +4,12 @@ from pydantic import BaseModel, EmailStr, Field
 from bson import ObjectId
 
 from typing import Any, Annotated
-from pydantic import BaseModel, EmailStr, Field, ConfigDict, GetJsonSchemaHandler, field_validator
+from pydantic import BaseModel, EmailStr, Field, ConfigDict, GetJsonSchemaHandler, field_validator, model_validator
 from pydantic.json_schema import JsonSchemaValue
 from pydantic_core import core_schema
 from bson import ObjectId
 import re
+from app.core.streaks import current_streak
 
 class PyObjectId(str):
     @classmethod
@@ -83,6 +84,14 @@ class UserInDB(UserBase):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     disabled: bool = False
 
+    # Daily goal streak (maintained by the server)
+    current_streak: int = Field(default=0, alias="currentStreak")
+    longest_streak: int = Field(default=0, alias="longestStreak")
+    last_completed_date: Optional[str] = Field(default=None, alias="lastCompletedDate")
+
+    # Bumped by writes to the user's profile, habits or logs (see app/core/data_version.py)
+    data_version: int = Field(default=0, alias="dataVersion")
+
     model_config = ConfigDict(
         populate_by_name=True,
         arbitrary_types_allowed=True,
@@ -91,6 +100,14 @@ class UserInDB(UserBase):
 class UserResponse(UserBase):
     id: Annotated[PyObjectId, Field(alias="_id", default=None)]
     created_at: datetime
+    current_streak: int = Field(default=0, alias="currentStreak")
+    longest_streak: int = Field(default=0, alias="longestStreak")
+    last_completed_date: Optional[str] = Field(default=None, alias="lastCompletedDate")
+
+    @model_validator(mode="after")
+    def expire_broken_streak(self):
+        self.current_streak = current_streak(self.current_streak, self.last_completed_date)
+        return self
 
     model_config = ConfigDict(
         populate_by_name=True,
@@ -1,20 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from motor.motor_asyncio import AsyncIOMotorDatabase
-from app.database.connection import get_database
+from app.database.connection import get_repositories
+from app.database.repositories import Repositories
 from app.controllers.auth_controller import AuthController
 from app.models.user import UserCreate, UserResponse, UserLogin, UserInDB
 from app.models.token import Token
-from app.core.security import create_access_token, create_refresh_token
-from app.core.deps import get_current_user
+from app.core.security import JWTError, create_access_token, create_refresh_token, decode_token
+from app.core.deps import get_current_user, oauth2_scheme
+from app.core.revocation import revocation_list
 from app.core.config import settings
-from jose import jwt, JWTError
 from datetime import timedelta
+from typing import Optional
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
-def get_auth_controller(db: AsyncIOMotorDatabase = Depends(get_database)) -> AuthController:
-    return AuthController(db)
+def get_auth_controller(repos: Repositories = Depends(get_repositories)) -> AuthController:
+    return AuthController(repos)
 
 @router.post(
     "/register", 
@@ -123,9 +124,9 @@ async def login_json(user_login: UserLogin, controller: AuthController = Depends
     summary="Refresh access token",
     description="Get a new access token using a valid refresh token."
 )
-async def refresh_token(refresh_token: str, db: AsyncIOMotorDatabase = Depends(get_database)):
+async def refresh_token(refresh_token: str, repos: Repositories = Depends(get_repositories)):
     try:
-        payload = jwt.decode(refresh_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = decode_token(refresh_token)
         if payload.get("type") != "refresh":
              raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token type")
         email: str = payload.get("sub")
@@ -134,12 +135,21 @@ async def refresh_token(refresh_token: str, db: AsyncIOMotorDatabase = Depends(g
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
 
+    # Rotation: a refresh token can only be used once. The insert into
+    # revoked_tokens is atomic, so concurrent reuse on other workers fails too.
+    jti = payload.get("jti")
+    if settings.SERVERLESS:
+        await revocation_list.sync_if_due(repos.revoked_tokens)
+    if jti is not None:
+        if revocation_list.is_revoked(jti) or not await revocation_list.revoke(repos.revoked_tokens, jti, payload["exp"]):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token has been revoked")
+
     # Create new access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         subject=email, expires_delta=access_token_expires
     )
-    # Optionally rotate refresh token
+    # Rotate refresh token
     new_refresh_token = create_refresh_token(subject=email)
 
     return {
@@ -148,6 +158,35 @@ async def refresh_token(refresh_token: str, db: AsyncIOMotorDatabase = Depends(g
         "token_type": "Bearer"
     }
 
+@router.post(
+    "/logout",
+    summary="Log out",
+    description="Revoke the current access token and, if given, the refresh token issued with it."
+)
+async def logout(
+    refresh_token: Optional[str] = None,
+    token: str = Depends(oauth2_scheme),
+    current_user: UserInDB = Depends(get_current_user),
+    repos: Repositories = Depends(get_repositories)
+):
+    payload = decode_token(token)
+    if payload.get("jti"):
+        await revocation_list.revoke(repos.revoked_tokens, payload["jti"], payload["exp"])
+
+    if refresh_token:
+        try:
+            refresh_payload = decode_token(refresh_token)
+        except JWTError:
+            refresh_payload = {}  # Already unusable
+        if (
+            refresh_payload.get("type") == "refresh"
+            and refresh_payload.get("sub") == current_user.email
+            and refresh_payload.get("jti")
+        ):
+            await revocation_list.revoke(repos.revoked_tokens, refresh_payload["jti"], refresh_payload["exp"])
+
+    return {"message": "Logged out"}
+
 @router.get(
     "/me", 
     response_model=UserResponse,
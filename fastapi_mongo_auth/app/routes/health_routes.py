@@ -0,0 +1,20 @@
+from fastapi import APIRouter, status
+from app.core.serialization import MongoJSONResponse
+from app.database.connection import db
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+@router.get(
+    "/ready",
+    summary="Readiness probe",
+    description="Returns 200 once the MongoDB pool is warmed up and the server answers a ping, 503 otherwise."
+)
+async def ready():
+    is_ready = db.ready and await db.ping()
+    return MongoJSONResponse(
+        {
+            "status": "ready" if is_ready else "unavailable",
+            "pool": db.pool_stats(),
+        },
+        status_code=status.HTTP_200_OK if is_ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
@@ -0,0 +1,38 @@
+from typing import List
+from fastapi import APIRouter, Depends, Query
+from app.database.connection import get_repositories
+from app.database.repositories import Repositories
+from app.controllers.leaderboard_controller import LeaderboardController
+from app.models.leaderboard import LeaderboardEntry
+from app.models.user import UserInDB
+from app.core.config import settings
+from app.core.deps import get_current_user
+
+router = APIRouter(prefix="/leaderboard", tags=["Leaderboard"])
+
+def get_leaderboard_controller(repos: Repositories = Depends(get_repositories)) -> LeaderboardController:
+    return LeaderboardController(repos)
+
+@router.get(
+    "",
+    response_model=List[LeaderboardEntry],
+    summary="Top users by level and XP",
+    description="Served from a per-process cache refreshed every LEADERBOARD_REFRESH_SECONDS."
+)
+async def get_leaderboard(
+    limit: int = Query(10, ge=1, le=settings.LEADERBOARD_CACHE_SIZE),
+    current_user: UserInDB = Depends(get_current_user),
+    controller: LeaderboardController = Depends(get_leaderboard_controller)
+):
+    return await controller.get_top(limit)
+
+@router.get(
+    "/me",
+    response_model=LeaderboardEntry,
+    summary="Current user's rank"
+)
+async def get_my_rank(
+    current_user: UserInDB = Depends(get_current_user),
+    controller: LeaderboardController = Depends(get_leaderboard_controller)
+):
+    return await controller.get_rank(current_user)
@@ -0,0 +1,31 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from app.core.cache import principal_cache
+from app.core.logging_config import dropped_records
+from app.core.metrics import CONTENT_TYPE, metrics
+from app.core.password_hasher import password_hasher
+from app.core.security import token_cache
+from app.core.xp_accumulator import xp_accumulator
+from app.database.connection import db
+
+router = APIRouter(tags=["Health"])
+
+def _cache_stats(cache):
+    return lambda: {"hits": cache.hits, "misses": cache.misses, "size": len(cache)}
+
+# Components that keep their own stats are read at scrape time
+metrics.add_collector("password_hash", password_hasher.stats, counters=("submitted", "completed", "rejected"))
+metrics.add_collector("mongodb_pool", db.pool_stats, counters=("created", "closed", "checkout_failures", "clears"))
+metrics.add_collector("principal_cache", _cache_stats(principal_cache), counters=("hits", "misses"))
+metrics.add_collector("token_cache", _cache_stats(token_cache), counters=("hits", "misses"))
+metrics.add_collector("xp_write_behind", xp_accumulator.stats, counters=("flushes", "flush_failures"))
+metrics.add_collector("log", lambda: {"dropped_records": dropped_records()}, counters=("dropped_records",))
+
+@router.get(
+    "/metrics",
+    summary="Prometheus metrics",
+    description="Request latency per route, MongoDB command latency per collection, pool and worker stats.",
+    response_class=Response,
+)
+async def get_metrics():
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
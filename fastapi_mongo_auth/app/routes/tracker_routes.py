@@ -1,38 +1,127 @@
 from datetime import date, timedelta
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 
-from app.database.connection import get_database
+from app.database.connection import get_repositories
+from app.database.repositories import Repositories
 from app.controllers.tracker_controller import TrackerController
 from app.models.user import UserInDB, UserResponse
 from app.models.habit import HabitCreate, HabitResponse
-from app.models.log import LogBase, LogCreate, LogResponse
+from app.models.dashboard import DASHBOARD_SECTIONS, DashboardResponse
+from app.models.log import LogBase, LogCreate, LogResponse, LogSummary, LogSyncResult
+from app.core.config import settings
+from app.core.data_version import etag_matches, make_etag
 from app.core.deps import get_current_user
+from app.core.serialization import MongoJSONResponse
+from app.core.streaming import NDJSON_MEDIA_TYPE, stream_json_array, stream_ndjson
+from app.core.streaks import daily_goal_for
+from app.core.xp_accumulator import xp_accumulator
 
 router = APIRouter(tags=["Tracker"])
 
-def get_tracker_controller(db: AsyncIOMotorDatabase = Depends(get_database)) -> TrackerController:
-    return TrackerController(db)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Clients may keep responses, but must revalidate them (cheaply, with If-None-Match)
+CACHE_CONTROL = "private, no-cache"
+
+def get_tracker_controller(repos: Repositories = Depends(get_repositories)) -> TrackerController:
+    return TrackerController(repos)
+
+def _etag_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_etag_headers(etag))
+
+async def _current_etag(user_id: str, controller: TrackerController) -> Optional[str]:
+    # Changes waiting for the write-behind flush haven't bumped the version yet: no ETag until they have
+    if xp_accumulator.has_pending(user_id):
+        return None
+    return make_etag(user_id, await controller.get_data_version(user_id))
 
 # --- Profile ---
 @router.get("/user/profile", response_model=UserResponse)
 async def get_profile(
-    current_user: UserInDB = Depends(get_current_user)
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user: UserInDB = Depends(get_current_user),
+    controller: TrackerController = Depends(get_tracker_controller)
 ):
-    # current_user already has the latest data from get_current_user dependency 
-    # (assuming get_current_user fetches from DB).
-    # If get_current_user uses decoded token data only, we might need to fetch fresh from DB.
-    # checking app/core/deps.py -> it fetches from DB. So we are good.
-    return current_user
+    """Supports conditional requests: send the last `ETag` as `If-None-Match` to get 304 if nothing changed."""
+    user_id = str(current_user.id)
+    if xp_accumulator.has_pending(user_id):
+        # Read-your-writes for XP not flushed yet (write-behind); no ETag until it is
+        return xp_accumulator.merge(current_user)
+    # Same version source as the other routes; the cached principal is reloaded if it is older
+    version = await controller.get_data_version(user_id)
+    etag = make_etag(user_id, version)
+    if etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+    response.headers.update(_etag_headers(etag))
+    return await controller.get_profile(current_user, version)
+
+# --- Dashboard ---
+@router.get("/dashboard", response_model=DashboardResponse)
+async def get_dashboard(
+    include: Optional[str] = Query(None, description="Comma-separated sections to return: profile,habits,today (default: all)"),
+    habits_limit: int = Query(settings.HABITS_PAGE_DEFAULT_LIMIT, ge=1, le=settings.HABITS_PAGE_MAX_LIMIT),
+    if_none_match: Optional[str] = Header(None),
+    current_user: UserInDB = Depends(get_current_user),
+    controller: TrackerController = Depends(get_tracker_controller)
+):
+    """
+    Profile, the first page of habits and today's log in one request, with one
+    authentication, the reads running concurrently. Further habits pages come
+    from GET /habits with `after=habitsNextCursor`.
+    Supports conditional requests (`ETag` / `If-None-Match`).
+    """
+    sections = {section.strip() for section in include.split(",") if section.strip()} if include else set()
+    unknown = sections - set(DASHBOARD_SECTIONS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown sections: {', '.join(sorted(unknown))}")
+    sections = sections or set(DASHBOARD_SECTIONS)
+
+    user_id = str(current_user.id)
+    etag = await _current_etag(user_id, controller)
+    if etag and etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    dashboard = await controller.get_dashboard(user_id, sections, habits_limit)
+    if "profile" in sections:
+        profile = await controller.get_profile(current_user, await controller.get_data_version(user_id))
+        profile = xp_accumulator.merge(profile)
+        dashboard["profile"] = UserResponse(**profile.model_dump(by_alias=True)).model_dump(by_alias=True)
+    # Sections are already in response shape: skip response_model re-validation
+    return MongoJSONResponse(dashboard, headers=_etag_headers(etag) if etag else None)
 
 # --- Habits ---
 @router.get("/habits", response_model=List[HabitResponse])
 async def get_habits(
+    limit: int = Query(settings.HABITS_PAGE_DEFAULT_LIMIT, ge=1, le=settings.HABITS_PAGE_MAX_LIMIT),
+    after: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (e.g. title,isCompleted)"),
+    if_none_match: Optional[str] = Header(None),
     current_user: UserInDB = Depends(get_current_user),
     controller: TrackerController = Depends(get_tracker_controller)
 ):
-    return await controller.get_habits(str(current_user.id))
+    """
+    Habits in creation order, one page at a time.
+    When more habits exist, the `X-Next-Cursor` response header holds the value to pass as `after`.
+    Supports conditional requests (`ETag` / `If-None-Match`).
+    """
+    # Version first: a write landing in between leaves the response with an older tag, never a newer one
+    etag = await _current_etag(str(current_user.id), controller)
+    if etag and etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    habits, next_cursor = await controller.get_habits(str(current_user.id), limit, after, field_list)
+
+    headers = _etag_headers(etag) if etag else {}
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    # Documents come straight from the database, so skip response_model re-validation
+    return MongoJSONResponse(habits, headers=headers)
 
 @router.post("/habits", response_model=HabitResponse)
 async def create_habit(
@@ -42,6 +131,27 @@ async def create_habit(
 ):
     return await controller.create_habit(str(current_user.id), habit)
 
+@router.post("/habits/bulk", response_model=List[HabitResponse])
+async def create_habits_bulk(
+    habits: List[HabitCreate] = Body(..., max_length=settings.HABITS_BULK_MAX_SIZE),
+    current_user: UserInDB = Depends(get_current_user),
+    controller: TrackerController = Depends(get_tracker_controller)
+):
+    """Create several habits at once (e.g. a starter set). Returns them in the order given."""
+    return await controller.create_habits(str(current_user.id), habits)
+
+@router.post("/habits/toggle", response_model=List[HabitResponse])
+async def toggle_habits(
+    habit_ids: List[str] = Body(..., max_length=settings.HABITS_BULK_MAX_SIZE),
+    current_user: UserInDB = Depends(get_current_user),
+    controller: TrackerController = Depends(get_tracker_controller)
+):
+    """
+    Toggle several habits at once (e.g. "complete all"), with XP for every
+    completion awarded together. Returns the toggled habits; unknown ids are skipped.
+    """
+    return await controller.toggle_habits(str(current_user.id), habit_ids)
+
 @router.post("/habits/{habit_id}/toggle", response_model=HabitResponse)
 async def toggle_habit(
     habit_id: str,
@@ -53,19 +163,53 @@ async def toggle_habit(
 # --- Logs ---
 @router.get("/logs/today", response_model=LogResponse)
 async def get_today_log(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     current_user: UserInDB = Depends(get_current_user),
     controller: TrackerController = Depends(get_tracker_controller)
 ):
+    """Supports conditional requests (`ETag` / `If-None-Match`)."""
+    etag = await _current_etag(str(current_user.id), controller)
+    if etag and etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+    if etag:
+        response.headers.update(_etag_headers(etag))
     return await controller.get_today_log(str(current_user.id))
 
 @router.get("/logs/history", response_model=List[LogBase])
 async def get_log_history(
+    request: Request,
     startDate: str = Query(..., description="Start date (YYYY-MM-DD)"),
     endDate: str = Query(..., description="End date (YYYY-MM-DD)"),
     current_user: UserInDB = Depends(get_current_user),
     controller: TrackerController = Depends(get_tracker_controller)
 ):
-    return await controller.get_log_history(str(current_user.id), startDate, endDate)
+    """
+    One entry per day in the range, with missing days zero-filled.
+    Long ranges (or clients sending `Accept: application/x-ndjson`) are streamed.
+    """
+    start, end = controller.parse_history_range(startDate, endDate)
+    wants_ndjson = NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+    if wants_ndjson or (end - start).days + 1 > settings.LOG_HISTORY_STREAM_THRESHOLD_DAYS:
+        rows = controller.iter_log_history(str(current_user.id), start, end)
+        if wants_ndjson:
+            return StreamingResponse(stream_ndjson(rows), media_type=NDJSON_MEDIA_TYPE)
+        return StreamingResponse(stream_json_array(rows), media_type="application/json")
+    return MongoJSONResponse(await controller.get_log_history(str(current_user.id), startDate, endDate))
+
+@router.get("/logs/summary", response_model=List[LogSummary])
+async def get_log_summary(
+    granularity: Literal["week", "month"] = Query("week", description="Period size"),
+    startDate: Optional[str] = Query(None, description="Only periods containing or after this date (YYYY-MM-DD)"),
+    endDate: Optional[str] = Query(None, description="Only periods starting on or before this date (YYYY-MM-DD)"),
+    current_user: UserInDB = Depends(get_current_user),
+    controller: TrackerController = Depends(get_tracker_controller)
+):
+    """
+    Weekly or monthly totals and per-logged-day averages of steps, water and protein.
+    Served from pre-aggregated rollups, so cost grows with the number of periods, not days.
+    """
+    return await controller.get_log_summary(str(current_user.id), granularity, startDate, endDate)
 
 @router.post("/logs/sync", response_model=LogResponse)
 async def sync_log(
@@ -73,4 +217,18 @@ async def sync_log(
     current_user: UserInDB = Depends(get_current_user),
     controller: TrackerController = Depends(get_tracker_controller)
 ):
-    return await controller.sync_log(str(current_user.id), log)
+    goal = daily_goal_for(current_user.daily_goal_name, current_user.daily_goal_target)
+    return await controller.sync_log(str(current_user.id), log, goal)
+
+@router.post("/logs/sync/batch", response_model=List[LogSyncResult])
+async def sync_logs_batch(
+    logs: List[LogCreate] = Body(..., description=f"At most {settings.LOG_SYNC_BATCH_MAX_SIZE} entries"),
+    current_user: UserInDB = Depends(get_current_user),
+    controller: TrackerController = Depends(get_tracker_controller)
+):
+    """
+    Apply several days of buffered (offline) logs in one request.
+    Returns one result per submitted entry, in order.
+    """
+    goal = daily_goal_for(current_user.daily_goal_name, current_user.daily_goal_target)
+    return await controller.sync_logs_batch(str(current_user.id), logs, goal)
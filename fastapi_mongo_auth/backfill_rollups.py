@@ -0,0 +1,33 @@
+import asyncio
+import sys
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.core.config import settings
+from app.database.rollups import rebuild_rollups
+
+# Rebuilds the log_rollups collection from the existing logs.
+# Run once after deploying rollups, or any time they need repairing:
+#   python backfill_rollups.py
+# To repair only some users' rollups, pass their ids:
+#   python backfill_rollups.py <user_id> [<user_id> ...]
+
+async def backfill(user_ids):
+    client = AsyncIOMotorClient(settings.MONGO_URL)
+    db = client[settings.DB_NAME]
+
+    if user_ids:
+        for user_id in user_ids:
+            await rebuild_rollups(db, user_id)
+            print(f"Rebuilt rollups for user {user_id}")
+    else:
+        print(f"Rebuilding log rollups in database: {settings.DB_NAME}")
+        users = await rebuild_rollups(db)
+        print(f"Rebuilt rollups for {users} users")
+
+    client.close()
+
+if __name__ == "__main__":
+    invalid = [arg for arg in sys.argv[1:] if not ObjectId.is_valid(arg)]
+    if invalid:
+        sys.exit(f"Not a user id: {', '.join(invalid)}")
+    asyncio.run(backfill([ObjectId(arg) for arg in sys.argv[1:]]))
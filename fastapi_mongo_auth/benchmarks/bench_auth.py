@@ -0,0 +1,40 @@
+import argparse
+import time
+from app.core import security
+from app.core.config import settings
+from app.core.security import create_access_token, decode_token, token_cache
+
+# Per-request JWT verification cost, before and after the verified-token cache.
+# Needs no database. To run (from fastapi_mongo_auth/):
+#   python -m benchmarks.bench_auth [--iterations 20000]
+
+def _per_call_us(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+def run(iterations: int):
+    token = create_access_token(
+        subject="bench@example.com",
+        extra_claims={"id": "0" * 24, "name": "Bench User", "email": "bench@example.com", "role": "user"},
+    )
+
+    results = {}
+    for backend, factory in security.JWT_DECODERS.items():
+        decode = factory()
+        results[f"{backend} (uncached)"] = _per_call_us(lambda: decode(token), iterations)
+
+    token_cache.clear()
+    decode_token(token)  # Warm the cache
+    results[f"decode_token (cached, {settings.JWT_BACKEND})"] = _per_call_us(lambda: decode_token(token), iterations)
+
+    baseline = results.get("jose (uncached)")
+    for name, us in results.items():
+        speedup = f"{baseline / us:6.1f}x" if baseline else ""
+        print(f"{name:<32} {us:9.2f} us/request {speedup}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JWT verification benchmark")
+    parser.add_argument("--iterations", type=int, default=20000)
+    run(parser.parse_args().iterations)
@@ -0,0 +1,374 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+import httpx
+from app.core.config import settings
+
+# End-to-end endpoint latency, with the app driven in-process through httpx's
+# ASGI transport (no server, no network hop between client and app).
+# Storage is a throwaway local `mongod` started in a temp directory (needs
+# `mongod` on PATH), any MongoDB given with --mongo-url (a uniquely named
+# database is used and dropped afterwards), or --backend memory for the
+# in-process repositories, which leaves only application cost. Needs httpx.
+# To run (from fastapi_mongo_auth/):
+#   python -m benchmarks.bench_endpoints [--backend memory] [--scenarios login,toggle] [--concurrency 20]
+#       [--requests 500] [--history-days 365] [--baseline benchmarks/results/<previous>.json]
+
+SCENARIOS = ("register", "login", "toggle", "sync", "history", "home")
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+PASSWORD = "bench-password"
+
+class Recorder:
+    """Latency samples (seconds) and error counts per endpoint."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    async def request(self, client: httpx.AsyncClient, endpoint: str, method: str, url: str, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.record(endpoint, time.perf_counter() - start, response.status_code < 400)
+        return response
+
+    def record(self, endpoint: str, seconds: float, ok: bool = True):
+        self.samples.setdefault(endpoint, []).append(seconds)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def summary(self, wall_seconds: float) -> dict:
+        return {
+            endpoint: {
+                "count": len(samples),
+                "errors": self.errors.get(endpoint, 0),
+                "throughput_rps": len(samples) / wall_seconds if wall_seconds else 0.0,
+                "mean_ms": sum(samples) / len(samples) * 1000,
+                "p50_ms": percentile(samples, 50) * 1000,
+                "p95_ms": percentile(samples, 95) * 1000,
+                "p99_ms": percentile(samples, 99) * 1000,
+                "max_ms": max(samples) * 1000,
+            }
+            for endpoint, samples in self.samples.items()
+        }
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * pct // 100))  # ceil
+    return ordered[int(rank) - 1]
+
+async def run_concurrently(count: int, concurrency: int, fn):
+    """Call fn(0..count-1) from `concurrency` workers, each starting the next call as soon as it's free."""
+    indexes = iter(range(count))
+
+    async def worker():
+        for index in indexes:
+            await fn(index)
+
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, count))))
+
+def user_payload(run_id: str, index: int) -> dict:
+    return {
+        "first_name": "Bench",
+        "last_name": f"User{index}",
+        "email": f"bench-{run_id}-{index}@example.com",
+        "mobile": f"{index % 10_000_000_000:010d}",
+        "city": "Benchville",
+        "dob": "1990-01-01",
+        "daily_goal_name": "Steps",
+        "daily_goal_target": "8000",
+        "password": PASSWORD,
+    }
+
+class Bench:
+    """
+    One method per scenario: each does its (unmeasured) setup and returns the
+    measured call, which run_scenarios issues `requests` times.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, args: argparse.Namespace):
+        self.client = client
+        self.args = args
+        self.run_id = uuid.uuid4().hex[:8]
+        self.next_user = 0
+        self.users: List[dict] = []  # {"email", "headers", "habit_id"}
+
+    def new_user(self) -> dict:
+        self.next_user += 1
+        return user_payload(self.run_id, self.next_user)
+
+    async def prepare_users(self):
+        """Register, log in and create one habit for `concurrency` users (not measured)."""
+        if self.users:
+            return
+        setup = Recorder()
+
+        async def prepare(_):
+            user = self.new_user()
+            await setup.request(self.client, "setup", "POST", "/auth/register", json=user)
+            login = await setup.request(
+                self.client, "setup", "POST", "/auth/login/json",
+                json={"email": user["email"], "password": PASSWORD},
+            )
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+            habit = await setup.request(self.client, "setup", "POST", "/habits", json={"title": "Bench"}, headers=headers)
+            self.users.append({"email": user["email"], "headers": headers, "habit_id": habit.json()["_id"]})
+
+        await run_concurrently(self.args.concurrency, self.args.concurrency, prepare)
+        if setup.errors:
+            raise SystemExit(f"Setup failed: {setup.errors['setup']} requests returned errors")
+
+    async def register(self, recorder: Recorder):
+        async def call(_):
+            await recorder.request(self.client, "POST /auth/register", "POST", "/auth/register", json=self.new_user())
+
+        return call
+
+    async def login(self, recorder: Recorder):
+        await self.prepare_users()
+
+        async def call(index):
+            user = self.users[index % len(self.users)]
+            await recorder.request(
+                self.client, "POST /auth/login/json", "POST", "/auth/login/json",
+                json={"email": user["email"], "password": PASSWORD},
+            )
+
+        return call
+
+    async def toggle(self, recorder: Recorder):
+        await self.prepare_users()
+
+        async def call(index):
+            user = self.users[index % len(self.users)]
+            await recorder.request(
+                self.client, "POST /habits/{id}/toggle", "POST", f"/habits/{user['habit_id']}/toggle",
+                headers=user["headers"],
+            )
+
+        return call
+
+    async def sync(self, recorder: Recorder):
+        await self.prepare_users()
+        first_day = date.today() - timedelta(days=self.args.requests)
+
+        async def call(index):
+            user = self.users[index % len(self.users)]
+            log = {"date": (first_day + timedelta(days=index)).isoformat(), "steps": index, "waterMl": 250, "proteinG": 20}
+            await recorder.request(self.client, "POST /logs/sync", "POST", "/logs/sync", json=log, headers=user["headers"])
+
+        return call
+
+    async def history(self, recorder: Recorder):
+        await self.prepare_users()
+        days = self.args.history_days
+        end = date.today()
+        start = end - timedelta(days=days - 1)
+
+        # Seed every other day, so the history also exercises gap filling
+        seed = Recorder()
+        logs = [
+            {"date": (start + timedelta(days=offset)).isoformat(), "steps": 5000 + offset, "waterMl": 2000, "proteinG": 80}
+            for offset in range(0, days, 2)
+        ]
+        for user in self.users:
+            for chunk in range(0, len(logs), settings.LOG_SYNC_BATCH_MAX_SIZE):
+                await seed.request(
+                    self.client, "seed", "POST", "/logs/sync/batch",
+                    json=logs[chunk:chunk + settings.LOG_SYNC_BATCH_MAX_SIZE], headers=user["headers"],
+                )
+
+        params = {"startDate": start.isoformat(), "endDate": end.isoformat()}
+
+        async def call(index):
+            user = self.users[index % len(self.users)]
+            await recorder.request(
+                self.client, f"GET /logs/history ({days}d)", "GET", "/logs/history",
+                params=params, headers=user["headers"],
+            )
+
+        return call
+
+    async def home(self, recorder: Recorder):
+        """The home screen: the three separate reads back to back, then GET /dashboard."""
+        await self.prepare_users()
+        urls = ("/user/profile", "/habits", "/logs/today")
+
+        async def call(index):
+            user = self.users[index % len(self.users)]
+            start = time.perf_counter()
+            responses = [await self.client.get(url, headers=user["headers"]) for url in urls]
+            recorder.record(
+                "GET profile + habits + today", time.perf_counter() - start,
+                all(response.status_code < 400 for response in responses),
+            )
+            await recorder.request(self.client, "GET /dashboard", "GET", "/dashboard", headers=user["headers"])
+
+        return call
+
+@contextmanager
+def throwaway_mongod():
+    binary = shutil.which("mongod")
+    if binary is None:
+        raise SystemExit("mongod not found on PATH: install MongoDB or pass --mongo-url")
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    dbpath = tempfile.mkdtemp(prefix="bench-mongod-")
+    process = subprocess.Popen(
+        [binary, "--dbpath", dbpath, "--port", str(port), "--bind_ip", "127.0.0.1"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise SystemExit("mongod failed to start")
+                time.sleep(0.1)
+        yield f"mongodb://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        shutil.rmtree(dbpath, ignore_errors=True)
+
+async def run_scenarios(args: argparse.Namespace) -> dict:
+    from app.main import app
+    from app.database.connection import db
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+                bench = Bench(client, args)
+                for name in args.scenarios:
+                    recorder = Recorder()
+                    call = await getattr(bench, name)(recorder)
+                    start = time.perf_counter()
+                    await run_concurrently(args.requests, args.concurrency, call)
+                    wall = time.perf_counter() - start
+                    results[name] = {"wall_seconds": wall, "endpoints": recorder.summary(wall)}
+                    print_scenario(name, results[name])
+        finally:
+            if db.uses_mongo:
+                await db.client.drop_database(settings.DB_NAME)
+    return results
+
+def print_scenario(name: str, result: dict):
+    for endpoint, stats in result["endpoints"].items():
+        print(
+            f"{name:<9} {endpoint:<30} n={stats['count']:<6} err={stats['errors']:<4} "
+            f"{stats['throughput_rps']:8.1f} req/s  p50 {stats['p50_ms']:7.2f}  "
+            f"p95 {stats['p95_ms']:7.2f}  p99 {stats['p99_ms']:7.2f} ms"
+        )
+
+def compare(baseline: dict, current: dict, threshold_pct: float) -> int:
+    """Print p95/throughput changes against a previous run. Returns the number of regressions."""
+    regressions = 0
+    for name, result in current["scenarios"].items():
+        for endpoint, stats in result["endpoints"].items():
+            before = baseline.get("scenarios", {}).get(name, {}).get("endpoints", {}).get(endpoint)
+            if not before:
+                continue
+            p95_change = (stats["p95_ms"] / before["p95_ms"] - 1) * 100 if before["p95_ms"] else 0.0
+            rps_change = (stats["throughput_rps"] / before["throughput_rps"] - 1) * 100 if before["throughput_rps"] else 0.0
+            regressed = p95_change > threshold_pct or rps_change < -threshold_pct
+            regressions += regressed
+            print(
+                f"{name:<9} {endpoint:<30} p95 {p95_change:+7.1f}%  throughput {rps_change:+7.1f}%"
+                f"{'  REGRESSION' if regressed else ''}"
+            )
+    return regressions
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Endpoint latency and throughput benchmark")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Comma-separated, run in order (default: {','.join(SCENARIOS)})")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent clients (and prepared users)")
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per scenario")
+    parser.add_argument("--history-days", type=int, default=365, help="Range requested by the history scenario")
+    parser.add_argument("--backend", choices=("mongo", "memory"), default="mongo", help="Storage backend")
+    parser.add_argument("--mongo-url", help="Use this MongoDB instead of starting a throwaway mongod")
+    parser.add_argument("--bcrypt-rounds", type=int, help="Override BCRYPT_ROUNDS (register/login cost)")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/endpoints-<timestamp>.json)")
+    parser.add_argument("--baseline", help="Previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent")
+    args = parser.parse_args()
+
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    settings.STORAGE_BACKEND = args.backend
+    settings.DB_NAME = f"bench_{uuid.uuid4().hex[:8]}"
+    settings.HABIT_RESET_ENABLED = False
+    if args.bcrypt_rounds is not None:
+        settings.BCRYPT_ROUNDS = args.bcrypt_rounds
+
+    started = datetime.now()
+    if args.backend == "memory":
+        results = asyncio.run(run_scenarios(args))
+    elif args.mongo_url:
+        settings.MONGO_URL = args.mongo_url
+        results = asyncio.run(run_scenarios(args))
+    else:
+        with throwaway_mongod() as url:
+            settings.MONGO_URL = url
+            results = asyncio.run(run_scenarios(args))
+
+    report = {
+        "timestamp": started.isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "scenarios": args.scenarios,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "history_days": args.history_days,
+            "bcrypt_rounds": args.bcrypt_rounds,
+            "database": "memory" if args.backend == "memory" else "external" if args.mongo_url else "throwaway mongod",
+        },
+        "scenarios": results,
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"endpoints-{started:%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
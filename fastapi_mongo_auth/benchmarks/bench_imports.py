@@ -0,0 +1,119 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+# Cold-start import profile: what `import app.main` costs a fresh serverless
+# instance, from `python -X importtime` in new interpreters. Each module's time
+# is its best over all runs, so one noisy run doesn't skew the profile. The
+# app's own cost is everything `import fastapi` alone doesn't load; its budget
+# is relative to FastAPI's import time, which scales the same way with machine
+# speed and load. The checked-in profile is benchmarks/import_profile.json;
+# regenerate it after changing imports, and tests/test_cold_start.py fails when
+# the budget below is exceeded. Needs no database. To run (from fastapi_mongo_auth/):
+#   python -m benchmarks.bench_imports [--runs 5] [--output benchmarks/import_profile.json]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILE_PATH = os.path.join(os.path.dirname(__file__), "import_profile.json")
+
+# Only imported by the routes (or the MongoDB client) that use them
+DEFERRED_MODULES = ("motor", "pymongo", "passlib", "bcrypt", "jose", "cryptography", "certifi")
+# Import time the app may add on top of FastAPI's own, as a fraction of it
+COLD_START_BUDGET = 0.6
+
+def import_times(module: str) -> Dict[str, Tuple[int, int]]:
+    """module -> (self, cumulative) import time in microseconds, in a fresh serverless-mode interpreter."""
+    env = {**os.environ, "SERVERLESS": "1", "PYTHONPATH": ROOT}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        # import time:  self [us] | cumulative | imported package
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if self_us.strip().isdigit():
+            times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+def best_of(module: str, runs: int) -> Dict[str, Tuple[int, int]]:
+    best: Dict[str, Tuple[int, int]] = {}
+    for _ in range(runs):
+        for name, (self_us, cumulative_us) in import_times(module).items():
+            previous = best.get(name)
+            best[name] = (
+                (min(previous[0], self_us), min(previous[1], cumulative_us)) if previous else (self_us, cumulative_us)
+            )
+    return best
+
+def profile_imports(runs: int = 5) -> dict:
+    baseline = best_of("fastapi", runs)
+    app = best_of("app.main", runs)
+    own = {name: times for name, times in app.items() if name not in baseline}
+    fastapi_us = sum(self_us for self_us, _ in baseline.values())
+    own_us = sum(self_us for self_us, _ in own.values())
+
+    packages: Dict[str, int] = {}
+    for name, (self_us, _) in own.items():
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+
+    return {
+        "python": platform.python_version(),
+        "runs": runs,
+        "total_ms": round(sum(self_us for self_us, _ in app.values()) / 1000, 1),
+        "fastapi_ms": round(fastapi_us / 1000, 1),
+        "app_ms": round(own_us / 1000, 1),
+        "app_ratio": round(own_us / fastapi_us, 3),
+        "budget": COLD_START_BUDGET,
+        "deferred_modules_loaded": sorted({name.split(".")[0] for name in own} & set(DEFERRED_MODULES)),
+        "packages_ms": {
+            package: round(self_us / 1000, 1)
+            for package, self_us in sorted(packages.items(), key=lambda item: -item[1])
+        },
+        "slowest_modules": [
+            {"module": name, "self_ms": round(self_us / 1000, 1), "cumulative_ms": round(cumulative_us / 1000, 1)}
+            for name, (self_us, cumulative_us) in sorted(own.items(), key=lambda item: -item[1][0])[:20]
+        ],
+    }
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=ROOT
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import profile")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per profile")
+    parser.add_argument("--output", default=PROFILE_PATH, help="Profile file (default: benchmarks/import_profile.json)")
+    args = parser.parse_args()
+
+    profile = profile_imports(args.runs)
+    profile = {"created": datetime.now().isoformat(timespec="seconds"), "commit": git_commit(), **profile}
+
+    print(f"import app.main: {profile['total_ms']:.1f} ms (fastapi {profile['fastapi_ms']:.1f} ms, "
+          f"app {profile['app_ms']:.1f} ms = {profile['app_ratio']:.2f}x fastapi, budget {COLD_START_BUDGET:.2f}x)")
+    for package, ms in list(profile["packages_ms"].items())[:10]:
+        print(f"  {package:<30}{ms:>8.1f} ms")
+    if profile["deferred_modules_loaded"]:
+        print(f"Loaded at import, should be deferred: {', '.join(profile['deferred_modules_loaded'])}")
+
+    with open(args.output, "w") as f:
+        json.dump(profile, f, indent=2)
+        f.write("\n")
+    print(f"Profile written to {args.output}")
+
+    if profile["app_ratio"] > COLD_START_BUDGET or profile["deferred_modules_loaded"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+import asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.core.config import settings
+from app.core.streaks import rebuild_streaks
+
+# Recomputes habit and daily-goal streaks from habit_completions and logs.
+# Run once after deploying streaks, or any time they need repairing:
+#   python rebuild_streaks.py
+
+async def rebuild():
+    client = AsyncIOMotorClient(settings.MONGO_URL)
+    db = client[settings.DB_NAME]
+
+    print(f"Rebuilding streaks in database: {settings.DB_NAME}")
+    habits, users = await rebuild_streaks(db)
+    print(f"Rebuilt streaks for {habits} habits and {users} users")
+
+    client.close()
+
+if __name__ == "__main__":
+    asyncio.run(rebuild())
@@ -0,0 +1,55 @@
+import asyncio
+from datetime import datetime
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.deps import get_current_user
+from app.database.connection import get_repositories
+from app.database.memory_repositories import MemoryRepositories
+from app.models.user import UserInDB
+from app.routes import tracker_routes
+
+# Shared fixtures for route tests against the memory backend (no MongoDB needed)
+
+USER_EMAIL = "user@example.com"
+
+@pytest.fixture
+def repos() -> MemoryRepositories:
+    return MemoryRepositories()
+
+@pytest.fixture
+def insert_user(repos):
+    """Async factory: store a user (stored layout, `fields` override the defaults) and return its id."""
+    async def insert(email: str = USER_EMAIL, mobile: str = "0123456789", **fields) -> str:
+        user = {
+            "email": email, "mobile": mobile, "first_name": "Test", "last_name": "User", "city": "X",
+            "dob": "2000-01-01", "daily_goal_name": "Steps", "daily_goal_target": "100", "hashed_password": "x",
+            "level": 1, "currentXp": 0, "maxXp": 1000, "created_at": datetime(2024, 1, 1),
+            **fields,
+        }
+        return str(await repos.users.insert(user))
+    return insert
+
+@pytest.fixture
+def user_fields() -> dict:
+    """Overrides for the `user` fixture's document; override this fixture in a test module to change them."""
+    return {}
+
+@pytest.fixture
+def user(repos, insert_user, user_fields) -> UserInDB:
+    """The authenticated user of `client`, as stored before the test."""
+    asyncio.run(insert_user(**user_fields))
+    return UserInDB(**asyncio.run(repos.users.find_by_email(USER_EMAIL)))
+
+@pytest.fixture
+def client(repos, user) -> TestClient:
+    """Tracker routes on `repos`, authenticated as `user` (reloaded from storage on every request)."""
+    app = FastAPI()
+    app.include_router(tracker_routes.router)
+
+    async def current_user():
+        return UserInDB(**await repos.users.find_by_email(USER_EMAIL))
+
+    app.dependency_overrides[get_repositories] = lambda: repos
+    app.dependency_overrides[get_current_user] = current_user
+    return TestClient(app)
@@ -0,0 +1,41 @@
+import pytest
+
+pytest.importorskip("httpx")
+from benchmarks.bench_endpoints import Recorder, compare, percentile
+
+# Runs without MongoDB. To run: pytest tests/test_bench_endpoints.py
+
+def test_nearest_rank_percentile():
+    samples = [float(value) for value in range(100, 0, -1)]  # 1..100, unsorted
+    assert percentile(samples, 50) == 50
+    assert percentile(samples, 95) == 95
+    assert percentile(samples, 99) == 99
+    assert percentile(samples, 100) == 100
+    assert percentile([0.3], 99) == 0.3
+    assert percentile([1.0, 2.0, 3.0], 50) == 2.0
+
+def test_recorder_summary():
+    recorder = Recorder()
+    for ms in (10, 20, 30, 40):
+        recorder.record("GET /habits", ms / 1000)
+    recorder.record("GET /habits", 0.05, ok=False)
+
+    stats = recorder.summary(wall_seconds=0.5)["GET /habits"]
+    assert (stats["count"], stats["errors"]) == (5, 1)
+    assert stats["throughput_rps"] == pytest.approx(10)
+    assert stats["mean_ms"] == pytest.approx(30)
+    assert stats["p50_ms"] == pytest.approx(30)
+    assert stats["max_ms"] == pytest.approx(50)
+
+def _report(p95_ms: float, throughput_rps: float) -> dict:
+    endpoints = {"POST /logs/sync": {"p95_ms": p95_ms, "throughput_rps": throughput_rps}}
+    return {"scenarios": {"sync": {"endpoints": endpoints}}}
+
+def test_compare_counts_regressions_beyond_the_threshold(capsys):
+    baseline = _report(p95_ms=10, throughput_rps=100)
+    assert compare(baseline, _report(p95_ms=10.5, throughput_rps=95), threshold_pct=10) == 0
+    assert compare(baseline, _report(p95_ms=12, throughput_rps=100), threshold_pct=10) == 1
+    assert compare(baseline, _report(p95_ms=10, throughput_rps=80), threshold_pct=10) == 1
+    assert "REGRESSION" in capsys.readouterr().out
+    # Endpoints missing from the baseline are not compared
+    assert compare({"scenarios": {}}, _report(p95_ms=99, throughput_rps=1), threshold_pct=10) == 0
@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+import pytest
+from benchmarks.bench_imports import COLD_START_BUDGET, profile_imports
+from app.core.config import settings
+from app.core.revocation import RevocationList
+from app.database.connection import Database
+from app.database.memory_repositories import MemoryRepositories
+
+# Runs without MongoDB. To run: pytest tests/test_cold_start.py
+
+def test_app_import_stays_within_cold_start_budget():
+    profile = profile_imports(runs=3)
+    assert profile["deferred_modules_loaded"] == []
+    assert profile["app_ratio"] <= COLD_START_BUDGET, profile["slowest_modules"]
+
+@pytest.mark.asyncio
+async def test_connects_on_first_use_and_reuses_the_connection(monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_BACKEND", "memory")
+    database = Database()
+    repositories = database.ensure_connected()
+    assert database.ready
+    assert database.ensure_connected() is repositories
+
+@pytest.mark.asyncio
+async def test_serverless_revocation_sync_is_throttled(monkeypatch):
+    monkeypatch.setattr(settings, "REVOCATION_SYNC_INTERVAL_SECONDS", 60)
+    tokens = MemoryRepositories().revoked_tokens
+    revocation_list = RevocationList()
+    await revocation_list.sync_if_due(tokens)
+
+    # Revoked by another instance: not seen until the interval has passed
+    await tokens.insert("other", datetime.utcnow() + timedelta(hours=1), datetime.utcnow())
+    await revocation_list.sync_if_due(tokens)
+    assert not revocation_list.is_revoked("other")
+
+    monkeypatch.setattr(settings, "REVOCATION_SYNC_INTERVAL_SECONDS", 0)
+    await revocation_list.sync_if_due(tokens)
+    assert revocation_list.is_revoked("other")
@@ -0,0 +1,28 @@
+from datetime import date
+
+# Runs without MongoDB. To run: pytest tests/test_dashboard.py
+
+def test_dashboard_matches_the_individual_endpoints(client):
+    for title in ("Read", "Run", "Sleep"):
+        client.post("/habits", json={"title": title})
+    client.post("/logs/sync", json={"date": date.today().isoformat(), "steps": 500})
+
+    dashboard = client.get("/dashboard", params={"habits_limit": 2}).json()
+    assert dashboard["profile"] == client.get("/user/profile").json()
+    habits = client.get("/habits", params={"limit": 2})
+    assert dashboard["habits"] == habits.json()
+    assert dashboard["habitsNextCursor"] == habits.headers["X-Next-Cursor"]
+    assert dashboard["today"] == client.get("/logs/today").json()
+
+def test_dashboard_include_and_etag(client):
+
+    response = client.get("/dashboard", params={"include": "today, habits"})
+    assert set(response.json()) == {"habits", "habitsNextCursor", "today"}
+    assert client.get("/dashboard", params={"include": "profile,friends"}).status_code == 400
+
+    etag = response.headers["ETag"]
+    assert client.get("/dashboard", headers={"If-None-Match": etag}).status_code == 304
+    client.post("/habits", json={"title": "Read"})
+    response = client.get("/dashboard", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [habit["title"] for habit in response.json()["habits"]] == ["Read"]
@@ -0,0 +1,57 @@
+import asyncio
+from datetime import date
+from bson import ObjectId
+from app.core.data_version import data_version_cache, etag_matches, make_etag
+from app.core.deps import get_current_user
+
+# Runs without MongoDB. To run: pytest tests/test_data_version.py
+
+def test_etag_matching():
+    etag = make_etag("abc", 3)
+    assert etag == f'W/"abc.3.{date.today().isoformat()}"'
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", {etag.removeprefix("W/")}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches(make_etag("abc", 4), etag)
+
+def test_read_routes_answer_304_until_a_write(client):
+
+    for path in ("/habits", "/logs/today", "/user/profile"):
+        response = client.get(path)
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        response = client.get(path, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+    habits_etag = client.get("/habits").headers["ETag"]
+    habit = client.post("/habits", json={"title": "Read"}).json()
+    assert client.get("/habits", headers={"If-None-Match": habits_etag}).status_code == 200
+
+    # Completing a habit awards XP: the profile changes too
+    profile_etag = client.get("/user/profile").headers["ETag"]
+    client.post(f"/habits/{habit['_id']}/toggle")
+    response = client.get("/user/profile", headers={"If-None-Match": profile_etag})
+    assert response.status_code == 200
+    assert response.json()["currentXp"] == 10
+
+    today_etag = client.get("/logs/today").headers["ETag"]
+    client.post("/logs/sync", json={"date": date.today().isoformat(), "steps": 500})
+    response = client.get("/logs/today", headers={"If-None-Match": today_etag})
+    assert response.status_code == 200
+    assert response.json()["steps"] == 500
+
+def test_profile_etag_never_runs_ahead_of_a_stale_principal(repos, user, client):
+    # The principal was cached before another worker awarded XP
+    stale = user
+    client.app.dependency_overrides[get_current_user] = lambda: stale
+    etag = client.get("/user/profile").headers["ETag"]
+
+    asyncio.run(repos.users.award_xp(ObjectId(stale.id), 10))
+    data_version_cache.pop(str(stale.id))  # This worker's cached version has expired
+    response = client.get("/user/profile", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["currentXp"] == 10
+    assert response.headers["ETag"] == make_etag(str(stale.id), 1)
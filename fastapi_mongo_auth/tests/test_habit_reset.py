@@ -0,0 +1,69 @@
+from datetime import date, datetime, timedelta
+import pytest
+from bson import ObjectId
+from app.core.config import settings
+from app.jobs.habit_reset import HabitResetJob
+
+# Runs without MongoDB. To run: pytest tests/test_habit_reset.py
+
+YESTERDAY = (date.today() - timedelta(days=1)).isoformat()
+
+@pytest.fixture
+def db(monkeypatch):
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    monkeypatch.setattr(settings, "HABIT_RESET_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "HABIT_RESET_PAUSE_SECONDS", 0)
+    return mongomock_motor.AsyncMongoMockClient()["test"]
+
+def _job(db) -> HabitResetJob:
+    job = HabitResetJob(db)
+    completions = job.completions_collection
+
+    async def bulk_write(operations, ordered=True):
+        # mongomock's bulk_write does not support this pymongo's UpdateOne: apply them one by one
+        for operation in operations:
+            await completions.update_one(operation._filter, operation._doc, upsert=operation._upsert)
+
+    completions.bulk_write = bulk_write
+    return job
+
+async def _insert_completed_habits(db, count: int):
+    user_id = ObjectId()
+    await db.users.insert_one({"_id": user_id})
+    await db.habits.insert_many([
+        {"userId": user_id, "isCompleted": True, "lastCompletedDate": YESTERDAY} for _ in range(count)
+    ])
+
+@pytest.mark.asyncio
+async def test_reset_archives_and_clears_completed_habits(db):
+    await _insert_completed_habits(db, 5)
+    job = _job(db)
+
+    assert await job.run_pending()
+    assert await db.habits.count_documents({"isCompleted": True}) == 0
+    assert await db.habit_completions.count_documents({"date": YESTERDAY}) == 5
+    state = await db.job_state.find_one({"_id": HabitResetJob.STATE_ID})
+    assert (state["day"], state["status"]) == (YESTERDAY, "done")
+    assert "leaseOwner" not in state
+
+@pytest.mark.asyncio
+async def test_run_stops_when_its_lease_is_taken_over(db):
+    await _insert_completed_habits(db, 5)
+    job = _job(db)
+    reset_chunk = job._reset_chunk
+
+    async def reset_chunk_then_lose_lease(day, last_id):
+        # This worker stalled past its lease and another one took over
+        await db.job_state.update_one(
+            {"_id": HabitResetJob.STATE_ID},
+            {"$set": {"leaseOwner": "other:1", "leaseUntil": datetime.utcnow() + HabitResetJob.LEASE}}
+        )
+        return await reset_chunk(day, last_id)
+
+    job._reset_chunk = reset_chunk_then_lose_lease
+    assert not await job.run_pending()
+
+    # Only the first chunk ran, and the new owner's lease and progress were left alone
+    assert await db.habits.count_documents({"isCompleted": True}) == 3
+    state = await db.job_state.find_one({"_id": HabitResetJob.STATE_ID})
+    assert (state["leaseOwner"], state["status"], state["lastId"]) == ("other:1", "running", None)
@@ -0,0 +1,27 @@
+import pytest
+from app.core.config import settings
+
+# Runs without MongoDB. To run: pytest tests/test_habits_bulk.py
+
+@pytest.fixture
+def user_fields():
+    return {"currentXp": 995}
+
+def test_bulk_create_then_toggle_awards_xp_once(client):
+    response = client.post("/habits/bulk", json=[{"title": "Read"}, {"title": "Walk"}, {"title": "Stretch"}])
+    assert response.status_code == 200
+    habits = response.json()
+    assert [habit["title"] for habit in habits] == ["Read", "Walk", "Stretch"]
+
+    ids = [habit["_id"] for habit in habits]
+    response = client.post("/habits/toggle", json=[ids[0], ids[1], ids[0], "0" * 24])
+    assert response.status_code == 200
+    assert [habit["_id"] for habit in response.json()] == ids[:2]
+
+    # 995 + 2 * 10 XP: one level-up, computed from the aggregated award
+    user = client.get("/user/profile").json()
+    assert (user["level"], user["currentXp"]) == (2, 15)
+
+    assert client.post("/habits/toggle", json=["not-an-id"]).status_code == 400
+    too_many = [{"title": "x"}] * (settings.HABITS_BULK_MAX_SIZE + 1)
+    assert client.post("/habits/bulk", json=too_many).status_code == 422
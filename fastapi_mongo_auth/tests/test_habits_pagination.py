@@ -0,0 +1,33 @@
+from app.routes.tracker_routes import NEXT_CURSOR_HEADER
+
+# Runs without MongoDB. To run: pytest tests/test_habits_pagination.py
+
+def test_habits_are_paged_with_the_next_cursor_header(client):
+    titles = [f"Habit {index}" for index in range(5)]
+    assert client.post("/habits/bulk", json=[{"title": title} for title in titles]).status_code == 200
+
+    pages, after = [], None
+    while True:
+        params = {"limit": 2, **({"after": after} if after else {})}
+        response = client.get("/habits", params=params)
+        assert response.status_code == 200
+        pages.append([habit["title"] for habit in response.json()])
+        after = response.headers.get(NEXT_CURSOR_HEADER)
+        if after is None:
+            break
+    # Creation order, no habit repeated or skipped, and no cursor on the last page
+    assert pages == [titles[0:2], titles[2:4], titles[4:]]
+
+    # An exactly full last page has no cursor either, so clients never fetch an empty page
+    response = client.get("/habits", params={"limit": 5})
+    assert len(response.json()) == 5 and NEXT_CURSOR_HEADER not in response.headers
+
+def test_habits_field_projection_and_bad_requests(client):
+    client.post("/habits/bulk", json=[{"title": "Read"}])
+    response = client.get("/habits", params={"fields": "title, isCompleted"})
+    assert response.status_code == 200
+    habit, = response.json()
+    assert set(habit) == {"_id", "title", "isCompleted"}
+
+    assert client.get("/habits", params={"fields": "title,password"}).status_code == 400
+    assert client.get("/habits", params={"after": "not-a-cursor"}).status_code == 400
@@ -0,0 +1,51 @@
+import time
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.controllers import leaderboard_controller
+from app.core.config import settings
+from app.core.deps import get_current_user
+from app.database.connection import get_repositories
+from app.models.user import UserInDB
+from app.routes import leaderboard_routes
+
+# Runs without MongoDB. To run: pytest tests/test_leaderboard.py
+
+@pytest.fixture
+def leaderboard_client(repos, user) -> TestClient:
+    leaderboard_controller._top_cache.clear()
+    app = FastAPI()
+    app.include_router(leaderboard_routes.router)
+
+    async def current_user():
+        return UserInDB(**await repos.users.find_by_email(user.email))
+
+    app.dependency_overrides[get_repositories] = lambda: repos
+    app.dependency_overrides[get_current_user] = current_user
+    yield TestClient(app)
+    leaderboard_controller._top_cache.clear()
+
+def _ranking(response) -> list:
+    assert response.status_code == 200
+    return [(entry["rank"], entry["name"], entry["level"]) for entry in response.json()]
+
+@pytest.mark.asyncio
+async def test_top_is_cached_until_the_refresh_interval(leaderboard_client, repos, insert_user, user, monkeypatch):
+    await insert_user("ada@example.com", "0123456781", first_name="Ada", last_name="Lovelace", level=3)
+    await insert_user("alan@example.com", "0123456782", first_name="Alan", last_name="", level=2)
+
+    expected = [(1, "Ada L.", 3), (2, "Alan", 2), (3, "Test U.", 1)]
+    assert _ranking(leaderboard_client.get("/leaderboard")) == expected
+    assert _ranking(leaderboard_client.get("/leaderboard", params={"limit": 2})) == expected[:2]
+    assert leaderboard_client.get("/leaderboard", params={"limit": settings.LEADERBOARD_CACHE_SIZE + 1}).status_code == 422
+
+    # 5000 XP takes the user to level 4; the cached top list does not see it yet, their own rank does
+    await repos.users.award_xp_many({ObjectId(user.id): 5000})
+    assert _ranking(leaderboard_client.get("/leaderboard")) == expected
+    me = leaderboard_client.get("/leaderboard/me").json()
+    assert (me["rank"], me["level"]) == (1, 4)
+
+    later = time.monotonic() + settings.LEADERBOARD_REFRESH_SECONDS + 1
+    monkeypatch.setattr("app.core.cache.time.monotonic", lambda: later)
+    assert _ranking(leaderboard_client.get("/leaderboard")) == [(1, "Test U.", 4), (2, "Ada L.", 3), (3, "Alan", 2)]
@@ -0,0 +1,64 @@
+import json
+import logging
+import queue
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.logging_config import (
+    REDACTED,
+    JsonFormatter,
+    NonBlockingQueueHandler,
+    RequestIdFilter,
+    RequestIdMiddleware,
+    redact,
+    request_id_var,
+)
+
+# Runs without MongoDB. To run: pytest tests/test_logging_config.py
+
+def _record(msg: str, *args, **extra) -> logging.LogRecord:
+    record = logging.LogRecord("app.test", logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+def test_redact_masks_sensitive_keys_at_any_depth():
+    user = {"email": "a@b.co", "hashed_password": "$2b$...", "tokens": [{"refresh_token": "x", "jti": "1"}]}
+    assert redact(user) == {"email": "a@b.co", "hashed_password": REDACTED, "tokens": [{"refresh_token": REDACTED, "jti": "1"}]}
+
+def test_json_formatter_includes_request_id_and_redacted_extras():
+    token = request_id_var.set("req-1")
+    try:
+        record = _record("Signed in %s", "a@b.co", user={"_id": ObjectId("0" * 24), "password": "secret"}, token="abc")
+        RequestIdFilter().filter(record)
+    finally:
+        request_id_var.reset(token)
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "Signed in a@b.co"
+    assert entry["request_id"] == "req-1"
+    assert entry["user"] == {"_id": "0" * 24, "password": REDACTED}
+    assert entry["token"] == REDACTED
+
+def test_queue_handler_drops_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(_record("first"))
+    handler.handle(_record("second"))
+    assert handler.dropped == 1
+    assert handler.queue.get_nowait().msg == "first"
+
+def test_request_id_middleware_echoes_or_generates_ids():
+    app = FastAPI()
+    app.add_middleware(RequestIdMiddleware)
+
+    @app.get("/")
+    async def root():
+        return {"request_id": request_id_var.get()}
+
+    client = TestClient(app)
+    response = client.get("/", headers={"X-Request-ID": "abc"})
+    assert response.json() == {"request_id": "abc"}
+    assert response.headers["X-Request-ID"] == "abc"
+
+    response = client.get("/")
+    assert response.headers["X-Request-ID"] == response.json()["request_id"]
+    assert len(response.json()["request_id"]) == 32
@@ -0,0 +1,75 @@
+import asyncio
+import json
+from datetime import date, timedelta
+from app.core.config import settings
+from app.core.streaming import NDJSON_MEDIA_TYPE, stream_json_array
+
+# Runs without MongoDB. To run: pytest tests/test_logs_history_routes.py
+# (tests/test_logs_history.py is the end-to-end check against a running server)
+
+START = date(2024, 3, 1)
+
+def _range(days: int) -> dict:
+    return {"startDate": START.isoformat(), "endDate": (START + timedelta(days=days - 1)).isoformat()}
+
+def _sync(client, offset: int, steps: int):
+    day = (START + timedelta(days=offset)).isoformat()
+    assert client.post("/logs/sync", json={"date": day, "steps": steps, "waterMl": 250}).status_code == 200
+
+def test_history_zero_fills_missing_days(client):
+    _sync(client, 1, 100)
+    _sync(client, 3, 300)
+    _sync(client, 9, 900)  # Outside the range
+
+    response = client.get("/logs/history", params=_range(5))
+    assert response.status_code == 200
+    assert response.headers["content-length"]  # Short ranges are not streamed
+    assert [(row["date"], row["steps"], row["waterMl"]) for row in response.json()] == [
+        ("2024-03-01", 0, 0),
+        ("2024-03-02", 100, 250),
+        ("2024-03-03", 0, 0),
+        ("2024-03-04", 300, 250),
+        ("2024-03-05", 0, 0),
+    ]
+
+def test_history_rejects_bad_ranges(client, monkeypatch):
+    inverted = {"startDate": "2024-03-05", "endDate": "2024-03-01"}
+    assert client.get("/logs/history", params=inverted).status_code == 400
+    assert client.get("/logs/history", params={"startDate": "2024-3-1", "endDate": "2024-03-05"}).status_code == 400
+
+    monkeypatch.setattr(settings, "LOG_HISTORY_MAX_DAYS", 30)
+    assert client.get("/logs/history", params=_range(30)).status_code == 200
+    response = client.get("/logs/history", params=_range(31))
+    assert response.status_code == 400
+    assert "30 days" in response.json()["detail"]
+
+def test_long_history_is_streamed_as_a_json_array(client, monkeypatch):
+    _sync(client, 2, 200)
+    expected = client.get("/logs/history", params=_range(10)).json()
+
+    monkeypatch.setattr(settings, "LOG_HISTORY_STREAM_THRESHOLD_DAYS", 5)
+    response = client.get("/logs/history", params=_range(10))
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert "content-length" not in response.headers  # Chunked
+    assert response.json() == expected
+
+def test_history_as_ndjson(client):
+    _sync(client, 0, 100)
+    response = client.get("/logs/history", params=_range(3), headers={"Accept": NDJSON_MEDIA_TYPE})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == NDJSON_MEDIA_TYPE
+    lines = response.text.splitlines()
+    assert [json.loads(line)["steps"] for line in lines] == [100, 0, 0]
+
+def test_json_array_chunks_join_into_valid_json():
+    async def rows(count):
+        for index in range(count):
+            yield {"n": index}
+
+    async def encode(count, chunk_size):
+        return b"".join([chunk async for chunk in stream_json_array(rows(count), chunk_size)])
+
+    for count in (0, 1, 2, 3, 4, 7):
+        body = asyncio.run(encode(count, chunk_size=2))
+        assert json.loads(body) == [{"n": index} for index in range(count)]
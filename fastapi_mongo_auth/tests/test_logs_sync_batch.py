@@ -0,0 +1,98 @@
+import asyncio
+import pytest
+from bson import ObjectId
+from app.core.config import settings
+
+# Runs without MongoDB. To run: pytest tests/test_logs_sync_batch.py
+
+def test_batch_reports_a_status_per_entry(client, repos, monkeypatch):
+    assert client.post("/logs/sync", json={"date": "2024-03-02", "steps": 1}).status_code == 200
+
+    upsert_many = repos.logs.upsert_many
+
+    async def failing_upsert_many(user_id, logs):
+        # The entry for 2024-03-04 fails, as one write in an unordered bulk_write can
+        failing = {index for index, log in enumerate(logs) if log["date"] == "2024-03-04"}
+        applied = [index for index in range(len(logs)) if index not in failing]
+        previous, _ = await upsert_many(user_id, [logs[index] for index in applied])
+        return {applied[index]: log for index, log in previous.items()}, {index: "write failed" for index in failing}
+
+    monkeypatch.setattr(repos.logs, "upsert_many", failing_upsert_many)
+    response = client.post("/logs/sync/batch", json=[
+        {"date": "2024-03-01", "steps": 10},
+        {"date": "2024-03-02", "steps": 20},
+        {"date": "2024-03-01", "steps": 30},
+        {"date": "2024-03-04", "steps": 40},
+    ])
+    assert response.status_code == 200
+    assert response.json() == [
+        {"date": "2024-03-01", "status": "superseded", "error": None},
+        {"date": "2024-03-02", "status": "updated", "error": None},
+        {"date": "2024-03-01", "status": "inserted", "error": None},
+        {"date": "2024-03-04", "status": "failed", "error": "write failed"},
+    ]
+
+    history = client.get("/logs/history", params={"startDate": "2024-03-01", "endDate": "2024-03-04"}).json()
+    assert [row["steps"] for row in history] == [30, 20, 0, 0]  # The last entry for a date wins
+
+def test_batch_size_is_capped(client, monkeypatch):
+    monkeypatch.setattr(settings, "LOG_SYNC_BATCH_MAX_SIZE", 3)
+    logs = [{"date": f"2024-03-0{day}", "steps": day} for day in range(1, 5)]
+    assert client.post("/logs/sync/batch", json=logs[:3]).status_code == 200
+    response = client.post("/logs/sync/batch", json=logs)
+    assert response.status_code == 400
+    assert "3 entries" in response.json()["detail"]
+    assert client.post("/logs/sync/batch", json=[]).json() == []
+
+def test_non_iso_dates_are_stored_without_touching_the_goal_streak(client, repos, user):
+    # The user's goal is 100 steps: each of these logs meets it
+    response = client.post("/logs/sync", json={"date": "2024-1-5", "steps": 500})
+    assert response.status_code == 200
+    assert response.json()["date"] == "2024-1-5"
+
+    response = client.post("/logs/sync/batch", json=[
+        {"date": "bad", "steps": 500},
+        {"date": "2024-03-01", "steps": 500},
+    ])
+    assert response.status_code == 200
+    assert [result["status"] for result in response.json()] == ["inserted", "inserted"]
+
+    stored = asyncio.run(repos.users.find_by_email(user.email))
+    assert (stored["currentStreak"], stored["lastCompletedDate"]) == (1, "2024-03-01")
+
+@pytest.mark.asyncio
+async def test_mongo_batch_returns_the_versions_concurrent_writes_left():
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    from pymongo.errors import BulkWriteError, DuplicateKeyError
+    from app.database.mongo_repositories import DUPLICATE_KEY_ERROR, MongoLogRepository
+
+    logs = MongoLogRepository(mongomock_motor.AsyncMongoMockClient()["test"])
+    await logs.collection.create_index([("userId", 1), ("date", 1)], unique=True)
+    user_id = ObjectId()
+    for day, steps in (("2024-03-01", 100), ("2024-03-02", 200)):
+        await logs.upsert(user_id, day, {"userId": user_id, "date": day, "steps": steps})
+
+    async def bulk_write(operations, ordered=True):
+        # Single-day syncs land after the batch read its previous versions
+        await logs.upsert(user_id, "2024-03-01", {"userId": user_id, "date": "2024-03-01", "steps": 150})
+        await logs.upsert(user_id, "2024-03-03", {"userId": user_id, "date": "2024-03-03", "steps": 5})
+        # Unordered bulk write semantics: apply what succeeds, then report the failures by index
+        write_errors = []
+        for index, operation in enumerate(operations):
+            try:
+                await logs.collection.update_one(operation._filter, operation._doc, upsert=operation._upsert)
+            except DuplicateKeyError as e:
+                write_errors.append({"index": index, "code": DUPLICATE_KEY_ERROR, "errmsg": str(e)})
+        if write_errors:
+            raise BulkWriteError({"writeErrors": write_errors})
+
+    logs.collection.bulk_write = bulk_write
+    previous, errors = await logs.upsert_many(user_id, [
+        {"userId": user_id, "date": day, "steps": steps}
+        for day, steps in (("2024-03-01", 10), ("2024-03-02", 20), ("2024-03-03", 30))
+    ])
+    assert errors == {}
+    # Each entry reports the version it replaced, including the concurrent writes
+    assert {index: log and log["steps"] for index, log in previous.items()} == {0: 150, 1: 200, 2: 5}
+    stored = await logs.collection.find({"userId": user_id}).sort("date", 1).to_list(length=None)
+    assert [(log["date"], log["steps"]) for log in stored] == [("2024-03-01", 10), ("2024-03-02", 20), ("2024-03-03", 30)]
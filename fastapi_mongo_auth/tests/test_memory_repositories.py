@@ -0,0 +1,117 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from bson import ObjectId
+from app.database.memory_repositories import MemoryRepositories
+from app.database.repositories import DuplicateKeyError
+
+# Runs without MongoDB. To run: pytest tests/test_memory_repositories.py
+
+def _user(index: int, **fields) -> dict:
+    return {"email": f"user{index}@example.com", "mobile": f"{index:010d}", "level": 1, "currentXp": 0, "maxXp": 1000, **fields}
+
+@pytest.mark.asyncio
+async def test_users_unique_fields_and_ranking():
+    users = MemoryRepositories().users
+    first = await users.insert(_user(1, first_name="A"))
+    second = await users.insert(_user(2, first_name="B"))
+    with pytest.raises(DuplicateKeyError) as excinfo:
+        await users.insert(_user(3, email="user1@example.com"))
+    assert excinfo.value.field == "email"
+    with pytest.raises(DuplicateKeyError) as excinfo:
+        await users.insert(_user(3, mobile="0000000002"))
+    assert excinfo.value.field == "mobile"
+
+    # 1200 XP: one level-up (1000), 200 carried over, maxXp raised by 20%
+    updated = await users.award_xp(second, 1200)
+    assert (updated["level"], updated["currentXp"], updated["maxXp"]) == (2, 200, 1200)
+
+    assert [user["_id"] for user in await users.top_by_level(10)] == [second, first]
+    assert await users.count_ranked_ahead(1, 0, first) == 1
+    assert await users.count_ranked_ahead(2, 200, second) == 0
+
+@pytest.mark.asyncio
+async def test_password_hash_is_only_replaced_if_unchanged():
+    users = MemoryRepositories().users
+    user_id = await users.insert(_user(1, hashed_password="old"))
+    assert await users.replace_password_hash(user_id, "old", "new")
+    assert not await users.replace_password_hash(user_id, "old", "newer")
+    assert (await users.find_by_email("user1@example.com"))["hashed_password"] == "new"
+
+@pytest.mark.asyncio
+async def test_habit_pages_and_toggle_streaks():
+    habits = MemoryRepositories().habits
+    user_id = ObjectId()
+    created = [await habits.insert({"userId": user_id, "title": f"Habit {i}", "isCompleted": False}) for i in range(5)]
+
+    page = await habits.find_page(user_id, 2, after=created[1]["_id"], fields=["title"])
+    assert page == [{"_id": created[2]["_id"], "title": "Habit 2"}, {"_id": created[3]["_id"], "title": "Habit 3"}]
+    assert await habits.toggle(ObjectId(), created[0]["_id"], "2024-01-01") is None  # Someone else's habit
+
+    habit_id = created[0]["_id"]
+    await habits.toggle(user_id, habit_id, "2024-01-01")
+    await habits.toggle(user_id, habit_id, "2024-01-01")  # Reset by the daily job in production
+    habit = await habits.toggle(user_id, habit_id, "2024-01-01")
+    assert (habit["currentStreak"], habit["lastCompletedDate"]) == (1, "2024-01-01")
+
+    habit["isCompleted"] = False  # Returned documents are copies
+    habit = await habits.toggle(user_id, habit_id, "2024-01-02")  # Still completed: this undoes nothing
+    assert habit["isCompleted"] is False and habit["lastCompletedDate"] == "2024-01-01"
+    habit = await habits.toggle(user_id, habit_id, "2024-01-02")
+    assert (habit["currentStreak"], habit["longestStreak"], habit["lastCompletedDate"]) == (2, 2, "2024-01-02")
+    habit = await habits.toggle(user_id, habit_id, "2024-01-02")  # Undo restores the previous streak
+    assert (habit["currentStreak"], habit["longestStreak"], habit["lastCompletedDate"]) == (1, 1, "2024-01-01")
+
+@pytest.mark.asyncio
+async def test_logs_upserts_ranges_and_rollups():
+    logs = MemoryRepositories().logs
+    user_id = ObjectId()
+    previous, saved = await logs.upsert(user_id, "2024-01-02", {"date": "2024-01-02", "steps": 100})
+    assert previous is None and saved["steps"] == 100
+    previous, saved = await logs.upsert(user_id, "2024-01-02", {"date": "2024-01-02", "steps": 150})
+    assert previous["steps"] == 100 and saved["_id"] == previous["_id"]
+
+    previous, errors = await logs.upsert_many(user_id, [
+        {"date": "2024-01-01", "steps": 10},
+        {"date": "2024-01-02", "steps": 20},
+        {"date": "2024-02-01", "steps": 30},
+    ])
+    assert (previous[0], previous[1]["steps"], previous[2], errors) == (None, 150, None, {})
+
+    rows = [row async for row in logs.iter_range(user_id, "2024-01-01", "2024-01-31")]
+    assert [(row["date"], row["steps"]) for row in rows] == [("2024-01-01", 10), ("2024-01-02", 20)]
+    assert set(await logs.find_days(user_id, ["2024-01-01", "2024-03-01"])) == {"2024-01-01"}
+
+    await logs.increment_rollups(user_id, [("2024-01-01", {"steps": 10, "days": 1}), ("2024-02-01", {"steps": 30, "days": 1})])
+    months = await logs.find_rollups(user_id, "month", start="2024-01-15")
+    assert [(rollup["periodStart"], rollup["steps"]) for rollup in months] == [("2024-02-01", 30)]
+
+@pytest.mark.asyncio
+async def test_revoked_tokens():
+    tokens = MemoryRepositories().revoked_tokens
+    now = datetime.utcnow()
+    assert await tokens.insert("a", now + timedelta(hours=1), now)
+    assert not await tokens.insert("a", now + timedelta(hours=1), now)
+    await tokens.insert("expired", now - timedelta(seconds=1), now)
+    assert [doc["_id"] async for doc in tokens.revoked_since(now - timedelta(minutes=1))] == ["a"]
+
+@pytest.mark.asyncio
+async def test_concurrent_xp_awards_are_not_lost():
+    users = MemoryRepositories().users
+    user_id = await users.insert(_user(1))
+    await asyncio.gather(*[asyncio.to_thread(asyncio.run, users.award_xp(user_id, 10)) for _ in range(50)])
+    user = await users.find_by_email("user1@example.com")
+    assert user["currentXp"] == 500
+
+@pytest.mark.asyncio
+async def test_habits_bulk_insert_and_toggle():
+    habits = MemoryRepositories().habits
+    user_id = ObjectId()
+    created = await habits.insert_many([{"userId": user_id, "title": f"Habit {i}", "isCompleted": False} for i in range(3)])
+    other = await habits.insert({"userId": ObjectId(), "title": "Not mine", "isCompleted": False})
+
+    ids = [created[2]["_id"], other["_id"], created[0]["_id"]]
+    toggled = await habits.toggle_many(user_id, ids, "2024-01-01")
+    assert [habit["_id"] for habit in toggled] == [created[2]["_id"], created[0]["_id"]]
+    assert all(habit["isCompleted"] and habit["currentStreak"] == 1 for habit in toggled)
+    assert [habit["isCompleted"] for habit in await habits.find_page(user_id, 10)] == [True, False, True]
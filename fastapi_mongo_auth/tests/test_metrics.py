@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.metrics import Counter, Histogram, MetricsMiddleware, MetricsRegistry, metrics
+from app.database.monitoring import CommandMetricsListener
+
+# Runs without MongoDB. To run: pytest tests/test_metrics.py
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, "/a")
+    assert histogram.render() == [
+        'latency_seconds_bucket{route="/a",le="0.1"} 2',
+        'latency_seconds_bucket{route="/a",le="1.0"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a"} 2.65',
+        'latency_seconds_count{route="/a"} 4',
+    ]
+
+def test_registry_renders_metrics_and_collectors():
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("jobs_total", "Jobs.", ("kind",)))
+    counter.inc('say "hi"')
+    registry.add_collector("pool", lambda: {"open": 3, "created": 7, "mode": "process"}, counters=("created",))
+    assert registry.render().splitlines() == [
+        "# HELP jobs_total Jobs.",
+        "# TYPE jobs_total counter",
+        'jobs_total{kind="say \\"hi\\""} 1',
+        "# TYPE pool_open gauge",
+        "pool_open 3",
+        "# TYPE pool_created_total counter",
+        "pool_created_total 7",
+    ]
+
+def test_middleware_labels_by_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        return {"id": item_id}
+
+    client = TestClient(app)
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/missing")
+
+    rendered = metrics.render()
+    assert 'http_requests_total{method="GET",route="/items/{item_id}",status="200"} 2' in rendered
+    assert 'http_requests_total{method="GET",route="<unmatched>",status="404"} 1' in rendered
+    assert 'http_requests_in_flight{method="GET"} 0' in rendered
+
+def test_command_listener_records_collection_and_command():
+    listener = CommandMetricsListener()
+    listener.started(SimpleNamespace(
+        command_name="find", command={"find": "test_metrics_habits"}, connection_id=("h", 1), request_id=7
+    ))
+    listener.succeeded(SimpleNamespace(command_name="find", connection_id=("h", 1), request_id=7, duration_micros=1500))
+    rendered = metrics.render()
+    assert 'mongodb_commands_total{collection="test_metrics_habits",command="find",outcome="success"} 1' in rendered
+    assert 'mongodb_command_duration_seconds_bucket{collection="test_metrics_habits",command="find",le="0.0025"} 1' in rendered
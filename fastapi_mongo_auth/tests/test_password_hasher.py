@@ -0,0 +1,33 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.core.password_hasher import PasswordHasher
+
+# Runs without MongoDB. To run: pytest tests/test_password_hasher.py
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_off_loop():
+    hasher = PasswordHasher(executor_type="thread", max_workers=2, max_queue=2)
+    try:
+        hashed = await hasher.hash("testpassword")
+        assert await hasher.verify("testpassword", hashed)
+        assert not await hasher.verify("wrongpassword", hashed)
+        assert hasher.stats()["completed"] == 3
+        assert hasher.stats()["pending"] == 0
+    finally:
+        hasher.shutdown()
+
+@pytest.mark.asyncio
+async def test_rejects_when_queue_is_full():
+    hasher = PasswordHasher(executor_type="thread", max_workers=1, max_queue=1)
+    try:
+        results = await asyncio.gather(
+            *[hasher.hash("testpassword") for _ in range(4)],
+            return_exceptions=True,
+        )
+        rejected = [r for r in results if isinstance(r, HTTPException)]
+        assert len(rejected) == 2
+        assert all(r.status_code == 503 for r in rejected)
+        assert hasher.stats()["rejected"] == 2
+    finally:
+        hasher.shutdown()
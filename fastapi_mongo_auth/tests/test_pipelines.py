@@ -0,0 +1,183 @@
+import copy
+import pytest
+from app.core.data_version import DATA_VERSION_BUMP_STAGE, bump_data_version
+from app.core.gamification import apply_xp, xp_award_pipeline
+from app.core.streaks import apply_streak_update, streak_update_stages
+
+# Runs without MongoDB. To run: pytest tests/test_pipelines.py
+#
+# The MongoDB backend applies XP awards and streak updates as update
+# pipelines; the memory backend uses the Python equivalents. These tests run
+# both on the same documents and require identical results. Pipelines are evaluated by the
+# small interpreter below, which implements the operators they use with
+# MongoDB's semantics (missing fields, null handling, BSON comparison order).
+# mongomock is not used: it evaluates some of them differently (e.g. $gt
+# against a missing field, $not).
+
+MISSING = object()  # A missing field, or $$REMOVE
+
+def _get(doc, path: str):
+    value = doc
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return MISSING
+        value = value[key]
+    return value
+
+def _nullish(value) -> bool:
+    return value is None or value is MISSING
+
+def _truthy(value) -> bool:
+    return not (_nullish(value) or value is False or (isinstance(value, (int, float)) and value == 0))
+
+def _order(value):
+    # BSON comparison order: null/missing < numbers < strings < objects < booleans
+    if _nullish(value):
+        return (0,)
+    if isinstance(value, bool):
+        return (4, value)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    return (3, sorted(value.items()))
+
+def _arithmetic(fn):
+    def op(args, doc):
+        values = [evaluate(arg, doc) for arg in args]
+        return None if any(_nullish(value) for value in values) else fn(*values)
+    return op
+
+def _if_null(args, doc):
+    for arg in args[:-1]:
+        value = evaluate(arg, doc)
+        if not _nullish(value):
+            return value
+    return evaluate(args[-1], doc)
+
+def _switch(args, doc):
+    for branch in args["branches"]:
+        if _truthy(evaluate(branch["case"], doc)):
+            return evaluate(branch["then"], doc)
+    return evaluate(args["default"], doc)
+
+def _max(args, doc):
+    values = [value for value in (evaluate(arg, doc) for arg in args) if not _nullish(value)]
+    return max(values, key=_order) if values else None
+
+def _compare(fn):
+    return lambda args, doc: fn(_order(evaluate(args[0], doc)), _order(evaluate(args[1], doc)))
+
+OPERATORS = {
+    "$add": _arithmetic(lambda *values: sum(values)),
+    "$subtract": _arithmetic(lambda a, b: a - b),
+    "$multiply": _arithmetic(lambda a, b: a * b),
+    "$toInt": lambda arg, doc: None if _nullish(value := evaluate(arg, doc)) else int(value),
+    "$ifNull": _if_null,
+    "$cond": lambda args, doc: evaluate(args[1] if _truthy(evaluate(args[0], doc)) else args[2], doc),
+    "$switch": _switch,
+    "$and": lambda args, doc: all(_truthy(evaluate(arg, doc)) for arg in args),
+    "$not": lambda args, doc: not _truthy(evaluate(args[0], doc)),
+    "$max": _max,
+    "$eq": _compare(lambda a, b: a == b),
+    "$gt": _compare(lambda a, b: a > b),
+    "$gte": _compare(lambda a, b: a >= b),
+}
+
+def evaluate(expr, doc):
+    if isinstance(expr, str):
+        if expr == "$$REMOVE":
+            return MISSING
+        return _get(doc, expr[1:]) if expr.startswith("$") else expr
+    if isinstance(expr, list):
+        return [evaluate(item, doc) for item in expr]
+    if isinstance(expr, dict):
+        if len(expr) == 1 and next(iter(expr)).startswith("$"):
+            op, args = next(iter(expr.items()))
+            return OPERATORS[op](args, doc)
+        # Object expression: fields that evaluate to missing are left out
+        fields = ((key, evaluate(value, doc)) for key, value in expr.items())
+        return {key: value for key, value in fields if value is not MISSING}
+    return expr
+
+def run_pipeline(doc: dict, pipeline: list) -> dict:
+    for stage in pipeline:
+        (op, fields), = stage.items()
+        assert op == "$set", f"unsupported stage {op}"
+        # Every expression in a stage sees the document as it was before the stage
+        values = {field: evaluate(expr, doc) for field, expr in fields.items()}
+        doc = copy.deepcopy(doc)
+        for field, value in values.items():
+            if value is MISSING:
+                doc.pop(field, None)
+            else:
+                doc[field] = value
+    return doc
+
+XP_DOCS = [
+    {},
+    {"currentXp": None, "maxXp": None, "level": None},
+    {"currentXp": 0, "maxXp": 1000, "level": 1},
+    {"currentXp": 990, "maxXp": 1000, "level": 1},
+    {"currentXp": 1190, "maxXp": 1200, "level": 2, "dataVersion": 7},
+]
+
+@pytest.mark.parametrize("doc", XP_DOCS)
+@pytest.mark.parametrize("amount", [0, 9, 10, 210, 1000, 2500])
+def test_xp_award_pipeline_matches_apply_xp(doc, amount):
+    expected = copy.deepcopy(doc)
+    apply_xp(expected, amount)
+    bump_data_version(expected)
+    assert run_pipeline(doc, [*xp_award_pipeline(amount), DATA_VERSION_BUMP_STAGE]) == expected
+
+def test_xp_level_up_boundaries():
+    assert run_pipeline({"currentXp": 990, "maxXp": 1000, "level": 1}, xp_award_pipeline(9)) == \
+        {"currentXp": 999, "maxXp": 1000, "level": 1}
+    assert run_pipeline({"currentXp": 990, "maxXp": 1000, "level": 1}, xp_award_pipeline(10)) == \
+        {"currentXp": 0, "maxXp": 1200, "level": 2}
+    # 1000 + 1200 + 1440 to reach level 4
+    assert run_pipeline({}, xp_award_pipeline(3640)) == {"currentXp": 0, "maxXp": 1728, "level": 4}
+
+STREAK_DOCS = [
+    {},
+    {"currentStreak": 2, "longestStreak": 5, "lastCompletedDate": "2024-03-01"},
+    {"currentStreak": 1, "longestStreak": 1, "lastCompletedDate": "2024-03-02"},
+    {"currentStreak": 3, "longestStreak": 3, "lastCompletedDate": "2024-03-02"},
+    {
+        "currentStreak": 3, "longestStreak": 3, "lastCompletedDate": "2024-03-02",
+        "streakUndo": {"currentStreak": 2, "longestStreak": 2, "lastCompletedDate": "2024-03-01"},
+    },
+    {
+        "currentStreak": 1, "longestStreak": 4, "lastCompletedDate": "2024-03-02",
+        "streakUndo": {"currentStreak": 0, "longestStreak": 4, "lastCompletedDate": None},
+    },
+]
+# Same day, next day, after a gap, and an older day (ignored)
+STREAK_DAYS = ["2024-03-01", "2024-03-02", "2024-03-03", "2024-03-05"]
+
+@pytest.mark.parametrize("doc", STREAK_DOCS)
+@pytest.mark.parametrize("completed", [True, False])
+@pytest.mark.parametrize("day", STREAK_DAYS)
+def test_streak_update_stages_match_apply_streak_update(doc, completed, day):
+    expected = copy.deepcopy(doc)
+    apply_streak_update(expected, completed, day)
+    assert run_pipeline(doc, streak_update_stages(completed, day)) == expected
+
+@pytest.mark.parametrize("doc", STREAK_DOCS)
+@pytest.mark.parametrize("day", STREAK_DAYS)
+def test_toggle_pipeline_matches_the_memory_toggle(doc, day):
+    pytest.importorskip("pymongo")
+    from app.database.mongo_repositories import toggle_pipeline
+
+    for is_completed in (False, True):
+        habit = {**doc, "isCompleted": is_completed}
+        expected = copy.deepcopy(habit)
+        expected["isCompleted"] = not is_completed
+        apply_streak_update(expected, expected["isCompleted"], day)
+        assert run_pipeline(habit, toggle_pipeline(day)) == expected
+
+def test_completing_then_undoing_a_day_restores_the_streak():
+    doc = {"currentStreak": 2, "longestStreak": 2, "lastCompletedDate": "2024-03-01"}
+    completed = run_pipeline(doc, streak_update_stages(True, "2024-03-02"))
+    assert (completed["currentStreak"], completed["longestStreak"]) == (3, 3)
+    assert run_pipeline(completed, streak_update_stages(False, "2024-03-02")) == doc
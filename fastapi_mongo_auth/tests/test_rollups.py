@@ -0,0 +1,52 @@
+from datetime import date
+import pytest
+from bson import ObjectId
+from app.database.rollups import log_delta, period_start, rebuild_rollups, rollup_operations
+
+# Runs without MongoDB. To run: pytest tests/test_rollups.py
+
+def test_period_start():
+    assert period_start(date(2024, 1, 3), "week") == date(2024, 1, 1)  # Wednesday -> Monday
+    assert period_start(date(2024, 1, 1), "week") == date(2024, 1, 1)
+    assert period_start(date(2024, 2, 29), "month") == date(2024, 2, 1)
+
+def test_log_delta():
+    assert log_delta(None, {"steps": 100, "waterMl": 500}) == {"steps": 100, "waterMl": 500, "proteinG": 0, "days": 1}
+    assert log_delta({"steps": 100}, {"steps": 40}) == {"steps": -60, "waterMl": 0, "proteinG": 0, "days": 0}
+
+def test_rollup_operations_merge_same_period():
+    user_id = ObjectId()
+    operations = rollup_operations(user_id, [
+        ("2024-01-01", {"steps": 10, "days": 1}),
+        ("2024-01-02", {"steps": 5, "days": 1}),
+        ("2024-01-08", {"steps": 1, "days": 0}),
+        ("not-a-date", {"steps": 99, "days": 1}),
+    ])
+    docs = {(op._filter["periodType"], op._filter["periodStart"]): op._doc["$inc"] for op in operations}
+    assert docs == {
+        ("week", "2024-01-01"): {"steps": 15, "days": 2},
+        ("week", "2024-01-08"): {"steps": 1},
+        ("month", "2024-01-01"): {"steps": 16, "days": 2},
+    }
+
+@pytest.mark.asyncio
+async def test_full_rebuild_drops_rollups_of_users_without_logs():
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    db = mongomock_motor.AsyncMongoMockClient()["test"]
+    active, deleted = ObjectId(), ObjectId()
+    await db.logs.insert_many([
+        {"userId": active, "date": "2024-01-01", "steps": 10},
+        {"userId": active, "date": "2024-01-02", "steps": 5},
+    ])
+    # `deleted` had logs once; all of them are gone now
+    await db.log_rollups.insert_many([
+        {"userId": deleted, "periodType": period_type, "periodStart": "2024-01-01", "days": 1, "steps": 99}
+        for period_type in ("week", "month")
+    ])
+
+    assert await rebuild_rollups(db) == 1
+    rollups = await db.log_rollups.find({}, {"_id": 0}).to_list(length=None)
+    assert {(rollup["userId"], rollup["periodType"], rollup["steps"], rollup["days"]) for rollup in rollups} == {
+        (active, "week", 15, 2),
+        (active, "month", 15, 2),
+    }
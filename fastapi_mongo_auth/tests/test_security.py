@@ -0,0 +1,57 @@
+from datetime import timedelta
+import pytest
+from passlib.context import CryptContext
+from app.core.security import (
+    JWT_DECODERS,
+    JWTError,
+    calibrate_bcrypt_rounds,
+    create_access_token,
+    decode_token,
+    get_password_hash,
+    token_cache,
+    verify_and_update_password,
+    verify_password,
+)
+
+# Runs without MongoDB. To run: pytest tests/test_security.py
+
+@pytest.mark.parametrize("backend", sorted(JWT_DECODERS))
+def test_backends_agree(backend):
+    decode = JWT_DECODERS[backend]()
+    token = create_access_token("test@example.com", extra_claims={"id": "abc"})
+    claims = decode(token)
+    assert claims["sub"] == "test@example.com"
+    assert claims["id"] == "abc"
+
+    with pytest.raises(JWTError):
+        decode(token[:-4] + "AAAA")
+    with pytest.raises(JWTError):
+        decode(create_access_token("test@example.com", expires_delta=timedelta(seconds=-1)))
+
+def test_decode_token_caches_verified_claims():
+    token_cache.clear()
+    token = create_access_token("test@example.com")
+    first = decode_token(token)
+    assert decode_token(token) is first
+    assert len(token_cache) == 1
+
+def test_decode_token_rejects_invalid_tokens():
+    with pytest.raises(JWTError):
+        decode_token("not-a-token")
+
+def test_long_passwords_are_not_truncated():
+    long_password = "x" * 100
+    hashed = get_password_hash(long_password)
+    assert verify_password(long_password, hashed)
+    assert not verify_password("x" * 72, hashed)
+
+def test_legacy_bcrypt_hashes_are_upgraded():
+    legacy_hash = CryptContext(schemes=["bcrypt"]).hash("testpassword")
+    verified, new_hash = verify_and_update_password("testpassword", legacy_hash)
+    assert verified
+    assert new_hash.startswith("$bcrypt-sha256$")
+    assert verify_and_update_password("testpassword", new_hash) == (True, None)
+
+def test_calibration_stays_in_bounds():
+    assert calibrate_bcrypt_rounds(1, min_rounds=10, max_rounds=16) == 10
+    assert calibrate_bcrypt_rounds(10 ** 9, min_rounds=10, max_rounds=16) == 16
@@ -0,0 +1,16 @@
+import json
+from bson import ObjectId
+from app.core.serialization import DocumentSerializer, MongoJSONResponse
+from app.models.habit import HabitResponse
+
+# Runs without MongoDB. To run: pytest tests/test_serialization.py
+
+def test_serializer_matches_response_model_output():
+    doc = {"_id": ObjectId(), "userId": ObjectId(), "title": "Read", "isCompleted": True, "internal": 1}
+    fast = json.loads(MongoJSONResponse(DocumentSerializer(HabitResponse).one(doc)).body)
+    slow = HabitResponse(**doc).model_dump(mode="json", by_alias=True)
+    assert fast == slow  # Defaults filled in, unknown keys dropped
+
+def test_response_encodes_object_ids():
+    oid = ObjectId()
+    assert json.loads(MongoJSONResponse({"id": oid}).body) == {"id": str(oid)}
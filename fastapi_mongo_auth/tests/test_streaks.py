@@ -0,0 +1,37 @@
+from datetime import date
+from app.core.streaks import compute_streaks, current_streak, daily_goal_for, goal_met, is_iso_date
+
+# Runs without MongoDB. To run: pytest tests/test_streaks.py
+
+def test_compute_streaks():
+    assert compute_streaks([]) == (0, 0, None)
+    days = ["2024-01-01", "2024-01-02", "2024-01-03", "2024-01-05", "2024-01-06"]
+    assert compute_streaks(days) == (2, 3, "2024-01-06")
+    assert compute_streaks(["2024-02-28", "2024-02-29", "2024-02-29", "2024-03-01"]) == (3, 3, "2024-03-01")
+
+def test_current_streak_expires_after_a_missed_day():
+    today = date(2024, 1, 10)
+    assert current_streak(4, "2024-01-10", today) == 4
+    assert current_streak(4, "2024-01-09", today) == 4
+    assert current_streak(4, "2024-01-08", today) == 0
+    assert current_streak(4, None, today) == 0
+
+def test_daily_goal_for():
+    assert daily_goal_for("Walk 10k Steps", "10,000 steps") == ("steps", 10000)
+    assert daily_goal_for("Steps", "7.5k") == ("steps", 7500)
+    assert daily_goal_for("Drink water", "2500 ml") == ("waterMl", 2500)
+    assert daily_goal_for("Meditate", "20 minutes") is None
+    assert daily_goal_for("Protein", "a lot") is None
+
+def test_goal_met():
+    assert goal_met({"steps": 8000}, ("steps", 8000))
+    assert not goal_met({"steps": 7999}, ("steps", 8000))
+    assert not goal_met(None, ("steps", 8000))
+    assert not goal_met({"steps": 8000}, None)
+
+def test_is_iso_date():
+    assert is_iso_date("2024-01-05")
+    assert not is_iso_date("2024-1-5")
+    assert not is_iso_date("20240105")  # Accepted by date.fromisoformat, but not how logs are keyed
+    assert not is_iso_date("2024-02-30")
+    assert not is_iso_date("bad")
@@ -0,0 +1,71 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.cache import principal_cache
+from app.core.revocation import RevocationList
+from app.core.security import create_access_token, create_refresh_token, decode_token
+from app.database.connection import get_repositories
+from app.database.memory_repositories import MemoryRepositories
+from app.routes import auth_routes
+
+# Runs without MongoDB. To run: pytest tests/test_token_revocation.py
+
+@pytest.fixture
+def auth_client(repos, user) -> TestClient:
+    # The real get_current_user: tokens are decoded and checked against the revocation list
+    principal_cache.clear()
+    app = FastAPI()
+    app.include_router(auth_routes.router)
+    app.dependency_overrides[get_repositories] = lambda: repos
+    return TestClient(app)
+
+def _bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+def test_refresh_rotates_and_rejects_reuse(auth_client, user):
+    refresh_token = create_refresh_token(subject=user.email)
+
+    response = auth_client.post("/auth/refresh", params={"refresh_token": refresh_token})
+    assert response.status_code == 200
+    tokens = response.json()
+    assert tokens["refresh_token"] != refresh_token
+    assert auth_client.get("/auth/me", headers=_bearer(tokens["access_token"])).json()["email"] == user.email
+
+    # The rotated-out token is single use; its replacement still works once
+    assert auth_client.post("/auth/refresh", params={"refresh_token": refresh_token}).status_code == 401
+    assert auth_client.post("/auth/refresh", params={"refresh_token": tokens["refresh_token"]}).status_code == 200
+
+    access_token = create_access_token(subject=user.email)
+    assert auth_client.post("/auth/refresh", params={"refresh_token": access_token}).status_code == 401
+
+def test_logout_revokes_the_access_and_refresh_tokens(auth_client, user):
+    access_token = create_access_token(subject=user.email)
+    refresh_token = create_refresh_token(subject=user.email)
+    assert auth_client.get("/auth/me", headers=_bearer(access_token)).status_code == 200
+
+    response = auth_client.post("/auth/logout", params={"refresh_token": refresh_token}, headers=_bearer(access_token))
+    assert response.status_code == 200
+    assert auth_client.get("/auth/me", headers=_bearer(access_token)).status_code == 401
+    assert auth_client.post("/auth/refresh", params={"refresh_token": refresh_token}).status_code == 401
+    # Other sessions are unaffected
+    assert auth_client.get("/auth/me", headers=_bearer(create_access_token(subject=user.email))).status_code == 200
+
+@pytest.mark.asyncio
+async def test_failed_revocation_is_not_mirrored():
+    tokens = MemoryRepositories().revoked_tokens
+    revocation_list = RevocationList()
+
+    async def failing_insert(jti, expires_at, revoked_at):
+        raise ConnectionError("database unavailable")
+
+    insert = tokens.insert
+    tokens.insert = failing_insert
+    payload = decode_token(create_refresh_token(subject="someone@example.com"))
+    with pytest.raises(ConnectionError):
+        await revocation_list.revoke(tokens, payload["jti"], payload["exp"])
+    assert not revocation_list.is_revoked(payload["jti"])
+
+    tokens.insert = insert
+    assert await revocation_list.revoke(tokens, payload["jti"], payload["exp"])
+    assert revocation_list.is_revoked(payload["jti"])
+    assert not await revocation_list.revoke(tokens, payload["jti"], payload["exp"])  # Already revoked
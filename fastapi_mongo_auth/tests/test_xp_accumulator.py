@@ -0,0 +1,152 @@
+import asyncio
+import pytest
+from bson import ObjectId
+from app.core.xp_accumulator import XpAccumulator, xp_accumulator
+
+# Runs without MongoDB. To run: pytest tests/test_xp_accumulator.py
+
+@pytest.fixture
+def user_fields():
+    return {"currentXp": 990}
+
+@pytest.mark.asyncio
+async def test_awards_are_coalesced_and_leveled_up_at_flush(repos, user):
+    user_id = str(user.id)
+    accumulator = XpAccumulator()
+    for _ in range(3):
+        accumulator.add(user_id, 10)
+
+    # Nothing written yet, but the profile already shows the awards
+    assert (user.level, user.current_xp) == (1, 990)
+    merged = accumulator.merge(user)
+    assert (merged.level, merged.current_xp, merged.max_xp) == (2, 20, 1200)
+
+    await accumulator.flush(repos.users)
+    stored = await repos.users.find_by_email(user.email)
+    assert (stored["level"], stored["currentXp"], stored["maxXp"]) == (2, 20, 1200)
+    assert stored["dataVersion"] == 1  # One write for all three awards
+    assert not accumulator.has_pending(user_id)
+    assert accumulator.stats()["flushes"] == 1
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_the_awards(repos, user):
+    user_id = str(user.id)
+    accumulator = XpAccumulator()
+    accumulator.add(user_id, 10)
+
+    async def fail(awards):
+        raise RuntimeError("database unavailable")
+
+    award_xp_many = repos.users.award_xp_many
+    repos.users.award_xp_many = fail
+    with pytest.raises(RuntimeError):
+        await accumulator.flush(repos.users)
+    accumulator.add(user_id, 10)
+    assert accumulator.pending_xp(user_id) == 20
+    assert accumulator.stats()["flush_failures"] == 1
+
+    repos.users.award_xp_many = award_xp_many
+    await accumulator.flush(repos.users)
+    stored = await repos.users.find_by_email(user.email)
+    assert (stored["level"], stored["currentXp"]) == (2, 10)
+
+@pytest.mark.asyncio
+async def test_partially_failed_flush_retries_only_the_failed_users(monkeypatch, repos, insert_user):
+    good_id = await insert_user("good@example.com", "0123456780", currentXp=990)
+    bad_id = await insert_user("bad@example.com", "0123456781", currentXp=990)
+    accumulator = XpAccumulator()
+    accumulator.add(good_id, 10)
+    accumulator.add(bad_id, 10)
+
+    update = repos.users._update
+
+    def failing_update(user_id, change):
+        if str(user_id) == bad_id:
+            raise TypeError("can't add XP to a non-numeric currentXp")
+        return update(user_id, change)
+
+    monkeypatch.setattr(repos.users, "_update", failing_update)
+    await accumulator.flush(repos.users)
+    await accumulator.flush(repos.users)
+    assert accumulator.stats()["flush_failures"] == 2
+    assert accumulator.pending_xp(bad_id) == 10
+    assert not accumulator.has_pending(good_id)
+
+    good = await repos.users.find_by_email("good@example.com")
+    assert (good["level"], good["currentXp"], good["dataVersion"]) == (2, 0, 1)  # Credited exactly once
+
+    monkeypatch.setattr(repos.users, "_update", update)
+    await accumulator.flush(repos.users)
+    assert (await repos.users.find_by_email("bad@example.com"))["level"] == 2
+    assert (await repos.users.find_by_email("good@example.com"))["currentXp"] == 0
+
+@pytest.mark.asyncio
+async def test_mongo_award_xp_many_reports_the_failed_updates():
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    from pymongo.errors import BulkWriteError
+    from app.database.mongo_repositories import MongoUserRepository
+
+    users = MongoUserRepository(mongomock_motor.AsyncMongoMockClient()["test"])
+    good_id, bad_id = ObjectId(), ObjectId()
+    await users.collection.insert_many([
+        {"_id": good_id, "email": "good@example.com", "level": 1, "currentXp": 990, "maxXp": 1000},
+        {"_id": bad_id, "email": "bad@example.com", "level": 1, "currentXp": "lots", "maxXp": 1000},
+    ])
+
+    async def bulk_write(operations, ordered=True):
+        # Unordered bulk write semantics: apply what succeeds, then report the failures by index
+        write_errors = []
+        for index, operation in enumerate(operations):
+            try:
+                await users.collection.update_one(operation._filter, operation._doc)
+            except Exception as e:
+                write_errors.append({"index": index, "code": 14, "errmsg": str(e)})
+        if write_errors:
+            raise BulkWriteError({"writeErrors": write_errors, "nModified": len(operations) - len(write_errors)})
+
+    users.collection.bulk_write = bulk_write
+    updated, errors = await users.award_xp_many({good_id: 10, bad_id: 10})
+    assert [user["_id"] for user in updated] == [good_id]
+    assert (updated[0]["level"], updated[0]["currentXp"]) == (2, 0)
+    assert list(errors) == [bad_id]
+
+@pytest.mark.asyncio
+async def test_size_threshold_triggers_a_flush(monkeypatch, repos, insert_user):
+    user_ids = [await insert_user(f"xp{index}@example.com", f"012345678{index}", currentXp=990) for index in range(2)]
+    accumulator = XpAccumulator(max_pending=2)
+    monkeypatch.setattr("app.core.xp_accumulator.settings.XP_FLUSH_INTERVAL_SECONDS", 60)
+    loop_task = asyncio.create_task(accumulator.run_flush_loop(repos.users))
+    await asyncio.sleep(0)
+    assert accumulator.enabled
+
+    for user_id in user_ids:
+        accumulator.add(user_id, 10)
+    for _ in range(100):
+        if accumulator.stats()["flushes"]:
+            break
+        await asyncio.sleep(0.01)
+    assert accumulator.stats()["flushes"] == 1
+    assert (await repos.users.find_by_email("xp1@example.com"))["level"] == 2
+
+    loop_task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await loop_task
+    assert not accumulator.enabled
+
+def test_profile_reads_its_own_pending_xp(monkeypatch, repos, user, client):
+    monkeypatch.setattr(xp_accumulator, "enabled", True)
+    monkeypatch.setattr(xp_accumulator, "_pending", {})
+
+    habit = client.post("/habits", json={"title": "Read"}).json()
+    client.post(f"/habits/{habit['_id']}/toggle")
+    # Nothing written to the user yet: no version bump, so no ETag either
+    assert asyncio.run(repos.users.find_by_email(user.email)).get("dataVersion", 0) == 0
+    response = client.get("/user/profile")
+    assert (response.json()["level"], response.json()["currentXp"]) == (2, 0)
+    assert "ETag" not in response.headers
+    assert "ETag" not in client.get("/habits").headers
+
+    asyncio.run(xp_accumulator.flush(repos.users))
+    response = client.get("/user/profile")
+    assert (response.json()["level"], response.json()["currentXp"]) == (2, 0)
+    assert "ETag" in response.headers